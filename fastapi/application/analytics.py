@@ -0,0 +1,221 @@
+"""
+Spend Analytics Module.
+
+This module maintains the `spend_rollups` table and builds the queries behind the `/post/analytics/spend`
+endpoints.
+
+Key Features:
+-------------
+1. **Incremental Maintenance**:
+   - `record_spend` upserts a posting into its (customer, account, transaction type, day) rollup in the posting's
+     own database transaction, with `INSERT ... ON DUPLICATE KEY UPDATE` on MySQL and `INSERT ... ON CONFLICT`
+     elsewhere, so the rollups are exactly as current as the postings.
+
+2. **Chunked Rebuild**:
+   - `rebuild_spend_rollups` recomputes the rollups from the debit legs of the journal (which mirror every raw
+     transaction table) one chunk of days at a time, each chunk in its own transaction, so rebuilding years of
+     history never holds long locks or a huge transaction.
+
+3. **Range Queries**:
+   - `spend_by_type_query` and `spend_series_query` aggregate the rollups of a date range, reading at most one
+     row per account, type and day.
+
+Usage:
+------
+    python -m application.analytics rebuild
+    python -m application.analytics rebuild --from 2024-01-01 --to 2024-12-31 --chunk-days 7
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, delete, func, extract, literal
+from .models.analytics import SpendRollup
+from .models.transactions import JournalEntry, DEBIT
+
+REBUILD_CHUNK_DAYS = 7  # Days of journal entries rebuilt per transaction
+
+
+def upsert_statement(dialect_name, rows):
+    """
+    Builds an upsert adding `rows` to the existing rollups.
+
+    Args:
+        dialect_name (str): The database dialect ("mysql", "sqlite" or "postgresql").
+        rows (list[dict]): Rollup rows with every `SpendRollup` column.
+
+    Returns:
+        The insert statement, adding counts and totals to rows that already exist.
+    """
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(SpendRollup).values(rows)
+        return statement.on_duplicate_key_update(
+            transaction_count=SpendRollup.transaction_count + statement.inserted.transaction_count,
+            total_amount=SpendRollup.total_amount + statement.inserted.total_amount,
+        )
+
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(SpendRollup).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[column.name for column in SpendRollup.__table__.primary_key],
+        set_={
+            "transaction_count": SpendRollup.transaction_count + statement.excluded.transaction_count,
+            "total_amount": SpendRollup.total_amount + statement.excluded.total_amount,
+        },
+    )
+
+
+async def record_spend(db, transaction):
+    """
+    Adds a posting to its spend rollup.
+
+    Args:
+        db (AsyncSession): The database session; the upsert joins the posting's transaction.
+        transaction (Transaction): The posting, flushed so its transaction type is set.
+    """
+    row = {
+        "customer_no": transaction.owner_customer_no,
+        "account": transaction.account,
+        "transaction_type": transaction.transaction_type,
+        "day": transaction.date_posted.date(),
+        "transaction_count": 1,
+        "total_amount": transaction.amount,
+    }
+    await db.execute(upsert_statement(db.bind.dialect.name, [row]))
+
+
+def rebuild_spend_rollups(db, start=None, end=None, chunk_days=REBUILD_CHUNK_DAYS):
+    """
+    Recomputes the spend rollups of a date range from the journal, one chunk of days per transaction.
+
+    Rollups of each chunk are deleted and re-inserted with an `INSERT ... SELECT` over the journal's debit legs.
+    Run it for past ranges or at quiet times: a posting committed while its day is being rebuilt may be counted
+    twice or not at all until that day is rebuilt again.
+
+    Args:
+        db (Session): The database session used to run the rebuild.
+        start (date): First day to rebuild; defaults to the day of the first journal entry.
+        end (date): Last day to rebuild (inclusive); defaults to the day of the last journal entry.
+        chunk_days (int): Number of days rebuilt per transaction.
+
+    Returns:
+        int: Number of chunks rebuilt.
+    """
+    first, last = db.execute(select(func.min(JournalEntry.date_posted), func.max(JournalEntry.date_posted))).one()
+    if first is None:
+        return 0
+    start = start or first.date()
+    end = end or last.date()
+
+    columns = ["customer_no", "account", "transaction_type", "day", "transaction_count", "total_amount"]
+    day = func.date(JournalEntry.date_posted)
+    chunks = 0
+    while start <= end:
+        stop = min(start + timedelta(days=chunk_days), end + timedelta(days=1))
+        db.execute(delete(SpendRollup).where(SpendRollup.day >= start, SpendRollup.day < stop))
+        rollups = (
+            select(
+                JournalEntry.owner_customer_no,
+                JournalEntry.account,
+                JournalEntry.transaction_type,
+                day,
+                func.count(),
+                func.sum(JournalEntry.amount),
+            )
+            .where(
+                JournalEntry.direction == DEBIT,
+                JournalEntry.owner_customer_no.is_not(None),
+                JournalEntry.date_posted >= datetime.combine(start, datetime.min.time()),
+                JournalEntry.date_posted < datetime.combine(stop, datetime.min.time()),
+            )
+            .group_by(JournalEntry.owner_customer_no, JournalEntry.account, JournalEntry.transaction_type, day)
+        )
+        db.execute(SpendRollup.__table__.insert().from_select(columns, rollups))
+        db.commit()
+        start = stop
+        chunks += 1
+    return chunks
+
+
+def sync_spend_rollups(db):
+    """
+    Builds the rollups for postings made before the rollup table existed, if the table is still empty. Runs once per
+    deploy from `python -m application.backfill`.
+
+    Args:
+        db (Session): The database session used to run the backfill.
+    """
+    if db.execute(select(literal(1)).select_from(SpendRollup).limit(1)).first() is None:
+        rebuild_spend_rollups(db)
+
+
+def _range_filters(customer_no, start, end, account, transaction_type):
+    filters = [SpendRollup.customer_no == customer_no, SpendRollup.day >= start, SpendRollup.day <= end]
+    if account is not None:
+        filters.append(SpendRollup.account == account)
+    if transaction_type is not None:
+        filters.append(SpendRollup.transaction_type == transaction_type)
+    return filters
+
+
+def spend_by_type_query(customer_no, start, end, account=None, transaction_type=None):
+    """
+    Builds the query for a customer's spend per transaction type between two days (inclusive).
+    """
+    return (
+        select(
+            SpendRollup.transaction_type,
+            func.sum(SpendRollup.transaction_count).label("transaction_count"),
+            func.sum(SpendRollup.total_amount).label("total_amount"),
+        )
+        .where(*_range_filters(customer_no, start, end, account, transaction_type))
+        .group_by(SpendRollup.transaction_type)
+        .order_by(SpendRollup.transaction_type)
+    )
+
+
+def spend_series_query(customer_no, start, end, period, account=None, transaction_type=None):
+    """
+    Builds the query for a customer's spend per day or per month between two days (inclusive).
+
+    Args:
+        period (str): "day" or "month". Monthly rows are keyed by year and month.
+    """
+    if period == "day":
+        keys = [SpendRollup.day]
+    else:
+        keys = [extract("year", SpendRollup.day).label("year"), extract("month", SpendRollup.day).label("month")]
+    return (
+        select(
+            *keys,
+            func.sum(SpendRollup.transaction_count).label("transaction_count"),
+            func.sum(SpendRollup.total_amount).label("total_amount"),
+        )
+        .where(*_range_filters(customer_no, start, end, account, transaction_type))
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the spend analytics rollups.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="Recompute the rollups from the journal.")
+    rebuild.add_argument("--from", dest="start", type=date.fromisoformat, default=None)
+    rebuild.add_argument("--to", dest="end", type=date.fromisoformat, default=None)
+    rebuild.add_argument("--chunk-days", type=int, default=REBUILD_CHUNK_DAYS)
+    args = parser.parse_args()
+
+    from .database import engine, session
+
+    SpendRollup.__table__.create(bind=engine, checkfirst=True)
+    with session() as db:
+        chunks = rebuild_spend_rollups(db, args.start, args.end, args.chunk_days)
+    print(f"Rebuilt {chunks} chunks of spend rollups.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Backfill Module.
+
+This module fills the derived tables (the account directory, the journal and the spend rollups) for rows written
+before those tables existed. It is a one-off deploy step, run once after the release that adds the tables and
+before traffic is switched over, never by the API workers:
+
+    python -m application.backfill
+
+Key Features:
+-------------
+1. **Ordered Steps**:
+   - The account directory is backfilled first, then the journal, then the spend rollups, which are built from the
+     journal's debit legs.
+
+2. **Safe to Re-Run**:
+   - Each step skips rows that are already backfilled (`sync_spend_rollups` only builds the rollups while the table
+     is still empty), so running the command again, or on every deploy, is a cheap no-op.
+"""
+
+import argparse
+from .models.directory import AccountDirectory, sync_account_directory
+from .models.transactions import JournalEntry, sync_journal
+from .models.analytics import SpendRollup
+from .analytics import sync_spend_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the account directory, journal and spend rollups.")
+    parser.parse_args()
+
+    from .database import engine, session
+
+    for table in (AccountDirectory.__table__, JournalEntry.__table__, SpendRollup.__table__):
+        table.create(bind=engine, checkfirst=True)
+    with session() as db:
+        sync_account_directory(db)
+        print("Backfilled the account directory.")
+        sync_journal(db)
+        print("Backfilled the journal.")
+        sync_spend_rollups(db)
+        print("Backfilled the spend rollups.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Group Commit Benchmark.
+
+Compares the default per-request commit with the group-commit posting mode (`application/group_commit.py`) by
+firing concurrent transfers through the shared posting path and reporting throughput and latency for each mode.
+
+Usage:
+------
+    python -m application.bench.group_commit
+    python -m application.bench.group_commit --postings 5000 --concurrency 200 --modes direct group
+
+The benchmark writes to the configured database, so point it at a scratch database, e.g.:
+
+    DATABASE_URL=sqlite:///bench.db ASYNC_DATABASE_URL=sqlite+aiosqlite:///bench.db \\
+        python -m application.bench.group_commit
+
+It seeds one benchmark customer and `--accounts` funded accounts (once; later runs reuse them), then posts
+`--postings` transfers of 1.00 spread round-robin over the accounts, with `--concurrency` requests in flight.
+Spend limits use the in-process limiter unless `STORE_BACKEND` is set.
+"""
+
+import os
+
+# Settings are read on import: keep spend counters in process and reserve reference numbers in large blocks, so
+# the benchmark measures commits rather than Redis or sequence round trips.
+os.environ.setdefault("STORE_BACKEND", "local")
+os.environ.setdefault("REF_BLOCK_SIZE", "1000000")
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+import numpy as np
+from ..config import settings
+from ..database import engine, session, async_engine, async_session
+from ..group_commit import committer
+# Every model module is imported so `create_all` sees the whole schema
+from ..models import Base, accounts, cards, customer_service, directory, files, loans, scheduling, term_deposits, users
+from ..models.transactions import Transfer
+from ..refs import async_next_ref
+from ..routes import transactions
+from ..schema.transactions import Transaction
+
+BENCH_CUSTOMER = 990000001
+BENCH_BALANCE = 1e12
+
+
+def account_numbers(count):
+    """
+    Returns the account numbers of the benchmark accounts.
+    """
+    return [f"bench-{i:06d}" for i in range(count)]
+
+
+def seed(count):
+    """
+    Creates the tables, the benchmark customer and `count` funded accounts, skipping any that already exist.
+    """
+    engine.echo = False
+    Base.metadata.create_all(bind=engine)
+    with session() as db:
+        if db.query(users.Customer).filter_by(customer_no=BENCH_CUSTOMER).first() is None:
+            db.add(users.Customer(full_name="Benchmark", password_hash="-", email="bench@example.com", pin="-",
+                                  customer_no=BENCH_CUSTOMER))
+        existing = {account_no for (account_no,) in db.query(accounts.PersonalAccounts.account_no)}
+        for account_no in account_numbers(count):
+            if account_no in existing:
+                continue
+            db.add(accounts.PersonalAccounts(
+                account_no=account_no, owner_customer_no=BENCH_CUSTOMER, account_balance=BENCH_BALANCE,
+                account_type="Savings Account", account_name="Benchmark", id_no="0", kra_pin="-", nationality="KE",
+                address="-", telephone="-", email="bench@example.com", dob=datetime(1990, 1, 1), annual_income=0,
+                source_of_funds="-", intended_usage="-", nssf_no="-", nok_relationship="-", next_of_kin="-",
+                next_of_kin_id="-", employment_status="-",
+            ))
+        db.commit()
+
+
+async def run(mode, postings, concurrency, account_nos):
+    """
+    Posts `postings` transfers in the given posting mode.
+
+    Args:
+        mode (str): "direct" (one commit per posting) or "group".
+        postings (int): Number of transfers to post.
+        concurrency (int): Number of postings in flight at once.
+        account_nos (list[str]): Accounts to debit, used round-robin.
+
+    Returns:
+        dict: Throughput and latency percentiles.
+    """
+    settings.posting_mode = mode
+    if mode == "group":
+        committer.start()
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def post(i):
+        payload = {"account": account_nos[i % len(account_nos)], "amount": 1.0, "beneficiary": "0700000000"}
+        async with slots:
+            started = time.perf_counter()
+            async with async_session() as db:
+                await transactions._post_transaction(
+                    db,
+                    Transfer(date_posted=datetime.now(), owner_customer_no=BENCH_CUSTOMER, **payload),
+                    Transaction(payload=payload, signature="bench"),
+                )
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(i) for i in range(postings)))
+    elapsed = time.perf_counter() - started
+    await committer.stop()
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {"seconds": elapsed, "per_second": postings / elapsed, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+
+
+async def run_all(args, account_nos):
+    """
+    Runs every requested mode on one event loop (the async connection pool is bound to it) and prints the results.
+    """
+    try:
+        await async_next_ref()  # Reserve the first reference block before any posting transaction is open
+        for mode in args.modes:
+            result = await run(mode, args.postings, args.concurrency, account_nos)
+            print(
+                f"{mode:<7} {args.postings:>8,} postings  {result['seconds']:7.2f} s  {result['per_second']:9.1f} /s  "
+                f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms"
+            )
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request commits against group commit.")
+    parser.add_argument("--postings", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--modes", nargs="+", default=["direct", "group"], choices=["direct", "group"])
+    args = parser.parse_args()
+
+    seed(args.accounts)
+    asyncio.run(run_all(args, account_numbers(args.accounts)))
+
+
+if __name__ == "__main__":
+    main()
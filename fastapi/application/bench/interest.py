@@ -0,0 +1,84 @@
+"""
+Interest Engine Benchmark.
+
+Measures the per-row cost of the vectorized interest engine on synthetic portfolios, so changes to
+`application/interest.py` can be compared between commits.
+
+Usage:
+------
+    python -m application.bench.interest
+    python -m application.bench.interest --rows 1000000 10000000 --repeat 3
+
+For each portfolio size the benchmark generates random principals, rates, compounding frequencies and
+accrual dates, runs `interest.accrue` under both day-count conventions, and reports the best wall-clock time
+and the per-row cost in nanoseconds.
+"""
+
+import argparse
+import time
+import numpy as np
+from .. import interest
+
+
+def synthetic_portfolio(rows, seed=0):
+    """
+    Generates columnar loan data for `rows` synthetic loans.
+
+    Args:
+        rows (int): Number of loans to generate.
+        seed (int): Seed for the random generator, so runs are comparable.
+
+    Returns:
+        dict: Arrays for principal, rate, frequency, start and end dates.
+    """
+    rng = np.random.default_rng(seed)
+    end = np.datetime64("2025-01-01", "D")
+    return {
+        "principal": rng.uniform(1_000, 5_000_000, rows),
+        "rate": rng.uniform(1.0, 20.0, rows),
+        "frequency": rng.choice(["daily", "monthly", "annually"], rows),
+        "start": end - rng.integers(1, 31, rows).astype("timedelta64[D]"),
+        "end": np.full(rows, end),
+    }
+
+
+def run(rows, repeat):
+    """
+    Benchmarks `interest.accrue` on a portfolio of `rows` loans.
+
+    Args:
+        rows (int): Portfolio size.
+        repeat (int): Number of timed runs; the best one is reported.
+
+    Returns:
+        dict: Best seconds and nanoseconds per row, keyed by day-count convention.
+    """
+    portfolio = synthetic_portfolio(rows)
+    results = {}
+    for convention in interest.DAY_COUNT_CONVENTIONS:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            interest.accrue(convention=convention, **portfolio)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        results[convention] = {"seconds": best, "ns_per_row": best / rows * 1e9}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized interest engine.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        for convention, result in run(rows, args.repeat).items():
+            print(
+                f"{rows:>12,} rows  {convention:<7}  "
+                f"{result['seconds']:8.3f} s  {result['ns_per_row']:8.1f} ns/row"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Customer Cache Module.
+
+This module caches the read models the dashboard polls most, the customer's account balances and most recent
+transactions, so repeated polls are answered without touching the database.
+
+Key Features:
+-------------
+1. **Per-Customer Entries**:
+   - Entries are keyed by customer number and a name (e.g. "personal_accounts", "history") and expire after
+     `settings.cache_ttl` seconds, or the shorter TTL given for the entry.
+   - The in-process backend is a bounded LRU holding at most `settings.cache_max_entries` entries, and as many
+     generation numbers.
+
+2. **Write-Through Invalidation**:
+   - Every route that changes a customer's balances or history calls `invalidate(customer_no)` after its
+     commit. Invalidation bumps the customer's generation number; entries are stored under the generation read
+     before loading them, so a load that raced with a posting can never be served afterwards.
+
+3. **Fail-Open Reads**:
+   - A backend error while reading or storing an entry is logged and the request is served from `loader()`, so
+     an unavailable cache slows the dashboard down instead of failing it.
+
+4. **Metrics**:
+   - Hits, misses, invalidations and evictions are counted and exposed by `stats()` (served at `/metrics/cache`).
+
+Backends:
+---------
+- `RedisCacheBackend`: Shared by every API worker, so an invalidation is seen by all of them. Evictions are the
+  Redis server's own (`evicted_keys`). Generation numbers are kept without expiry, one small key per customer.
+- `LocalCacheBackend`: An in-process LRU for development and tests (`settings.store_backend = "local"`). Each
+  worker only sees its own invalidations; other workers may serve an entry until it expires.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+import redis.asyncio as aioredis
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCacheBackend:
+    """
+    Cache entries kept in Redis as JSON.
+
+    Attributes:
+        redis (redis.asyncio.Redis): The Redis client.
+    """
+
+    name = "redis"
+
+    def __init__(self, url):
+        self.redis = aioredis.from_url(url, decode_responses=True)
+
+    async def get(self, key):
+        raw = await self.redis.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key, value, ttl):
+        await self.redis.set(key, json.dumps(value), ex=ttl)
+
+    async def generation(self, key):
+        return int(await self.redis.get(key) or 0)
+
+    async def bump(self, key):
+        await self.redis.incr(key)
+
+    async def stats(self):
+        info = await self.redis.info("stats")
+        return {"evictions": info.get("evicted_keys"), "expirations": info.get("expired_keys"), "entries": None}
+
+
+class LocalCacheBackend:
+    """
+    Cache entries kept in process memory, evicting the least recently used entry when full.
+
+    Generation numbers are bounded the same way. They are drawn from one counter shared by every customer, and a
+    customer whose generation was evicted reads the counter's value at the last eviction (`generation_floor`),
+    which is at least any generation it had: its older entries are never served, while an entry loaded since its
+    last invalidation may still be.
+
+    Attributes:
+        max_entries (int): Most entries, and most generation numbers, held at once.
+    """
+
+    name = "local"
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (value, expires_at), least recently used first
+        self.generations = OrderedDict()  # key -> generation, least recently used first
+        self.generation_counter = 0
+        self.generation_floor = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value, ttl):
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def generation(self, key):
+        if key not in self.generations:
+            return self.generation_floor
+        self.generations.move_to_end(key)
+        return self.generations[key]
+
+    async def bump(self, key):
+        self.generation_counter += 1
+        self.generations[key] = self.generation_counter
+        self.generations.move_to_end(key)
+        while len(self.generations) > self.max_entries:
+            self.generations.popitem(last=False)
+            self.generation_floor = self.generation_counter
+
+    async def stats(self):
+        return {"evictions": self.evictions, "expirations": self.expirations, "entries": len(self.entries)}
+
+
+class CustomerCache:
+    """
+    Read-through cache of per-customer read models with generation-based invalidation.
+
+    Attributes:
+        backend: The storage backend (`RedisCacheBackend` or `LocalCacheBackend`).
+        ttl (int): Seconds an entry is served for.
+        prefix (str): Prefix for every key written by the cache.
+    """
+
+    def __init__(self, backend, ttl=None, prefix="cache"):
+        self.backend = backend
+        self.ttl = ttl or settings.cache_ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _generation_key(self, customer_no):
+        return f"{self.prefix}:generation:{customer_no}"
+
+    async def get_or_load(self, customer_no, name, loader, ttl=None):
+        """
+        Returns the cached entry `name` of a customer, loading and storing it on a miss.
+
+        Args:
+            customer_no (int): The customer the entry belongs to.
+            name (str): The name of the entry.
+            loader (callable): Coroutine function returning the (JSON-serialisable) value on a miss.
+            ttl (int): Seconds the entry is served for; defaults to the cache's `ttl`.
+
+        Returns:
+            The cached or freshly loaded value. If the backend fails, the error is logged and the value is loaded
+            without the cache.
+        """
+        try:
+            generation = await self.backend.generation(self._generation_key(customer_no))
+            key = f"{self.prefix}:{customer_no}:{generation}:{name}"
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Could not read the cache of customer {customer_no}: {e}")
+            self.misses += 1
+            return await loader()
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        try:
+            await self.backend.set(key, value, ttl or self.ttl)
+        except Exception as e:
+            logger.warning(f"Could not store the cache of customer {customer_no}: {e}")
+        return value
+
+    async def invalidate(self, customer_no):
+        """
+        Drops every cached entry of a customer. Call after committing a change to the customer's accounts.
+
+        The change is already committed, so a backend error is logged rather than raised: the request still
+        succeeds, and the stale entries are served until they expire.
+        """
+        self.invalidations += 1
+        try:
+            await self.backend.bump(self._generation_key(customer_no))
+        except Exception as e:
+            logger.warning(f"Could not invalidate the cache of customer {customer_no}: {e}")
+
+    async def stats(self):
+        """
+        Returns the cache metrics: hits, misses and hit ratio, invalidations, and the backend's evictions,
+        expirations and entry count. Hit and miss counts are per API worker.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "invalidations": self.invalidations,
+            **await self.backend.stats(),
+        }
+
+
+def create_cache():
+    """
+    Creates the customer cache on the backend selected by `settings.store_backend` ("redis" or "local").
+    """
+    if settings.store_backend == "local":
+        return CustomerCache(LocalCacheBackend(settings.cache_max_entries))
+    return CustomerCache(RedisCacheBackend(settings.redis_url))
+
+
+customers = create_cache()
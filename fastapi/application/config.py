@@ -8,6 +8,39 @@ class Settings(BaseSettings):
     secret_key : str
     algorithm : str
     access_token_expiration : int
+    accrual_batch_size : int = 1000
+    day_count_convention : str = "ACT/365"
+    scheduler_lease_ttl : int = 60
+    accrual_workers : int = 1
+    redis_url : str = "redis://localhost"
+    store_backend : str = "redis"
+    idempotency_ttl : int = 86400
+    idempotency_lock_ttl : int = 30
+    idempotency_wait : float = 10.0
+    ref_block_size : int = 1000
+    database_url : str = ""
+    async_database_url : str = ""
+    account_daily_spend_limit : float = 150000.0
+    account_monthly_spend_limit : float = 1000000.0
+    customer_daily_spend_limit : float = 300000.0
+    customer_monthly_spend_limit : float = 2000000.0
+    posting_mode : str = "direct"
+    group_commit_interval : float = 0.005
+    group_commit_size : int = 100
+    cache_ttl : int = 30
+    cache_max_entries : int = 10000
+    cache_recent_transactions : int = 50
+    hot_account_slots : int = 16
+    hot_account_fold_interval : int = 60
+    token_cache_max_entries : int = 10000
+    bcrypt_rounds : int = 12
+    password_workers : int = 2
+    password_queue_limit : int = 64
+    revocation_bloom_bits : int = 1048576
+    revocation_bloom_hashes : int = 7
+    revocation_rebuild_interval : int = 3600
+    principal_cache_ttl : int = 5
+    ownership_max_entries : int = 100000
 
     class Config:
         env_file=".env"
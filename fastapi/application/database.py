@@ -1,13 +1,15 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
 from .config import settings
 
 # Generate a random secret key for cryptographic purposes
 SECRET_KEY = os.urandom(32)
 
-# Build the database URI from the configuration settings
-SQLALCHEMY_DATABASE_URI = f'mysql://{settings.database_username}:{settings.database_password}@{settings.database_host}/{settings.database_name}'
+# Build the database URI from the configuration settings. `settings.database_url` overrides it, e.g. for a
+# scratch SQLite database used by the benchmarks.
+SQLALCHEMY_DATABASE_URI = settings.database_url or f'mysql://{settings.database_username}:{settings.database_password}@{settings.database_host}/{settings.database_name}'
 
 # Create an engine with connection pooling
 engine = create_engine(
@@ -34,3 +36,30 @@ def get_db():
     finally:
         db.close()  # Ensure the session is closed after the operation, even in case of an error
 
+
+# Build the async database URI (aiomysql driver). `settings.async_database_url` overrides it, e.g.
+# "sqlite+aiosqlite:///./test.db" for tests.
+ASYNC_SQLALCHEMY_DATABASE_URI = settings.async_database_url or f'mysql+aiomysql://{settings.database_username}:{settings.database_password}@{settings.database_host}/{settings.database_name}'
+
+# Pool settings for the async engine. SQLite (tests) uses its own pooling and rejects them.
+async_pool_options = {} if ASYNC_SQLALCHEMY_DATABASE_URI.startswith("sqlite") else dict(
+    pool_size=20,          # Number of connections to maintain in the pool
+    max_overflow=0,        # Max overflow connections beyond the pool_size
+    pool_timeout=30,       # Timeout for getting a connection from the pool
+    pool_recycle=3600,     # Time (in seconds) before a connection is recycled
+)
+
+# Create the async engine used by the request handlers
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URI, **async_pool_options)
+
+# Create an async session maker. Objects stay loaded after commit, so handlers can return them without
+# triggering implicit (and, under asyncio, illegal) lazy loads.
+async_session = async_sessionmaker(bind=async_engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """
+    Yields an `AsyncSession` for dependency injection in async FastAPI routes.
+    The session is closed after use, even if an exception occurs.
+    """
+    async with async_session() as db:
+        yield db
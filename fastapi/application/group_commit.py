@@ -0,0 +1,230 @@
+"""
+Group Commit Module.
+
+This module provides an optional posting mode in which concurrent postings share database transactions. In the
+default mode every request commits its own posting, so throughput is bounded by the latency of one durable commit
+(an fsync of the redo log) per posting. With `settings.posting_mode = "group"`, requests hand their validated
+postings to a committer task and wait for the result; the committer commits many postings at once.
+
+Key Features:
+-------------
+1. **Batching**:
+   - The committer takes the postings queued within `settings.group_commit_interval` seconds of the first one, or
+     at most `settings.group_commit_size` postings, whichever comes first.
+   - The batch is written in one transaction: a conditional balance update per posting, one flush inserting all
+     postings and their journal legs together, the spend rollup upserts, and a single commit.
+
+2. **Per-Request Results**:
+   - Each request awaits its own future. Postings rejected while staging (unknown account, insufficient funds)
+     fail individually without affecting the rest of the batch.
+   - If the batch as a whole fails (a deadlock with another worker, a database error), it is rolled back and its
+     postings are retried one by one, so one bad posting only fails its own request.
+   - A posting whose request was cancelled (e.g. the client disconnected) before its batch was staged is left out,
+     and the committer releases its spend reservation, since the cancelled request no longer can. Once staged, a
+     posting is committed with its batch and keeps its reservation.
+
+Notes:
+------
+- Batching trades a few milliseconds of latency for throughput; it pays off only under concurrent load.
+- The committer runs inside each API worker; postings from different workers are batched separately.
+- Benchmark the two modes with `python -m application.bench.group_commit`.
+"""
+
+import asyncio
+import logging
+from fastapi import HTTPException
+from .config import settings
+from .database import async_session
+from .postings import stage_posting, record_posting, with_deadlock_retry
+
+logger = logging.getLogger(__name__)
+
+
+class Posting:
+    """
+    A posting waiting in the committer's queue.
+
+    Attributes:
+        transaction (Transaction): The unsaved transaction model.
+        account_no (str): The account to debit.
+        amount (float): The amount of the posting.
+        classes (list): The product models the account may live in.
+        future (asyncio.Future): Resolved with the persisted transaction, or with the error that rejected it.
+        release (callable): Coroutine function releasing the posting's spend reservation, or `None`.
+    """
+
+    def __init__(self, transaction, account_no, amount, classes, future, release=None):
+        self.transaction = transaction
+        self.account_no = account_no
+        self.amount = amount
+        self.classes = classes
+        self.future = future
+        self.release = release
+
+    def resolve(self, result=None, error=None):
+        # The request may have been cancelled (e.g. the client disconnected) while the posting was in the batch
+        if self.future.done():
+            return
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
+
+    async def reject(self, error):
+        """
+        Fails the posting's request with `error`, or releases its spend reservation if the request was cancelled
+        and can no longer release it itself.
+        """
+        if self.future.cancelled():
+            if self.release is not None:
+                await self.release()
+            return
+        self.resolve(error=error)
+
+
+class GroupCommitter:
+    """
+    Collects postings from concurrent requests and commits them in batches.
+
+    Attributes:
+        session_factory (callable): Creates the `AsyncSession` each batch is written with.
+        interval (float): Seconds to wait for more postings after the first one of a batch.
+        max_batch (int): Most postings committed in one transaction.
+        queue (asyncio.Queue): Postings waiting to be committed.
+        task (asyncio.Task): The running committer task, or `None` before `start`.
+    """
+
+    def __init__(self, session_factory=async_session, interval=None, max_batch=None):
+        self.session_factory = session_factory
+        self.interval = interval if interval is not None else settings.group_commit_interval
+        self.max_batch = max_batch or settings.group_commit_size
+        self.queue = None
+        self.task = None
+
+    def start(self):
+        """
+        Starts the committer task on the running event loop.
+        """
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue()
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Commits the postings still queued, then stops the committer task.
+        """
+        if self.task is None:
+            return
+        await self.queue.join()
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def submit(self, transaction, account_no, amount, classes, release=None):
+        """
+        Queues a posting and waits until its batch is committed.
+
+        If the caller is cancelled before the posting is staged, the posting is dropped and `release` is awaited
+        by the committer. Other failures are raised to the caller, which releases the reservation itself.
+
+        Args:
+            transaction (Transaction): The unsaved transaction model.
+            account_no (str): The account to debit.
+            amount (float): The amount of the posting.
+            classes (list): The product models the account may live in.
+            release (callable): Coroutine function releasing the posting's spend reservation (see `limits`).
+
+        Returns:
+            Transaction: The persisted transaction.
+
+        Raises:
+            HTTPException: If the posting was rejected (see `stage_posting`).
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(Posting(transaction, account_no, amount, classes, future, release))
+        return await future
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.interval
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._commit(batch)
+            except Exception as e:
+                # Only reached if even the one-by-one fallback could not run; fail whatever is still waiting
+                logger.exception("Group commit failed.")
+                for posting in batch:
+                    await posting.reject(e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _commit(self, batch):
+        """
+        Commits a batch in one transaction, falling back to one transaction per posting if the batch fails.
+        """
+        try:
+            committed, rejected, skipped = await self._commit_together(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                await batch[0].reject(e)
+                return
+            logger.warning(f"Group commit of {len(batch)} postings failed, posting them one by one: {e}")
+            for posting in batch:
+                await self._commit([posting])
+            return
+        for posting in committed:
+            posting.resolve(result=posting.transaction)
+        for posting, error in rejected:
+            await posting.reject(error)
+        for posting in skipped:
+            await posting.reject(None)
+
+    async def _commit_together(self, batch):
+        async with self.session_factory() as db:
+            async def work():
+                # Results are only handed out once the commit succeeds; a deadlock retry re-stages everything
+                staged, rejected, skipped = [], [], []
+                for posting in batch:
+                    if posting.future.done():
+                        # The request was cancelled while the posting was queued; nothing is written for it
+                        skipped.append(posting)
+                        continue
+                    try:
+                        await stage_posting(db, posting.transaction, posting.account_no, posting.amount,
+                                            posting.classes)
+                    except HTTPException as e:
+                        # Rejected before anything was written for this posting
+                        rejected.append((posting, e))
+                    else:
+                        staged.append(posting)
+                await db.flush()  # Inserts the postings and applies the defaults the journal legs copy
+                for posting in staged:
+                    await record_posting(db, posting.transaction)
+                await db.commit()
+                return staged, rejected, skipped
+
+            return await with_deadlock_retry(db, work)
+
+
+committer = GroupCommitter()
@@ -0,0 +1,188 @@
+"""
+Hot Accounts Module.
+
+This module implements hot-account mode for busy merchant tills and billers. Buy-goods and paybill traffic
+concentrates on a handful of beneficiaries; crediting each of them on a single balance row would make every
+concurrent posting wait for the row lock held by the one before it. A flagged account's balance is instead
+spread over `slots` rows (see `models.hot_accounts`).
+
+Key Features:
+-------------
+1. **Slot Credits**:
+   - `credit_hot_account` credits one slot, chosen round-robin, with a single `UPDATE`. The slot number is taken
+     modulo the account's slot count in the same statement, so no lookup precedes it; for an account that is
+     not flagged the statement matches no row and does nothing.
+
+2. **Folding**:
+   - `fold_hot_accounts` (run by the scheduler worker every `settings.hot_account_fold_interval` seconds) moves
+     slot balances into the account's `folded_balance`. Each slot is decreased by exactly the amount read from
+     it, so credits that land while the fold runs are kept for the next fold.
+
+3. **Reads**:
+   - `balance_query` returns `folded_balance` plus the sum of the slots in one statement, which is the account's
+     true balance whether or not it was folded recently.
+
+Usage:
+------
+    python -m application.hot_accounts flag 522533 --slots 32
+    python -m application.hot_accounts fold
+"""
+
+import argparse
+import itertools
+import logging
+import random
+from datetime import datetime
+from sqlalchemy import select, update, func, literal
+from .config import settings
+from .models.hot_accounts import HotAccount, BalanceSlot
+
+logger = logging.getLogger(__name__)
+
+# Round-robin slot counter; each worker starts at a random offset so workers do not hit the same slots in step
+_next_slot = itertools.count(random.randrange(1 << 16))
+
+
+async def credit_hot_account(db, account_no, amount):
+    """
+    Credits `amount` to one slot of a hot account.
+
+    Args:
+        db (AsyncSession): The database session; the credit joins its current transaction.
+        account_no (str): The beneficiary account.
+        amount (float): The amount to credit.
+
+    Returns:
+        bool: `True` if the account is a hot account and was credited, `False` otherwise.
+    """
+    slot_count = select(HotAccount.slots).where(HotAccount.account_no == account_no).scalar_subquery()
+    result = await db.execute(
+        update(BalanceSlot)
+        .where(BalanceSlot.account_no == account_no, BalanceSlot.slot == literal(next(_next_slot)) % slot_count)
+        .values(balance=BalanceSlot.balance + amount)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def balance_query(account_no):
+    """
+    Builds the query for a hot account's true balance, its slot count and the time of its last fold.
+    """
+    slots_total = (
+        select(func.coalesce(func.sum(BalanceSlot.balance), 0.0))
+        .where(BalanceSlot.account_no == account_no)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            (HotAccount.folded_balance + slots_total).label("balance"),
+            HotAccount.slots,
+            HotAccount.folded_at,
+        )
+        .where(HotAccount.account_no == account_no)
+    )
+
+
+def flag_hot_account(db, account_no, slots=None):
+    """
+    Puts an account in hot-account mode, or raises its number of slots.
+
+    Args:
+        db (Session): The database session; the caller commits.
+        account_no (str): The till, paybill or account number to flag.
+        slots (int): Number of slots; defaults to `settings.hot_account_slots`.
+
+    Returns:
+        HotAccount: The flagged account.
+
+    Raises:
+        ValueError: If `slots` is lower than the account's current number of slots (the balances of the removed
+                    slots would no longer be reachable).
+    """
+    slots = slots or settings.hot_account_slots
+    account = db.get(HotAccount, account_no)
+    if account is None:
+        account = HotAccount(account_no=account_no, slots=0, folded_balance=0.0)
+        db.add(account)
+    elif slots < account.slots:
+        raise ValueError(f"{account_no} already has {account.slots} slots; slots can only be added.")
+    db.add_all(BalanceSlot(account_no=account_no, slot=slot, balance=0.0) for slot in range(account.slots, slots))
+    account.slots = slots
+    return account
+
+
+def fold_account(db, account_no):
+    """
+    Folds the slot balances of one hot account into its `folded_balance`.
+
+    Args:
+        db (Session): The database session; the caller commits.
+        account_no (str): The hot account.
+
+    Returns:
+        float: The amount folded.
+    """
+    slots = db.execute(
+        select(BalanceSlot.slot, BalanceSlot.balance)
+        .where(BalanceSlot.account_no == account_no, BalanceSlot.balance != 0)
+    ).all()
+    folded = 0.0
+    for slot, balance in slots:
+        # Subtract what was read rather than zeroing, so a concurrent credit to the slot is not lost
+        db.execute(
+            update(BalanceSlot)
+            .where(BalanceSlot.account_no == account_no, BalanceSlot.slot == slot)
+            .values(balance=BalanceSlot.balance - balance)
+        )
+        folded += balance
+    db.execute(
+        update(HotAccount)
+        .where(HotAccount.account_no == account_no)
+        .values(folded_balance=HotAccount.folded_balance + folded, folded_at=datetime.utcnow())
+    )
+    return folded
+
+
+def fold_hot_accounts():
+    """
+    Folds the slots of every hot account, committing each account separately.
+
+    Returns:
+        int: Number of accounts folded.
+    """
+    from .database import session  # Imported here so the credit path does not depend on the sync engine
+
+    with session() as db:
+        account_nos = db.scalars(select(HotAccount.account_no)).all()
+        for account_no in account_nos:
+            folded = fold_account(db, account_no)
+            db.commit()
+            logger.debug(f"Folded {folded} into hot account {account_no}.")
+    return len(account_nos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage hot (sharded-balance) accounts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    flag = commands.add_parser("flag", help="Put an account in hot-account mode or add slots to it.")
+    flag.add_argument("account_no")
+    flag.add_argument("--slots", type=int, default=None)
+    commands.add_parser("fold", help="Fold the slot balances of every hot account.")
+    args = parser.parse_args()
+
+    from .database import engine, session
+
+    for table in (HotAccount.__table__, BalanceSlot.__table__):
+        table.create(bind=engine, checkfirst=True)
+    if args.command == "flag":
+        with session() as db:
+            account = flag_hot_account(db, args.account_no, args.slots)
+            db.commit()
+            print(f"{account.account_no} is a hot account with {account.slots} slots.")
+    else:
+        print(f"Folded {fold_hot_accounts()} hot accounts.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Idempotency Module.
+
+This module lets money-moving routes honour an `Idempotency-Key` request header, so a client that retries a
+request after a timeout gets the original result back instead of posting the transaction twice.
+
+Key Features:
+-------------
+1. **Claim, Then Post**:
+   - The first request with a given key claims it in the store (an atomic set-if-absent) and marks it
+     "in-flight" before doing any database work.
+   - When the posting commits, the response is stored under the key as "completed" for
+     `settings.idempotency_ttl` seconds. If the posting fails, the claim is released so the client may retry.
+   - The posting has committed by the time its response is stored, so a store error at that point is logged and
+     the response is still returned.
+
+2. **Replays Without Database Work**:
+   - A retry with a completed key gets the stored response straight from the store.
+   - A concurrent duplicate waits for the in-flight request to finish (up to `settings.idempotency_wait`
+     seconds) and then returns its response, instead of racing it.
+
+3. **Request Fingerprints**:
+   - Each key remembers a hash of the request payload; reusing a key for a different payload is rejected.
+
+Stores:
+-------
+- `RedisIdempotencyStore`: Shared by every API worker and node (async Redis client). Waiters poll the key.
+- `LocalIdempotencyStore`: An in-process stand-in for development and tests (`settings.store_backend = "local"`).
+  Waiters wait on an asyncio condition.
+
+Notes:
+------
+- Keys are scoped by the caller (customer number and transaction type), so two customers can never see each
+  other's responses.
+- In-flight claims expire after `settings.idempotency_lock_ttl` seconds, so a worker that dies mid-request does
+  not block the key forever. While the request is running, its claim is refreshed every third of that time, so a
+  posting slowed by deadlock retries or a group commit keeps its key however long it takes.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from fastapi import HTTPException, status
+import redis.asyncio as aioredis
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT = "in-flight"
+COMPLETED = "completed"
+POLL_INTERVAL = 0.05  # Seconds between checks while waiting on a Redis key
+
+
+class RedisIdempotencyStore:
+    """
+    Idempotency records kept in Redis, shared by every API worker.
+
+    Attributes:
+        redis (redis.asyncio.Redis): The Redis client.
+        prefix (str): Prefix for every key written by the store.
+    """
+
+    def __init__(self, url, prefix="idempotency"):
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f"{self.prefix}:{key}"
+
+    async def claim(self, key, record, ttl):
+        """
+        Stores `record` under `key` only if the key is free.
+
+        Returns:
+            bool: `True` if the key was claimed.
+        """
+        return bool(await self.redis.set(self._key(key), json.dumps(record), nx=True, ex=ttl))
+
+    async def get(self, key):
+        """
+        Returns the record stored under `key`, or `None`.
+        """
+        raw = await self.redis.get(self._key(key))
+        return json.loads(raw) if raw else None
+
+    async def complete(self, key, record, ttl):
+        """
+        Replaces the in-flight claim on `key` with the completed record.
+        """
+        await self.redis.set(self._key(key), json.dumps(record), ex=ttl)
+
+    async def refresh(self, key, ttl):
+        """
+        Extends the claim on `key` by another `ttl` seconds.
+        """
+        await self.redis.expire(self._key(key), ttl)
+
+    async def release(self, key):
+        """
+        Drops the claim on `key` so the request can be retried.
+        """
+        await self.redis.delete(self._key(key))
+
+    async def wait(self, key, timeout):
+        """
+        Waits until the record under `key` is no longer in flight.
+
+        Returns:
+            dict: The record, or `None` if the key was released or expired. If the timeout passes first, the
+            in-flight record is returned.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            record = await self.get(key)
+            if record is None or record["state"] != IN_FLIGHT or time.monotonic() >= deadline:
+                return record
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+class LocalIdempotencyStore:
+    """
+    Idempotency records kept in process memory. Only deduplicates requests served by the same worker.
+    """
+
+    def __init__(self):
+        self.records = {}  # key -> (record, expires_at)
+        self.changed = asyncio.Condition()
+
+    def _get(self, key):
+        entry = self.records.get(key)
+        if entry is None:
+            return None
+        record, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self.records[key]
+            return None
+        return record
+
+    async def claim(self, key, record, ttl):
+        async with self.changed:
+            if self._get(key) is not None:
+                return False
+            self.records[key] = (record, time.monotonic() + ttl)
+            return True
+
+    async def get(self, key):
+        async with self.changed:
+            return self._get(key)
+
+    async def complete(self, key, record, ttl):
+        async with self.changed:
+            self.records[key] = (record, time.monotonic() + ttl)
+            self.changed.notify_all()
+
+    async def refresh(self, key, ttl):
+        async with self.changed:
+            record = self._get(key)
+            if record is not None:
+                self.records[key] = (record, time.monotonic() + ttl)
+
+    async def release(self, key):
+        async with self.changed:
+            self.records.pop(key, None)
+            self.changed.notify_all()
+
+    async def wait(self, key, timeout):
+        deadline = time.monotonic() + timeout
+        async with self.changed:
+            while True:
+                record = self._get(key)
+                remaining = deadline - time.monotonic()
+                if record is None or record["state"] != IN_FLIGHT or remaining <= 0:
+                    return record
+                try:
+                    await asyncio.wait_for(self.changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+
+def create_store():
+    """
+    Creates the idempotency store selected by `settings.store_backend` ("redis" or "local").
+    """
+    if settings.store_backend == "local":
+        return LocalIdempotencyStore()
+    return RedisIdempotencyStore(settings.redis_url)
+
+
+store = create_store()
+
+
+def fingerprint(payload):
+    """
+    Hashes a request payload so a reused key can be matched against the request it was first used for.
+    """
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def keep_claimed(store, key, ttl):
+    """
+    Refreshes an in-flight claim every third of its TTL until cancelled.
+    """
+    while True:
+        await asyncio.sleep(ttl / 3)
+        try:
+            await store.refresh(key, ttl)
+        except Exception as e:
+            logger.warning(f"Could not refresh the idempotency claim on {key}: {e}")
+
+
+async def run_once(key, payload, work, store=store):
+    """
+    Awaits `work` at most once per idempotency key and returns its (stored) response.
+
+    Args:
+        key (str): The scoped idempotency key.
+        payload (dict): The request payload, used to detect a key reused for a different request.
+        work (callable): Coroutine function performing the request and returning a JSON-serialisable response.
+        store: The idempotency store.
+
+    Returns:
+        The response of the first request made with `key`.
+
+    Raises:
+        HTTPException:
+            - 409: If a request with the same key is still in flight after `settings.idempotency_wait` seconds.
+            - 422: If the key was already used with a different payload.
+    """
+    request_hash = fingerprint(payload)
+    deadline = time.monotonic() + settings.idempotency_wait
+
+    while True:
+        if await store.claim(key, {"state": IN_FLIGHT, "fingerprint": request_hash}, settings.idempotency_lock_ttl):
+            heartbeat = asyncio.create_task(keep_claimed(store, key, settings.idempotency_lock_ttl))
+            try:
+                response = await work()
+            except Exception:
+                # Nothing was posted; let the client retry with the same key
+                await store.release(key)
+                raise
+            finally:
+                heartbeat.cancel()
+            try:
+                await store.complete(
+                    key,
+                    {"state": COMPLETED, "fingerprint": request_hash, "response": response},
+                    settings.idempotency_ttl,
+                )
+            except Exception as e:
+                # The posting is committed: return its response rather than an error the client would retry
+                logger.error(f"Could not store the response for idempotency key {key}: {e}")
+            return response
+
+        record = await store.wait(key, max(deadline - time.monotonic(), 0))
+        if record is None:
+            # The first request failed or its claim expired; try to claim the key ourselves
+            if time.monotonic() < deadline:
+                continue
+            record = {"state": IN_FLIGHT, "fingerprint": request_hash}
+
+        if record["fingerprint"] != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key has already been used with a different request."
+            )
+        if record["state"] == COMPLETED:
+            return record["response"]
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed."
+        )
@@ -0,0 +1,234 @@
+"""
+Spend Limits Module.
+
+This module enforces daily and monthly spend limits on money-moving routes without touching the database. Instead of
+summing the transaction tables on every posting, running totals are kept in counters that are checked and
+incremented in a single atomic step before any database work.
+
+Key Features:
+-------------
+1. **Counters per Account and per Customer**:
+   - Every posting counts against four windows: the account's day and month, and the customer's day and month.
+   - Each counter holds the amount spent (in cents, so totals never drift) and the number of postings.
+   - Windows are calendar periods in UTC, not rolling ones: the daily limits reset at midnight UTC and the monthly
+     limits on the first of the month, like the limits printed on a customer's tariff. A counter expires on its
+     own shortly after its window closes.
+
+2. **Check and Reserve in One Round Trip**:
+   - A Lua script checks all four counters and increments them only if none would exceed its limit, so two
+     concurrent postings can never both slip under a limit.
+   - If the posting then fails, the reservation is released so the amount does not count against the customer. A
+     failed release is logged rather than raised, so it never hides the error that failed the posting.
+
+3. **Limits**:
+   - Amount limits are configured with `settings.account_daily_spend_limit`, `settings.account_monthly_spend_limit`,
+     `settings.customer_daily_spend_limit` and `settings.customer_monthly_spend_limit`.
+   - The number of postings per account per day is capped by the caller (`DAILY_LIMIT` for transactions).
+
+Limiters:
+---------
+- `RedisSpendLimiter`: Shared by every API worker and node (async Redis client).
+- `LocalSpendLimiter`: An in-process stand-in for development and tests (`settings.store_backend = "local"`).
+"""
+
+import logging
+from datetime import datetime
+from fastapi import HTTPException, status
+import redis.asyncio as aioredis
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+DAY_TTL = 2 * 86400  # Seconds a daily counter outlives the start of its day
+MONTH_TTL = 32 * 86400  # Seconds a monthly counter outlives the start of its month
+
+# KEYS: the counters. ARGV: the amount in cents, then (max cents, max count, ttl) per counter; a max count of 0 means
+# no count limit. Returns 0 when the spend was reserved, or the 1-based index of the first counter that would overflow.
+RESERVE_SCRIPT = """
+local cents = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    local base = 2 + (i - 1) * 3
+    local current = redis.call('HMGET', key, 'cents', 'count')
+    local spent = tonumber(current[1] or '0')
+    local count = tonumber(current[2] or '0')
+    local max_count = tonumber(ARGV[base + 1])
+    if spent + cents > tonumber(ARGV[base]) or (max_count > 0 and count + 1 > max_count) then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('HINCRBY', key, 'cents', cents)
+    redis.call('HINCRBY', key, 'count', 1)
+    redis.call('EXPIRE', key, ARGV[2 + (i - 1) * 3 + 2])
+end
+return 0
+"""
+
+
+class Counter:
+    """
+    One calendar spend window (a UTC day or month) of an account or a customer.
+
+    Attributes:
+        key (str): The counter's key, e.g. "spend:account:<account_no>:day:20240131".
+        description (str): Human-readable name of the limit, used in error messages.
+        max_cents (int): Most that may be spent in the window, in cents.
+        max_count (int): Most postings allowed in the window, or 0 for no count limit.
+        ttl (int): Seconds the counter is kept after it is created.
+    """
+
+    def __init__(self, key, description, max_amount, max_count, ttl):
+        self.key = key
+        self.description = description
+        self.max_cents = to_cents(max_amount)
+        self.max_count = max_count
+        self.ttl = ttl
+
+
+def to_cents(amount):
+    """
+    Converts an amount to whole cents.
+    """
+    return int(round(amount * 100))
+
+
+def counters(account, customer_no, daily_count=0, now=None):
+    """
+    Builds the four counters a posting from `account` by `customer_no` counts against.
+
+    The counters are keyed by the UTC calendar day and month of `now`, so every posting in the same day or month
+    shares a counter; a posting at 23:59 and one at 00:01 fall in different daily windows.
+
+    Args:
+        account (str): The account being debited.
+        customer_no (int): The customer making the posting.
+        daily_count (int): Most postings allowed per account per day, or 0 for no count limit.
+        now (datetime): The time of the posting (UTC); defaults to now.
+
+    Returns:
+        list[Counter]: The account's daily and monthly counters, then the customer's.
+    """
+    now = now or datetime.utcnow()
+    day, month = f"day:{now:%Y%m%d}", f"month:{now:%Y%m}"
+    return [
+        Counter(f"spend:account:{account}:{day}", "Daily account limit",
+                settings.account_daily_spend_limit, daily_count, DAY_TTL),
+        Counter(f"spend:account:{account}:{month}", "Monthly account limit",
+                settings.account_monthly_spend_limit, 0, MONTH_TTL),
+        Counter(f"spend:customer:{customer_no}:{day}", "Daily customer limit",
+                settings.customer_daily_spend_limit, 0, DAY_TTL),
+        Counter(f"spend:customer:{customer_no}:{month}", "Monthly customer limit",
+                settings.customer_monthly_spend_limit, 0, MONTH_TTL),
+    ]
+
+
+class RedisSpendLimiter:
+    """
+    Spend counters kept in Redis, shared by every API worker.
+
+    Attributes:
+        redis (redis.asyncio.Redis): The Redis client.
+        script: The registered reserve script (loaded once, then run by its SHA).
+    """
+
+    def __init__(self, url):
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.script = self.redis.register_script(RESERVE_SCRIPT)
+
+    async def reserve(self, counters, cents):
+        """
+        Adds `cents` and one posting to every counter, unless that would overflow any of them.
+
+        Returns:
+            Counter: The first counter that would overflow, or `None` if the spend was reserved.
+        """
+        args = [cents]
+        for counter in counters:
+            args += [counter.max_cents, counter.max_count, counter.ttl]
+        overflow = await self.script(keys=[counter.key for counter in counters], args=args)
+        return counters[overflow - 1] if overflow else None
+
+    async def release(self, counters, cents):
+        """
+        Takes a reserved spend back off every counter.
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for counter in counters:
+                pipe.hincrby(counter.key, "cents", -cents)
+                pipe.hincrby(counter.key, "count", -1)
+            await pipe.execute()
+
+
+class LocalSpendLimiter:
+    """
+    Spend counters kept in process memory. Only sees postings served by the same worker.
+    """
+
+    def __init__(self):
+        self.totals = {}  # key -> [cents, count]
+
+    async def reserve(self, counters, cents):
+        # No awaits between the check and the increment, so this is atomic within the event loop
+        for counter in counters:
+            spent, count = self.totals.get(counter.key, (0, 0))
+            if spent + cents > counter.max_cents or (counter.max_count and count + 1 > counter.max_count):
+                return counter
+        for counter in counters:
+            total = self.totals.setdefault(counter.key, [0, 0])
+            total[0] += cents
+            total[1] += 1
+        return None
+
+    async def release(self, counters, cents):
+        for counter in counters:
+            total = self.totals.get(counter.key)
+            if total is not None:
+                total[0] -= cents
+                total[1] -= 1
+
+
+def create_limiter():
+    """
+    Creates the spend limiter selected by `settings.store_backend` ("redis" or "local").
+    """
+    if settings.store_backend == "local":
+        return LocalSpendLimiter()
+    return RedisSpendLimiter(settings.redis_url)
+
+
+limiter = create_limiter()
+
+
+async def reserve(account, customer_no, amount, daily_count=0, limiter=limiter):
+    """
+    Checks a posting against the spend limits and reserves it on the counters.
+
+    Args:
+        account (str): The account being debited.
+        customer_no (int): The customer making the posting.
+        amount (float): The amount of the posting.
+        daily_count (int): Most postings allowed per account per day, or 0 for no count limit.
+        limiter: The spend limiter.
+
+    Returns:
+        callable: A coroutine function that releases the reservation; await it if the posting fails. It logs
+                  limiter errors instead of raising them, so it is safe to call while handling another error.
+
+    Raises:
+        HTTPException: 400 if the posting would exceed a limit.
+    """
+    spend_counters = counters(str(account), customer_no, daily_count)
+    cents = to_cents(amount)
+    overflow = await limiter.reserve(spend_counters, cents)
+    if overflow is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{overflow.description} exceeded for this transaction."
+        )
+
+    async def release():
+        try:
+            await limiter.release(spend_counters, cents)
+        except Exception as e:
+            logger.error(f"Could not release the spend reserved on account {account}: {e}")
+    return release
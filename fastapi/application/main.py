@@ -2,8 +2,8 @@
 Main Module for the FastAPI Application.
 
 This module serves as the entry point for the application. It initializes the FastAPI app, 
-configures middleware, includes routers for various functionalities, and sets up periodic 
-tasks using a background scheduler.
+configures middleware and includes routers for various functionalities. Periodic tasks run in
+a separate scheduler worker (see `application.worker`), never inside the API workers.
 
 Key Responsibilities:
 ----------------------
@@ -13,18 +13,16 @@ Key Responsibilities:
 
 2. **Database Setup**:
    - Initializes database models by creating tables based on ORM definitions.
+   - Rows written before the account directory, journal and spend rollups existed are backfilled once per
+     deploy with `python -m application.backfill`, not on every API worker boot.
 
 3. **Route Inclusion**:
    - Includes routers for user management, transactions, loans, term deposits, cards, 
      help desk, and new account operations.
 
-4. **Scheduled Tasks**:
-   - Sets up and manages a background scheduler to run periodic tasks, such as calculating 
-     interest for loans and term deposits.
-
-5. **Startup and Shutdown Events**:
-   - Handles resource initialization (e.g., Redis connection) on startup.
-   - Cleans up resources (e.g., shutting down the scheduler) on shutdown.
+4. **Startup Events**:
+   - Handles resource initialization (e.g., Redis connection, the group committer, the revoked-token
+     listener) on startup, and drains the group committer and database pool on shutdown.
 
 Application Middleware:
 -----------------------
@@ -44,17 +42,22 @@ Routers Included:
 - **cards.router**: Manages credit and debit card functionality.
 - **help_desk.router**: Routes for customer support/help desk interactions.
 - **new_account.router**: Facilitates the creation of new accounts.
+- **metrics.router**: Operational metrics (customer and verified-token cache, and ownership index, hits and misses).
+- **merchants.router**: Balances of hot (sharded-balance) merchant and biller accounts.
+- **analytics.router**: Spend analytics over arbitrary date ranges, served from daily rollups.
 
-Background Scheduler:
-----------------------
-Uses APScheduler to manage periodic tasks:
-- **Loan Interest Calculation**: Calculates interest on active loans daily.
-- **Term Deposit Interest Calculation**: Calculates interest on term deposits daily.
+Scheduled Tasks:
+----------------
+Interest accrual for loans and term deposits, and folding hot account balance slots, run in a
+dedicated process started with `python -m application.worker`. Scheduler workers elect a single
+leader through a database lease, so the jobs run exactly once however many API workers or
+scheduler nodes are running.
 
 Redis Integration:
 ------------------
-- Redis is used for rate limiting with the FastAPI-Limiter library. Ensure Redis is running 
-  and accessible at the configured `redis://localhost` endpoint.
+- Redis is used for rate limiting with the FastAPI-Limiter library, and for idempotency keys, spend limit
+  counters, the customer cache, revoked tokens and the account ownership index. Ensure Redis is running and accessible at the configured
+  `settings.redis_url` endpoint (`redis://localhost` by default).
 
 Notes:
 ------
@@ -66,14 +69,18 @@ Notes:
 
 
 from fastapi import FastAPI
-from .routes import users, transactions, new_account, help_desk, cards, termdeposits, loans
+from .routes import (
+    users, transactions, new_account, help_desk, cards, termdeposits, loans, metrics, merchants, analytics
+)
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine
+from .database import engine, async_engine
+from .config import settings
+from .group_commit import committer
+from .passwords import hasher
+from .revocation import revoked
 from fastapi_limiter import FastAPILimiter
 import redis.asyncio as aioredis
-from apscheduler.schedulers.background import BackgroundScheduler
-from .schedules import calculate_interest_for_loans, calculate_interest_for_tds
-from .models import Base
+from .models import Base, scheduling, hot_accounts  # Register the scheduler worker's and hot account tables
 
 # Create all database tables defined in the models
 Base.metadata.create_all(bind=engine)
@@ -81,9 +88,6 @@ Base.metadata.create_all(bind=engine)
 # Initialize the FastAPI application
 app = FastAPI()
 
-# Initialize the background scheduler for periodic tasks
-scheduler = BackgroundScheduler()
-
 
 @app.on_event("startup")
 async def startup():
@@ -92,43 +96,30 @@ async def startup():
 
     This function performs the following:
     - Initializes the Redis client for use with the FastAPI Limiter middleware for rate limiting.
-    - Starts the background scheduler and adds periodic tasks to calculate interest for loans
-      and term deposits.
+    - Starts the group committer when postings are batched (`settings.posting_mode = "group"`).
+    - Starts following revoked tokens (loads them into the local Bloom filter and subscribes to new ones).
     """
     # Initialize Redis connection for rate limiting
-    redis = await aioredis.from_url("redis://localhost", encoding="utf-8", decode_responses=True)
+    redis = await aioredis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
     await FastAPILimiter.init(redis)
-
-    # Add periodic tasks to the scheduler
-    scheduler.add_job(
-        calculate_interest_for_loans,
-        "interval",
-        days=1,
-        id="loan_interest_job",
-        replace_existing=True,  # Avoid duplicate jobs
-    )
-    scheduler.add_job(
-        calculate_interest_for_tds,
-        "interval",
-        days=1,
-        id="td_interest_job",
-        replace_existing=True,  # Avoid duplicate jobs
-    )
-
-    # Start the scheduler
-    scheduler.start()
+    if settings.posting_mode == "group":
+        committer.start()
+    revoked.start()
 
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown():
     """
-    Event handler triggered when the FastAPI application shuts down.
+    Event handler triggered when the FastAPI application stops.
 
-    This function performs the following:
-    - Gracefully shuts down the background scheduler to ensure all scheduled jobs
-      are properly terminated.
+    Commits the postings still queued for the group committer, stops following revoked tokens, closes the pooled
+    connections of the async database engine used by the request handlers and stops the password hashing
+    processes.
     """
-    scheduler.shutdown()
+    await committer.stop()
+    await revoked.stop()
+    await async_engine.dispose()
+    hasher.shutdown()
 
 
 # Include application routers for various functionalities
@@ -139,6 +130,9 @@ app.include_router(cards.router)
 app.include_router(help_desk.router)
 app.include_router(users.router)
 app.include_router(new_account.router)
+app.include_router(metrics.router)
+app.include_router(merchants.router)
+app.include_router(analytics.router)
 
 # Configure CORS middleware
 origins = ["*"]
@@ -148,6 +142,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_headers=["*"],
     allow_methods=["*"],
+    expose_headers=[transactions.NEXT_CURSOR_HEADER],  # Let browsers read the history pagination cursor
 )
 
 """
@@ -159,4 +154,8 @@ Routers Included:
 - help_desk.router: Provides routes for customer support or help desk operations.
 - users.router: Handles user management such as authentication and profile updates.
 - new_account.router: Facilitates the creation of new accounts.
+- metrics.router: Exposes operational metrics such as the customer cache, verified-token cache and ownership
+  index statistics.
+- merchants.router: Reads the balances of hot merchant and biller accounts.
+- analytics.router: Serves spend analytics from the daily spend rollups.
 """
@@ -0,0 +1,46 @@
+"""
+Analytics Models Module.
+
+This module defines the rollup table behind the spend analytics endpoints.
+
+Models:
+    - SpendRollup: The number and total amount of a customer's postings per account, transaction type and day.
+      It is maintained in the same database transaction as every posting and can be rebuilt from the journal,
+      so analytics over any date range read at most one row per account, type and day instead of scanning the
+      raw transactions.
+
+Table Names:
+    - spend_rollups: Stores the daily rollups.
+"""
+
+from sqlalchemy import Column, String, Integer, Float, Date, ForeignKey, Index
+from . import Base
+
+
+class SpendRollup(Base):
+    """
+    A customer's postings on one account, of one transaction type, on one day.
+
+    Attributes:
+        customer_no (int): The customer who made the postings.
+        account (str): The debited account.
+        transaction_type (str): The transaction type (e.g. "paybill").
+        day (date): The day the postings were made.
+        transaction_count (int): Number of postings.
+        total_amount (float): Sum of the posted amounts.
+    """
+    __tablename__ = "spend_rollups"
+    __table_args__ = (
+        # Range scans over a customer's days, whatever the account and type
+        Index("ix_spend_rollups_customer_day", "customer_no", "day"),
+    )
+
+    customer_no = Column(Integer, ForeignKey('customers.customer_no'), primary_key=True, autoincrement=False)
+    account = Column(String(100), primary_key=True)
+    transaction_type = Column(String(23), primary_key=True)
+    day = Column(Date, primary_key=True)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"{self.customer_no} {self.account} {self.transaction_type} {self.day}: {self.transaction_count}"
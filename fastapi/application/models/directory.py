@@ -0,0 +1,101 @@
+"""
+Account Directory Module.
+
+This module defines the `AccountDirectory` model, a narrow lookup table that maps every account number in the
+system to the product table that holds it. Account numbers are spread across personal, corporate, foreign
+currency, loan and term deposit tables; the directory lets callers find the owning table with a single indexed
+lookup instead of probing each product table in turn.
+
+Models:
+    - AccountDirectory: One row per account number, recording the product table and the owning customer.
+
+Synchronisation:
+    - An `after_insert` mapper event is registered on every product model, so the directory row is written in the
+      same transaction that creates the account, loan or term deposit.
+    - `sync_account_directory(db)` backfills directory rows for accounts created before the directory existed. It runs
+      once per deploy from `python -m application.backfill`.
+
+Table Names:
+    - account_directory: Stores the account number to product table mapping.
+"""
+
+from sqlalchemy import Column, String, Integer, ForeignKey, event, select, exists, literal
+from . import Base
+from .accounts import PersonalAccounts, CorporateAccounts, ForeignCurrency
+from .loans import PersonalLoans, BusinessLoans, Mortgages
+from .term_deposits import TermDeposit
+
+# Every model whose rows carry a customer facing account number
+PRODUCT_CLASSES = [
+    PersonalAccounts,
+    CorporateAccounts,
+    ForeignCurrency,
+    PersonalLoans,
+    BusinessLoans,
+    Mortgages,
+    TermDeposit,
+]
+
+
+class AccountDirectory(Base):
+    """
+    Maps an account number to the product table that stores it.
+
+    Attributes:
+        account_no (str): The account number (primary key).
+        product (str): Name of the product table holding the account (e.g. "personal_accounts").
+        owner_customer_no (int): Customer number of the account owner.
+    """
+    __tablename__ = "account_directory"
+
+    account_no = Column(String(100), primary_key=True)
+    product = Column(String(30), nullable=False)
+    owner_customer_no = Column(Integer, ForeignKey('customers.customer_no'), index=True)
+
+    def __repr__(self):
+        return f"{self.account_no} -> {self.product}"
+
+
+def _register_account(mapper, connection, target):
+    """
+    Writes the directory row for a newly inserted account, loan or term deposit.
+
+    Runs inside the flush that inserts the product row, so both rows commit or roll back together.
+    """
+    connection.execute(
+        AccountDirectory.__table__.insert().values(
+            account_no=str(target.account_no),
+            product=target.__tablename__,
+            owner_customer_no=target.owner_customer_no,
+        )
+    )
+
+
+for product_class in PRODUCT_CLASSES:
+    event.listen(product_class, "after_insert", _register_account)
+
+
+def sync_account_directory(db):
+    """
+    Backfills directory rows for product rows that do not have one yet.
+
+    Issues one `INSERT ... SELECT` per product table, skipping account numbers already in the directory,
+    so it is safe to run repeatedly.
+
+    Args:
+        db (Session): The database session used to run the backfill.
+    """
+    for product_class in PRODUCT_CLASSES:
+        missing = select(
+            product_class.account_no,
+            literal(product_class.__tablename__),
+            product_class.owner_customer_no,
+        ).where(
+            ~exists().where(AccountDirectory.account_no == product_class.account_no)
+        )
+        db.execute(
+            AccountDirectory.__table__.insert().from_select(
+                ["account_no", "product", "owner_customer_no"], missing
+            )
+        )
+    db.commit()
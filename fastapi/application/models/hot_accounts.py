@@ -0,0 +1,58 @@
+"""
+Hot Account Models Module.
+
+This module defines the tables behind hot-account mode, in which the balance of a busy merchant till or biller
+account is spread over several slot rows so concurrent postings update different rows instead of queueing on one.
+
+Models:
+    - HotAccount: One row per flagged account, recording its number of slots and the balance folded out of them.
+    - BalanceSlot: One row per slot of a hot account. Postings credit a single slot; the fold job periodically
+      moves slot balances into `HotAccount.folded_balance`.
+
+The true balance of a hot account is `folded_balance` plus the sum of its slots.
+
+Table Names:
+    - hot_accounts: Stores the flagged accounts and their folded balances.
+    - balance_slots: Stores the per-slot balances.
+"""
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey
+from . import Base
+
+
+class HotAccount(Base):
+    """
+    An account whose balance is sharded across slot rows.
+
+    Attributes:
+        account_no (str): The till, paybill or account number (primary key), as given in the postings'
+                          `beneficiary`.
+        slots (int): Number of slot rows the balance is spread over.
+        folded_balance (float): Balance already folded out of the slots.
+        folded_at (datetime): When the slots were last folded, or `None`.
+    """
+    __tablename__ = "hot_accounts"
+
+    account_no = Column(String(100), primary_key=True)
+    slots = Column(Integer, nullable=False)
+    folded_balance = Column(Float, nullable=False, default=0.0)
+    folded_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"{self.account_no}: {self.slots} slots, {self.folded_balance} folded"
+
+
+class BalanceSlot(Base):
+    """
+    One slot of a hot account's balance.
+
+    Attributes:
+        account_no (str): The hot account the slot belongs to.
+        slot (int): Slot number, from 0 to `HotAccount.slots - 1`.
+        balance (float): Amount credited to the slot since it was last folded.
+    """
+    __tablename__ = "balance_slots"
+
+    account_no = Column(String(100), ForeignKey("hot_accounts.account_no"), primary_key=True)
+    slot = Column(Integer, primary_key=True, autoincrement=False)
+    balance = Column(Float, nullable=False, default=0.0)
@@ -20,9 +20,9 @@ Attributes and Relationships:
 """
 
 from . import Base
-from sqlalchemy import Column, String, Integer, ForeignKey, Float, Text, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, Float, Text, DateTime, Index
 from .base_model import BaseModel
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, declared_attr
 from babel.numbers import format_currency
 from .files import LoanDocs, MortgageDocs
 
@@ -48,6 +48,10 @@ class Loan(BaseModel):
         accrued_interest (float): Total interest accrued.
         principal_paid (float): Amount of the principal paid.
 
+    Indexes:
+        ix_<table>_due: Composite index on (account_status, next_calculation_date, account_no), letting the
+        accrual job find the loans that are due without scanning the table.
+
     Methods:
         truncate_uuid(): Truncates the UUID format of the `account_no` for display purposes.
     """
@@ -67,6 +71,12 @@ class Loan(BaseModel):
     accrued_interest = Column(Float, nullable=False, default=0.00)
     principal_paid = Column(Float, nullable=False, default=0.00)
 
+    @declared_attr
+    def __table_args__(cls):
+        return (
+            Index(f"ix_{cls.__tablename__}_due", "account_status", "next_calculation_date", "account_no"),
+        )
+
     def truncate_uuid(self):
         """
         Truncates the UUID format of the `account_no` for display purposes.
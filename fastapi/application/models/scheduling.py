@@ -0,0 +1,67 @@
+"""
+Scheduling Models Module.
+
+This module defines the bookkeeping tables used by the background jobs that accrue interest.
+
+Models:
+    - AccrualRun: One row per accrual job and business date, recording whether the run completed, how many
+      rows it accrued, the total interest and how long it took. The accrual jobs consult it so a business date is accrued exactly
+      once, however often the scheduler restarts.
+    - SchedulerLease: A named, time-limited lease. Scheduler workers compete for it so that exactly one node
+      runs the background jobs at a time.
+
+Table Names:
+    - accrual_runs: Stores the accrual run ledger.
+    - scheduler_leases: Stores the current holder and expiry of each lease.
+"""
+
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, UniqueConstraint
+from .base_model import BaseModel
+from . import Base
+
+
+class AccrualRun(BaseModel, Base):
+    """
+    Records one run of an accrual job for one business date.
+
+    Attributes:
+        job (str): Name of the accrual job (e.g. "loan_interest_job").
+        business_date (date): The business date the run accrues interest for.
+        status (str): "running", "completed" or "failed".
+        rows (int): Number of rows accrued by the run.
+        interest (float): Total interest accrued by the run, for reconciliation against the product tables.
+        duration (float): Wall-clock duration of the run, in seconds.
+    """
+    __tablename__ = "accrual_runs"
+    __table_args__ = (
+        UniqueConstraint("job", "business_date", name="uq_accrual_runs_job_date"),
+    )
+
+    job = Column(String(30), nullable=False)
+    business_date = Column(Date, nullable=False)
+    status = Column(String(10), nullable=False, default="running")
+    rows = Column(Integer, nullable=False, default=0)
+    interest = Column(Float, nullable=False, default=0.0)
+    duration = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"{self.job} {self.business_date}: {self.status} ({self.rows} rows in {self.duration:.2f}s)"
+
+
+class SchedulerLease(Base):
+    """
+    A named lease held by one scheduler worker until it expires.
+
+    Attributes:
+        name (str): Name of the lease (primary key).
+        holder (str): Identifier of the worker currently holding the lease.
+        expires_at (datetime): UTC time at which the lease lapses unless renewed.
+    """
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(30), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"{self.name} held by {self.holder} until {self.expires_at}"
@@ -20,7 +20,7 @@ Dependencies:
 
 from .base_model import BaseModel
 from . import Base
-from sqlalchemy import Column, String, Integer, ForeignKey, Float, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, Float, DateTime, Index
 from babel.numbers import format_currency
 from datetime import datetime
 
@@ -37,6 +37,9 @@ class TermDeposit(BaseModel, Base):
         maturity_date (datetime): The maturity date of the term deposit.
         rate (float): The interest rate for the term deposit.
         amount (int): The amount of money deposited in the term deposit.
+        compounding_frequency (str): Frequency of interest compounding, default is "daily".
+        last_calculation_date (datetime): Date of the last interest calculation (unset until the first accrual).
+        next_calculation_date (datetime): Date the deposit is next due for interest calculation.
 
     Methods:
         truncate_uuid(self): Truncates the account number UUID for privacy purposes.
@@ -58,6 +61,14 @@ class TermDeposit(BaseModel, Base):
     interest = Column(Float, nullable=False, default=0.00)
     accumulated_value = Column(Float, nullable=False)
     amount = Column(Integer, nullable=False)
+    compounding_frequency = Column(String(20), nullable=False, default="daily")
+    last_calculation_date = Column(DateTime, nullable=True)
+    next_calculation_date = Column(DateTime, nullable=False, default=datetime.now)
+
+    # Lets the accrual job find the deposits that are due without scanning the table
+    __table_args__ = (
+        Index("ix_term_deposits_due", "status", "next_calculation_date", "account_no"),
+    )
 
     def truncate_uuid(self):
         """
@@ -33,18 +33,26 @@ Classes:
     - Represents a wallet top-up transaction.
     - Adds attributes for customer ownership, transaction type (defaults to "wallet_topup"), and service provider.
 
+7. **RefSequence**:
+    - The named sequence that transaction reference numbers are allocated from, in blocks.
+
+8. **JournalEntry**:
+    - The append-only, double-entry journal shared by every transaction type.
+    - Each posting writes a debit leg on the source account and a credit leg on the counterparty, tagged with the
+      transaction type, so history, statement and reconciliation queries each read a single indexed table.
+    - Term deposit bookings and liquidations and prepaid card loads are journaled the same way, with the
+      "td_booking", "td_liquidation" and "prepaid_card_load" types.
+
 Dependencies:
 - SQLAlchemy: ORM for database interactions.
 - Babel: Formatting currency representations.
-- random, string: Utility modules for generating unique reference numbers.
+- application.refs: Allocates unique reference numbers.
 """
 
-from sqlalchemy import Column, String, Integer, ForeignKey, Float, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, Float, DateTime, Index, event, select, literal, exists, func, case, tuple_
 from .base_model import BaseModel
 from . import Base
 from babel.numbers import format_currency
-import random
-import string
 
 
 class Transaction(BaseModel):
@@ -113,21 +121,15 @@ class Transaction(BaseModel):
 
     def generate_ref_number(self):
         """
-        Generates a unique reference number for the transaction.
+        Assigns a unique reference number to the transaction.
 
-        This method constructs a reference number composed of random uppercase letters 
-        and digits to ensure that it is both unique and hard to predict. The reference
-        number follows a format: three uppercase letters, one digit, three uppercase 
-        letters, one digit, and two uppercase letters.
+        The number comes from the block-allocated reference sequence (see `application.refs`), so it never
+        collides with an existing reference. It follows the format: three uppercase letters, one digit, three
+        uppercase letters, two digits and a check letter.
         """
-        part1 = ''.join(random.choices(string.ascii_uppercase, k=3))  # Three uppercase letters
-        part2 = str(random.randint(0, 9))                            # One digit
-        part3 = ''.join(random.choices(string.ascii_uppercase, k=3))  # Three uppercase letters
-        part4 = str(random.randint(0, 9))                            # One digit
-        part5 = ''.join(random.choices(string.ascii_uppercase, k=2))  # Two uppercase letters
-        
-        # Combines parts into a reference number
-        self.ref_no = f"{part1}{part2}{part3}{part4}{part5}"
+        from ..refs import next_ref  # Imported here: the allocator itself depends on this module's models
+
+        self.ref_no = next_ref()
 
 
 class Transfer(Transaction, Base):
@@ -170,6 +172,7 @@ class PayBill(Transaction, Base):
         account_no (Column): The account number from which the bill is paid.
         owner_customer_no (Column): The unique ID of the customer making the payment.
         transaction_type (Column): Specifies the type of transaction, defaulting to "paybill".
+        credits_hot_beneficiary (bool): Bill payments credit the biller when it is a hot account.
     """
 
     __tablename__ = "bill_payments"
@@ -180,6 +183,7 @@ class PayBill(Transaction, Base):
     account_no = Column(String(100), nullable=False)
     owner_customer_no = Column(Integer, ForeignKey('customers.customer_no'))
     transaction_type = Column(String(20), nullable=False, default="paybill")
+    credits_hot_beneficiary = True
 
 
 class BuyGoods(Transaction, Base):
@@ -193,6 +197,7 @@ class BuyGoods(Transaction, Base):
         __tablename__ (str): Name of the database table for buy goods transactions.
         owner_customer_no (Column): The unique ID of the customer making the purchase.
         transaction_type (Column): Specifies the type of transaction, defaulting to "buy_goods_and_services".
+        credits_hot_beneficiary (bool): Purchases credit the merchant till when it is a hot account.
     """
 
     __tablename__ = "buy_goods_and_services"
@@ -202,6 +207,7 @@ class BuyGoods(Transaction, Base):
 
     owner_customer_no = Column(Integer, ForeignKey('customers.customer_no'))
     transaction_type = Column(String(23), nullable=False, default="buy_goods_and_services")
+    credits_hot_beneficiary = True
 
 
 class Airtime(Transaction, Base):
@@ -249,3 +255,242 @@ class TopUpWallet(Transaction, Base):
     transaction_type = Column(String(23), nullable=False, default="wallet_topup")
     owner_customer_no = Column(Integer, ForeignKey('customers.customer_no'))
     service_provider = Column(String(20), nullable=False)
+
+
+class RefSequence(Base):
+    """
+    A named counter from which transaction reference numbers are reserved in blocks.
+
+    Attributes:
+        __tablename__ (str): Name of the database table for reference sequences.
+        name (str): Name of the sequence (primary key).
+        next_value (int): The first sequence value not yet reserved by any worker.
+    """
+
+    __tablename__ = "ref_sequences"
+
+    name = Column(String(30), primary_key=True)
+    next_value = Column(BigInteger, nullable=False, default=0)
+
+
+# Journal leg directions
+DEBIT = "debit"
+CREDIT = "credit"
+
+# Transaction models whose postings are mirrored in the journal
+JOURNALED_CLASSES = [Transfer, PayBill, BuyGoods, Airtime, TopUpWallet]
+
+
+class JournalEntry(Transaction, Base):
+    """
+    Represents one leg of a double-entry posting in the unified transaction journal.
+
+    Every posting, whatever its type, writes two rows sharing the same reference number: a debit on the customer's
+    account and a credit on the counterparty (the beneficiary). Rows are never updated or deleted; corrections are
+    posted as new entries.
+
+    Attributes:
+        __tablename__ (str): Name of the database table for journal entries.
+        ref_no (str): Reference number of the posting; shared by its debit and credit legs.
+        transaction_type (str): The kind of posting (e.g. "c2b_transfer", "paybill", "airtime").
+        direction (str): "debit" or "credit".
+        owner_customer_no (int): The customer owning `account`, or `None` for external counterparties.
+
+    Indexes:
+        - (owner_customer_no, date_posted, ref_no): a customer's transaction history, in keyset order.
+        - (owner_customer_no, transaction_type, date_posted, ref_no): history filtered by transaction type.
+        - (account, date_posted, ref_no): account statements, history filtered by account and per-account
+          reconciliation.
+        - ref_no: both legs of a posting.
+    """
+
+    __tablename__ = "journal_entries"
+    __table_args__ = (
+        Index("ix_journal_entries_owner_date", "owner_customer_no", "date_posted", "ref_no"),
+        Index("ix_journal_entries_owner_type_date", "owner_customer_no", "transaction_type", "date_posted", "ref_no"),
+        Index("ix_journal_entries_account_date", "account", "date_posted", "ref_no"),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    # Legs share the posting's reference number, so it is not the key here
+    ref_no = Column(String(100), nullable=False, index=True)
+    account = Column(String(100), nullable=False)
+    beneficiary = Column(String(100), nullable=False)  # Wide enough for term deposit account numbers
+    transaction_type = Column(String(23), nullable=False)
+    direction = Column(String(6), nullable=False)
+    owner_customer_no = Column(Integer, ForeignKey('customers.customer_no'), nullable=True)
+
+    @classmethod
+    def legs(cls, transaction):
+        """
+        Builds the debit and credit legs mirroring a posted transaction.
+
+        Args:
+            transaction (Transaction): A transfer, bill payment, purchase, airtime or wallet top-up with its
+                                       reference number and transaction type set, or a movement built by
+                                       `postings.record_movement`.
+
+        Returns:
+            list[JournalEntry]: The debit leg on the source account and the credit leg on the beneficiary.
+        """
+        common = dict(
+            ref_no=transaction.ref_no,
+            amount=transaction.amount,
+            remarks=transaction.remarks,
+            beneficiary=transaction.beneficiary,
+            date_posted=transaction.date_posted,
+            transaction_type=transaction.transaction_type,
+        )
+        return [
+            cls(account=transaction.account, direction=DEBIT, owner_customer_no=transaction.owner_customer_no, **common),
+            cls(account=transaction.beneficiary, direction=CREDIT, owner_customer_no=None, **common),
+        ]
+
+    @classmethod
+    def history_query(cls, customer_no, limit, after=None, start=None, end=None, transaction_type=None,
+                      min_amount=None, max_amount=None, account=None):
+        """
+        Builds the query for one page of a customer's journal entries, newest first.
+
+        Pages are keyset-paginated on (date_posted, ref_no, id): `after` is the key of the last row of the previous
+        page, so each page is a bounded range scan on one of the composite indexes however long the history is.
+        Only the columns shown to the customer are selected; no ORM objects are built.
+
+        Args:
+            customer_no (int): The customer whose entries are listed.
+            limit (int): Maximum number of entries to return.
+            after (tuple): Optional `(date_posted, ref_no, id)` of the last entry already returned.
+            start (datetime): Optional inclusive lower bound on `date_posted`.
+            end (datetime): Optional exclusive upper bound on `date_posted`.
+            transaction_type (str): Optional transaction type to restrict the entries to.
+            min_amount (float): Optional inclusive lower bound on the amount.
+            max_amount (float): Optional inclusive upper bound on the amount.
+            account (str): Optional account number to restrict the entries to.
+
+        Returns:
+            Select: Selects `date_posted`, `ref_no`, `id`, `account`, `amount`, `transaction_type` and
+            `beneficiary`.
+        """
+        query = select(
+            cls.date_posted, cls.ref_no, cls.id, cls.account, cls.amount, cls.transaction_type, cls.beneficiary,
+        ).where(cls.owner_customer_no == customer_no)
+        if after is not None:
+            query = query.where(tuple_(cls.date_posted, cls.ref_no, cls.id) < tuple_(*after))
+        if start is not None:
+            query = query.where(cls.date_posted >= start)
+        if end is not None:
+            query = query.where(cls.date_posted < end)
+        if transaction_type is not None:
+            query = query.where(cls.transaction_type == transaction_type)
+        if min_amount is not None:
+            query = query.where(cls.amount >= min_amount)
+        if max_amount is not None:
+            query = query.where(cls.amount <= max_amount)
+        if account is not None:
+            query = query.where(cls.account == account)
+        return query.order_by(cls.date_posted.desc(), cls.ref_no.desc(), cls.id.desc()).limit(limit)
+
+    @classmethod
+    def statement_query(cls, account, start=None, end=None, chunk_size=1000):
+        """
+        Builds the query streaming the entries posted to an account, oldest first, from the
+        (account, date_posted, ref_no) index.
+
+        The query is set to run on a server-side cursor and fetch rows `chunk_size` at a time, so memory use does
+        not grow with the length of the statement. Execute it with `stream()` and consume the result before the
+        session is closed.
+
+        Args:
+            account (str): The account number.
+            start (datetime): Optional inclusive lower bound on `date_posted`.
+            end (datetime): Optional exclusive upper bound on `date_posted`.
+            chunk_size (int): Number of rows fetched from the database per round trip.
+
+        Returns:
+            Select: Selects `date_posted`, `ref_no`, `transaction_type`, `direction`, `amount`, `beneficiary` and
+            `remarks`.
+        """
+        query = select(
+            cls.date_posted, cls.ref_no, cls.transaction_type, cls.direction, cls.amount, cls.beneficiary, cls.remarks,
+        ).where(cls.account == account)
+        if start is not None:
+            query = query.where(cls.date_posted >= start)
+        if end is not None:
+            query = query.where(cls.date_posted < end)
+        query = query.order_by(cls.date_posted, cls.ref_no)
+        return query.execution_options(stream_results=True, yield_per=chunk_size)
+
+    @classmethod
+    def totals_query(cls, account, start, end):
+        """
+        Builds the query summing the debits and credits posted to an account between `start` and `end`, for
+        reconciliation against its balance. It reads the same (account, date_posted) range as `statement_query`.
+
+        Returns:
+            Select: Selects a single row of total debits and total credits.
+        """
+        return (
+            select(
+                func.coalesce(func.sum(case((cls.direction == DEBIT, cls.amount), else_=0.0)), 0.0),
+                func.coalesce(func.sum(case((cls.direction == CREDIT, cls.amount), else_=0.0)), 0.0),
+            ).where(
+                cls.account == account,
+                cls.date_posted >= start,
+                cls.date_posted < end,
+            )
+        )
+
+
+def _reject_change(mapper, connection, target):
+    """
+    Keeps the journal append-only.
+    """
+    raise ValueError("Journal entries are append-only; post a correcting entry instead.")
+
+
+event.listen(JournalEntry, "before_update", _reject_change)
+event.listen(JournalEntry, "before_delete", _reject_change)
+
+
+def sync_journal(db):
+    """
+    Backfills journal legs for transactions posted before the journal existed.
+
+    Issues an `INSERT ... SELECT` per transaction table and direction, skipping postings whose leg is already
+    journaled, so it is safe to run repeatedly. Backfilled legs take their id from the reference number and
+    direction. Runs once per deploy from `python -m application.backfill`.
+
+    Args:
+        db (Session): The database session used to run the backfill.
+    """
+    journal = JournalEntry.__table__
+    columns = [
+        "id", "created_at", "updated_at", "ref_no", "account", "amount", "remarks", "beneficiary", "date_posted",
+        "transaction_type", "direction", "owner_customer_no",
+    ]
+    for transaction_class in JOURNALED_CLASSES:
+        for direction in (DEBIT, CREDIT):
+            debit = direction == DEBIT
+            missing = select(
+                transaction_class.ref_no + literal(f":{direction}"),
+                transaction_class.created_at,
+                transaction_class.updated_at,
+                transaction_class.ref_no,
+                transaction_class.account if debit else transaction_class.beneficiary,
+                transaction_class.amount,
+                transaction_class.remarks,
+                transaction_class.beneficiary,
+                transaction_class.date_posted,
+                transaction_class.transaction_type,
+                literal(direction),
+                transaction_class.owner_customer_no if debit else literal(None, Integer),
+            ).where(
+                ~exists().where(
+                    JournalEntry.ref_no == transaction_class.ref_no,
+                    JournalEntry.direction == direction,
+                )
+            )
+            db.execute(journal.insert().from_select(columns, missing))
+    db.commit()
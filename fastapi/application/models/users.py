@@ -1,7 +1,7 @@
 """
 Module: users.py
 
-This module defines the data models for managing user and customer-related information in a financial application. It integrates with SQLAlchemy for ORM support and uses Flask-Bcrypt for secure password hashing. Additionally, it defines many-to-many relationships for customers and relationship managers.
+This module defines the data models for managing user and customer-related information in a financial application. It integrates with SQLAlchemy for ORM support and uses bcrypt (through `application.passwords`) for secure password hashing. Additionally, it defines many-to-many relationships for customers and relationship managers.
 
 Classes:
 1. **User**:
@@ -24,7 +24,7 @@ Tables:
 
 Dependencies:
 - `sqlalchemy`: Used for defining models and relationships.
-- `flask_bcrypt`: Provides secure password hashing for user authentication.
+- `bcrypt` (via `application.passwords`): Provides secure password hashing for user authentication.
 - Other modules include:
     - `PayBill`, `BuyGoods`, `Transfer`, `Airtime`, `TopUpWallet` (transaction types).
     - `PersonalAccounts`, `CorporateAccounts` (account types).
@@ -40,9 +40,9 @@ from .accounts import PersonalAccounts, CorporateAccounts
 from .loans import PersonalLoans
 from .term_deposits import TermDeposit
 from .customer_service import ClientHelpRequest, ClientReports
-from flask_bcrypt import Bcrypt
+from ..passwords import hash_password, check_password
+from ..config import settings
 
-bycrypt = Bcrypt()
 
 customer_rm_association = Table(
     "customer_rm_association",
@@ -78,12 +78,12 @@ class User(BaseModel):
     @password.setter
     def password(self, plain_text_password):
         #Hashes a plain-text password and stores it in `password_hash`
-        self.password_hash = bycrypt.generate_password_hash(plain_text_password).decode('utf-8')
+        self.password_hash = hash_password(plain_text_password, settings.bcrypt_rounds)
         return self.password_hash
     
     def check_password(self, attempted_pasword):
-        #Returns Boolean
-        return self.password_hash == attempted_pasword
+        #Returns Boolean; runs bcrypt on the calling thread, routes use `passwords.hasher.verify` instead
+        return check_password(attempted_pasword, self.password_hash)
     
     """
     - `get_c2b_transactions(db)`: Retrieves customer-to-business transfers for the user.
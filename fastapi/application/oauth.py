@@ -17,12 +17,22 @@ Key Features:
 3. **HMAC Signature Verification**:
    - Verifies the authenticity of payloads using HMAC with SHA-256.
 
+4. **Verified-Token Cache**:
+   - Decoded tokens are kept in a bounded in-process LRU (`verified_tokens`), keyed by the SHA-256 of the raw
+     token and expiring at the token's `exp`, so repeat requests with the same bearer token skip the signature
+     check entirely. Revoked tokens are purged with `verified_tokens.discard`.
+
+5. **Revocation**:
+   - Every token carries a unique `jti` claim. `revoke_token` revokes a token until it expires, and
+     `get_current_user` rejects revoked tokens after a local Bloom filter lookup (see `application.revocation`).
+
 Global Variables:
 -----------------
 - `oauth_scheme`: FastAPI OAuth2PasswordBearer dependency tied to the `login` endpoint.
 - `SECRET_KEY`: Secret key used for signing JWTs and HMAC.
 - `ALGORITHM`: Algorithm used for JWT encoding and decoding.
 - `EXPIRATION`: Access token expiration time in minutes.
+- `verified_tokens`: Cache of verified tokens (`TokenCache`).
 
 Dependencies:
 -------------
@@ -39,14 +49,19 @@ Notes:
 
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from uuid import uuid4
 from .schema import users
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from .config import settings
+from . import revocation
 import hmac
 import hashlib
 import base64
 import json
+import threading
+import time
 
 # OAuth2PasswordBearer dependency for retrieving bearer tokens
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="login")  # Ties an endpoint to function get_current_user
@@ -57,9 +72,94 @@ ALGORITHM = settings.algorithm  # Algorithm used for JWT encoding/decoding
 EXPIRATION = settings.access_token_expiration  # Access token expiration time in minutes
 
 
+class TokenCache:
+    """
+    Bounded cache of verified tokens, evicting the least recently used entry when full.
+
+    Entries are keyed by the SHA-256 of the raw token, so the cache never holds usable credentials, and expire at
+    the token's `exp` claim. `get_current_user` runs on the event loop; the lock serialises access for callers of
+    `verify_token` in FastAPI's thread pool (synchronous routes and dependencies).
+
+    Attributes:
+        max_entries (int): Most tokens held at once.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # token hash -> (TokenData, exp as a UNIX timestamp)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.revocations = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        """
+        Returns the cached `TokenData` of a token, or `None` if it is not cached or has expired.
+        """
+        key = self._key(token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() >= entry[1]:
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token, data, expires_at):
+        """
+        Caches the `TokenData` of a verified token until `expires_at` (a UNIX timestamp).
+        """
+        key = self._key(token)
+        with self.lock:
+            self.entries[key] = (data, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, token):
+        """
+        Removes a token from the cache, e.g. when it is revoked, so the next request verifies it again.
+        """
+        with self.lock:
+            if self.entries.pop(self._key(token), None) is not None:
+                self.revocations += 1
+
+    def stats(self):
+        """
+        Returns the cache metrics: hits, misses and hit ratio, evictions, expirations, revocations and the number
+        of cached tokens. Counts are per API worker.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "revocations": self.revocations,
+                "entries": len(self.entries),
+            }
+
+
+verified_tokens = TokenCache(settings.token_cache_max_entries)
+
+
 def create_token(data: dict) -> str:
     """
-    Creates a JWT token with the provided data and expiration timestamp.
+    Creates a JWT token with the provided data, an expiration timestamp and a unique token id (`jti`).
 
     Args:
         data (dict): A dictionary containing user or session-specific data 
@@ -74,7 +174,7 @@ def create_token(data: dict) -> str:
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=EXPIRATION)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     encoded = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded
 
@@ -83,32 +183,43 @@ def verify_token(token: str, credentials_exceptions: HTTPException):
     """
     Verifies the validity of a JWT token.
 
+    Tokens verified before (and not yet expired or revoked) are answered from `verified_tokens` without decoding.
+
     Args:
         token (str): The JWT token to verify.
         credentials_exceptions (HTTPException): Exception to raise if token is invalid.
 
     Returns:
-        schemas.TokenData: Decoded token data containing `customer_no`.
+        schemas.TokenData: Decoded token data containing `customer_no` and the token's `jti`.
 
     Raises:
         HTTPException: If the token is invalid or does not contain the required fields.
     """
+    data = verified_tokens.get(token)
+    if data is not None:
+        return data
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         customer_no: int = payload.get("customer_no")
         if customer_no is None:
             raise credentials_exceptions
-        data = users.TokenData(customer_no=customer_no)
+        data = users.TokenData(customer_no=customer_no, jti=payload.get("jti"))
     except JWTError:
         raise credentials_exceptions
 
+    if payload.get("exp") is not None:
+        verified_tokens.put(token, data, payload["exp"])
     return data
 
 
-def get_current_user(token: str = Depends(oauth_scheme)):
+async def get_current_user(token: str = Depends(oauth_scheme)):
     """
     Retrieves the currently authenticated user from the JWT token.
 
+    Revoked tokens are rejected. The check is a local Bloom filter lookup; Redis is only consulted when the
+    filter reports the token's `jti` as possibly revoked.
+
     Args:
         token (str): Bearer token passed with the request.
 
@@ -116,14 +227,41 @@ def get_current_user(token: str = Depends(oauth_scheme)):
         schemas.TokenData: Decoded token data containing user information.
 
     Raises:
-        HTTPException: If the token is invalid or missing.
+        HTTPException: If the token is invalid, missing or revoked.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Unable to Validate Credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    return verify_token(token, credentials_exception)
+    data = verify_token(token, credentials_exception)
+    if data.jti is not None and await revocation.revoked.is_revoked(data.jti):
+        verified_tokens.discard(token)
+        raise credentials_exception
+    return data
+
+
+async def revoke_token(token: str):
+    """
+    Revokes a token until it expires, on every API worker.
+
+    Tokens issued before tokens carried a `jti` cannot be revoked; they remain valid until they expire.
+
+    Args:
+        token (str): The raw JWT token to revoke.
+
+    Returns:
+        bool: `True` if the token was revoked, `False` if it has no `jti`.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    verified_tokens.discard(token)
+    if payload.get("jti") is None:
+        return False
+    await revocation.revoked.revoke(payload["jti"], payload["exp"])
+    return True
 
 
 def verify_signature(payload: dict, signature: str) -> bool:
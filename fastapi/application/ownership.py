@@ -0,0 +1,228 @@
+"""
+Account Ownership Module.
+
+This module answers "does customer X own account Y?" for every money-moving route without querying the database.
+The index maps each customer number to the set of account numbers they own across personal, corporate, foreign
+currency, loan and term deposit products.
+
+Key Features:
+-------------
+1. **Redis Sets with a Local LRU in Front**:
+   - Each customer's accounts are kept in the Redis set `owned:{customer_no}`, shared by every API worker.
+   - Workers keep the sets they have read in a bounded in-process LRU. Ownership is never withdrawn (closing an
+     account keeps its owner), so a local positive is always correct and is answered with a set lookup and no
+     I/O. Only a local negative (an account opened through another worker, or someone else's account) is
+     confirmed against Redis, and only a Redis negative against the account directory. Negatives are requests
+     about to be refused, so the extra query is rare, and it repairs a write-through lost to a Redis error.
+
+2. **Write-Through**:
+   - The account opening, loan and term deposit routes call `add` after committing a new account, so the index
+     knows the account before its first posting. The account is already committed, so a Redis error is logged
+     rather than raised.
+
+3. **Lazy Backfill**:
+   - Customers whose set has never been built (accounts opened before the index existed, or a flushed Redis) are
+     loaded from the account directory once, on their first check. A sentinel member marks a set as complete, so
+     a set holding only write-through additions is still backfilled.
+
+Indexes:
+--------
+- `RedisOwnershipIndex`: Shared by every API worker and node (async Redis client).
+- `LocalOwnershipIndex`: An in-process stand-in for development and tests (`settings.store_backend = "local"`). Each
+  worker only sees its own additions; other workers' accounts are found when a negative is confirmed.
+"""
+
+import logging
+from collections import OrderedDict
+from fastapi import HTTPException, status
+from sqlalchemy import select
+import redis.asyncio as aioredis
+from .config import settings
+from .models.directory import AccountDirectory
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "owned:"
+COMPLETE = ""  # Sentinel member of sets loaded from the account directory; never a valid account number
+
+
+async def load_owned_accounts(db, customer_no):
+    """
+    Reads a customer's account numbers from the account directory.
+
+    Args:
+        db (AsyncSession): The database session.
+        customer_no (int): The customer.
+
+    Returns:
+        list[str]: The account, loan and term deposit numbers the customer owns.
+    """
+    return list(await db.scalars(
+        select(AccountDirectory.account_no).where(AccountDirectory.owner_customer_no == customer_no)
+    ))
+
+
+class LocalSets:
+    """
+    Bounded in-process LRU of customers' account sets.
+
+    Attributes:
+        max_entries (int): Most customers held at once.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # customer_no -> set of account numbers, least recently used first
+        self.evictions = 0
+
+    def get(self, customer_no):
+        accounts = self.entries.get(customer_no)
+        if accounts is not None:
+            self.entries.move_to_end(customer_no)
+        return accounts
+
+    def put(self, customer_no, accounts):
+        self.entries[customer_no] = accounts
+        self.entries.move_to_end(customer_no)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class RedisOwnershipIndex:
+    """
+    Account ownership kept in Redis sets, fronted by a local LRU.
+
+    Attributes:
+        redis (redis.asyncio.Redis): The Redis client.
+        local (LocalSets): The sets this worker has read.
+    """
+
+    name = "redis"
+
+    def __init__(self, url, max_entries):
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.local = LocalSets(max_entries)
+        self.local_hits = 0
+        self.redis_lookups = 0
+        self.loads = 0
+        self.confirmations = 0
+
+    async def owns(self, customer_no, account_no, loader):
+        """
+        Returns `True` if the customer owns the account.
+
+        Args:
+            customer_no (int): The customer.
+            account_no (str): The account.
+            loader (callable): Coroutine function returning the customer's accounts from the database; called
+                               for a customer whose set has never been built, and to confirm a negative.
+        """
+        accounts = self.local.get(customer_no)
+        if accounts is not None and account_no in accounts:
+            self.local_hits += 1
+            return True
+
+        self.redis_lookups += 1
+        key = f"{KEY_PREFIX}{customer_no}"
+        accounts = await self.redis.smembers(key)
+        if COMPLETE not in accounts:
+            self.loads += 1
+            loaded = await loader()
+            await self.redis.sadd(key, COMPLETE, *loaded)
+            accounts |= {COMPLETE, *loaded}
+        elif account_no not in accounts:
+            self.confirmations += 1
+            if account_no in await loader():
+                await self.redis.sadd(key, account_no)
+                accounts.add(account_no)
+        accounts.discard(COMPLETE)
+        self.local.put(customer_no, accounts)
+        return account_no in accounts
+
+    async def add(self, customer_no, account_no):
+        """
+        Records a newly committed account. A Redis error is logged; the account is then found by the directory
+        lookup that confirms its first negative.
+        """
+        try:
+            await self.redis.sadd(f"{KEY_PREFIX}{customer_no}", account_no)
+        except Exception as e:
+            logger.warning(f"Could not add account {account_no} to the ownership index: {e}")
+        accounts = self.local.get(customer_no)
+        if accounts is not None:
+            accounts.add(account_no)
+
+    def stats(self):
+        return {"backend": self.name, "local_hits": self.local_hits, "redis_lookups": self.redis_lookups,
+                "loads": self.loads, "confirmations": self.confirmations, "local_entries": len(self.local.entries),
+                "evictions": self.local.evictions}
+
+
+class LocalOwnershipIndex:
+    """
+    Account ownership kept in process memory, loaded from the database on first use.
+    """
+
+    name = "local"
+
+    def __init__(self, max_entries):
+        self.local = LocalSets(max_entries)
+        self.local_hits = 0
+        self.loads = 0
+        self.confirmations = 0
+
+    async def owns(self, customer_no, account_no, loader):
+        accounts = self.local.get(customer_no)
+        if accounts is not None and account_no in accounts:
+            self.local_hits += 1
+            return True
+        if accounts is None:
+            self.loads += 1
+        else:
+            self.confirmations += 1
+        accounts = set(await loader())
+        self.local.put(customer_no, accounts)
+        return account_no in accounts
+
+    async def add(self, customer_no, account_no):
+        # Customers not held locally load the committed account with the rest of their set
+        accounts = self.local.get(customer_no)
+        if accounts is not None:
+            accounts.add(account_no)
+
+    def stats(self):
+        return {"backend": self.name, "local_hits": self.local_hits, "redis_lookups": 0, "loads": self.loads,
+                "confirmations": self.confirmations, "local_entries": len(self.local.entries),
+                "evictions": self.local.evictions}
+
+
+def create_index():
+    """
+    Creates the ownership index on the backend selected by `settings.store_backend` ("redis" or "local").
+    """
+    if settings.store_backend == "local":
+        return LocalOwnershipIndex(settings.ownership_max_entries)
+    return RedisOwnershipIndex(settings.redis_url, settings.ownership_max_entries)
+
+
+index = create_index()
+
+
+async def authorize(db, customer_no, account_no):
+    """
+    Checks that a customer owns the account a request acts on.
+
+    Args:
+        db (AsyncSession): The database session, used only to backfill a customer missing from the index.
+        customer_no (int): The authenticated customer.
+        account_no (str): The account the request debits or closes.
+
+    Raises:
+        HTTPException: 403 if the account does not belong to the customer.
+    """
+    if not await index.owns(customer_no, str(account_no), lambda: load_owned_accounts(db, customer_no)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The account does not belong to the user."
+        )
@@ -0,0 +1,139 @@
+"""
+Password Hashing Module.
+
+This module hashes and verifies customer passwords with bcrypt without blocking the API workers. bcrypt is
+deliberately slow (a verification at cost 12 takes a few hundred milliseconds of CPU), so running it on the event
+loop or in FastAPI's thread pool lets a burst of logins stall every other request.
+
+Key Features:
+-------------
+1. **Dedicated Process Pool**:
+   - Hashing and verification run in a `ProcessPoolExecutor` of `settings.password_workers` processes, so they
+     use their own cores and never hold the GIL of an API worker.
+
+2. **Fast Rejection Under Load**:
+   - At most `settings.password_queue_limit` operations may be running or queued per API worker. Beyond that,
+     requests fail immediately with a 503 and a `Retry-After` header instead of waiting in an unbounded queue.
+
+3. **Transparent Rehashing**:
+   - The cost factor is `settings.bcrypt_rounds`. `needs_rehash` reports hashes made with another cost (and
+     legacy plain-text values, which are still accepted once), so the login route can replace them with a
+     current hash after a successful login.
+
+Usage:
+------
+    password_hash = await passwords.hasher.hash("s3cret")
+    if await passwords.hasher.verify("s3cret", password_hash): ...
+"""
+
+import asyncio
+import hmac
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from fastapi import HTTPException, status
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+RETRY_AFTER = 1  # Seconds clients are asked to wait when the pool is saturated
+
+
+def is_bcrypt_hash(value):
+    """
+    Returns `True` if `value` is a bcrypt hash rather than a legacy plain-text password.
+    """
+    return value.startswith(BCRYPT_PREFIXES)
+
+
+def hash_password(password, rounds):
+    """
+    Hashes a password with bcrypt at the given cost. Runs in the worker processes.
+    """
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def check_password(password, password_hash):
+    """
+    Checks a password against a stored bcrypt hash or legacy plain-text value. Runs in the worker processes.
+    """
+    if is_bcrypt_hash(password_hash):
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+    return hmac.compare_digest(password.encode(), password_hash.encode())
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded process pool.
+
+    Attributes:
+        rounds (int): The bcrypt cost factor of new hashes.
+        workers (int): Number of worker processes.
+        queue_limit (int): Most operations running or queued at once before requests are rejected.
+    """
+
+    def __init__(self, rounds, workers, queue_limit):
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self._executor = None  # Started on first use, so importing the module spawns no processes
+
+    async def _run(self, function, *args):
+        if self.pending >= self.queue_limit:
+            logger.warning(f"Password pool saturated ({self.pending} operations pending); rejecting request.")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins in progress. Please try again shortly.",
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password):
+        """
+        Hashes a password at the configured cost.
+
+        Raises:
+            HTTPException: 503 if too many password operations are pending.
+        """
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password, password_hash):
+        """
+        Checks a password against its stored hash (or legacy plain-text value).
+
+        Legacy values are compared in process: there is nothing expensive to offload.
+
+        Raises:
+            HTTPException: 503 if too many password operations are pending.
+        """
+        if not is_bcrypt_hash(password_hash):
+            return check_password(password, password_hash)
+        return await self._run(check_password, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        """
+        Returns `True` if a stored value should be replaced: a legacy plain-text value, or a bcrypt hash made with
+        a cost other than `rounds`.
+        """
+        if not is_bcrypt_hash(password_hash):
+            return True
+        return int(password_hash.split("$")[2]) != self.rounds
+
+    def shutdown(self):
+        """
+        Stops the worker processes, if they were started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher(settings.bcrypt_rounds, settings.password_workers, settings.password_queue_limit)
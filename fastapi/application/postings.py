@@ -0,0 +1,288 @@
+"""
+Posting Helpers Module.
+
+This module gathers the database primitives shared by every route that reads or moves money on a customer
+account. Keeping them in one place means each route resolves and updates accounts the same way. The helpers are
+coroutines operating on an `AsyncSession`.
+
+Key Features:
+-------------
+1. **Account Resolution**:
+   - `resolve_account` looks an account number up in the account directory and loads the matching product row
+     in a single query, whatever product table the account lives in.
+
+2. **Atomic Balance Updates**:
+   - `debit_account` issues a single conditional `UPDATE ... WHERE balance >= :amount` and reads the affected
+     row count to detect insufficient funds, so concurrent postings can never overdraw an account or lose an
+     update.
+   - `credit_account` adds to a balance with the same in-database arithmetic.
+
+3. **Posting Staging**:
+   - `stage_posting` resolves and debits the source account of a posting and adds it to the session, leaving the
+     flush and commit to the caller, so a posting can be committed on its own or together with others.
+   - Purchases and bill payments also credit the merchant or biller when it is a hot account (see
+     `hot_accounts`).
+   - `record_posting` adds the journal legs of a staged posting and updates its spend rollup (see `analytics`).
+   - `record_movement` does the same for money moved without a posting row, between a customer's account and a
+     term deposit or prepaid card, so the journal still mirrors every balance change.
+
+4. **Deadlock Retries**:
+   - `with_deadlock_retry` re-runs a unit of work after a MySQL deadlock or lock wait timeout, backing off for a
+     random (jittered) interval so colliding requests do not retry in lockstep.
+
+Notes:
+------
+- Resolution relies on the `account_directory` table being in sync with the product tables. New rows are
+  registered automatically on insert; older rows are backfilled by `python -m application.backfill`.
+"""
+
+import asyncio
+import random
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import select, update, and_
+from sqlalchemy.exc import OperationalError
+from fastapi import HTTPException, status
+from .models.directory import AccountDirectory, PRODUCT_CLASSES
+from .hot_accounts import credit_hot_account
+from .analytics import record_spend
+from .models.transactions import JournalEntry
+from .refs import async_next_ref
+
+logger = logging.getLogger(__name__)
+
+# MySQL error codes for "deadlock found" and "lock wait timeout exceeded"
+DEADLOCK_ERROR_CODES = {1213, 1205}
+DEADLOCK_RETRIES = 3  # Attempts before the error is surfaced to the caller
+BACKOFF_BASE = 0.05  # Seconds; the backoff window doubles on every attempt
+
+
+async def resolve_account(db, account_no, classes=PRODUCT_CLASSES):
+    """
+    Loads the account, loan or term deposit identified by `account_no` in one round trip.
+
+    The directory row is outer-joined to each candidate product table on the account number and product name,
+    so only the table that actually holds the account contributes a row.
+
+    Args:
+        db (AsyncSession): The database session used for the lookup.
+        account_no (str): The account number to resolve.
+        classes (list): The product models the caller accepts. Accounts held in any other table are treated as
+                        not found.
+
+    Returns:
+        The ORM instance holding the account, or `None` if it does not exist among `classes`.
+
+    Example:
+        >>> await resolve_account(db, "123e4567-e89b-12d3-a456-426614174000", [PersonalAccounts, CorporateAccounts])
+        <PersonalAccounts ...>
+    """
+    query = select(*classes).select_from(AccountDirectory)
+    for product_class in classes:
+        query = query.outerjoin(
+            product_class,
+            and_(
+                product_class.account_no == AccountDirectory.account_no,
+                AccountDirectory.product == product_class.__tablename__,
+            ),
+        )
+    row = (await db.execute(query.where(AccountDirectory.account_no == str(account_no)))).first()
+    if row is None:
+        return None
+    return next((entity for entity in row if entity is not None), None)
+
+
+def balance_column(account_class):
+    """
+    Returns the column that holds the spendable balance for a product model.
+
+    Loans are drawn down from `disposable_amount`; every other account type spends from `account_balance`.
+
+    Args:
+        account_class: The product model (e.g. `PersonalAccounts`, `PersonalLoans`).
+
+    Returns:
+        The SQLAlchemy column attribute holding the spendable balance.
+    """
+    if hasattr(account_class, "disposable_amount"):
+        return account_class.disposable_amount
+    return account_class.account_balance
+
+
+async def debit_account(db, account, amount):
+    """
+    Atomically debits `amount` from an account if, and only if, the balance covers it.
+
+    The check and the subtraction happen in one `UPDATE` statement evaluated by the database, so two concurrent
+    debits can never both pass the balance check on a stale read.
+
+    Args:
+        db (AsyncSession): The database session; the debit joins its current transaction.
+        account: The ORM instance returned by `resolve_account`.
+        amount (float): The amount to debit. Must be positive.
+
+    Returns:
+        bool: `True` if the account was debited, `False` if the balance was insufficient.
+
+    Note:
+        The balance attribute of `account` is expired afterwards; `await db.refresh(account)` before reading it.
+    """
+    account_class = type(account)
+    balance = balance_column(account_class)
+    result = await db.execute(
+        update(account_class)
+        .where(account_class.account_no == account.account_no, balance >= amount)
+        .values({balance: balance - amount})
+        .execution_options(synchronize_session=False)
+    )
+    # The in-memory balance is stale either way; reload it on next access
+    db.expire(account, [balance.key])
+    return result.rowcount == 1
+
+
+async def credit_account(db, account, amount):
+    """
+    Atomically credits `amount` to an account's spendable balance.
+
+    Args:
+        db (AsyncSession): The database session; the credit joins its current transaction.
+        account: The ORM instance returned by `resolve_account`.
+        amount (float): The amount to credit.
+    """
+    account_class = type(account)
+    balance = balance_column(account_class)
+    await db.execute(
+        update(account_class)
+        .where(account_class.account_no == account.account_no)
+        .values({balance: balance + amount})
+        .execution_options(synchronize_session=False)
+    )
+    db.expire(account, [balance.key])
+
+
+async def stage_posting(db, new_transaction, account_no, amount, classes):
+    """
+    Debits the source account of a posting and adds the posting to the session, without committing.
+
+    If the posting type credits its beneficiary (`credits_hot_beneficiary`) and the beneficiary is a hot account,
+    one of its balance slots is credited as well.
+
+    The reference number is allocated before the debit, so a posting that has to wait for a new block of
+    references does not hold the account's row lock meanwhile.
+
+    Args:
+        db (AsyncSession): The database session; the posting joins its current transaction.
+        new_transaction (Transaction): The unsaved transaction model.
+        account_no (str): The account to debit.
+        amount (float): The amount of the posting.
+        classes (list): The product models the account may live in.
+
+    Raises:
+        HTTPException:
+            - 400: If the balance is insufficient. Nothing is written.
+            - 404: If the account does not exist among `classes`.
+    """
+    account = await resolve_account(db, account_no, classes)
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account does not exist."
+        )
+    new_transaction.ref_no = await async_next_ref()
+    if not await debit_account(db, account, amount):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient funds for this transaction."
+        )
+    if getattr(new_transaction, "credits_hot_beneficiary", False):
+        await credit_hot_account(db, new_transaction.beneficiary, amount)
+    db.add(new_transaction)
+
+
+async def record_posting(db, new_transaction):
+    """
+    Adds the journal legs of a staged posting and adds it to the customer's spend rollup.
+
+    Args:
+        db (AsyncSession): The database session the posting was staged and flushed in.
+        new_transaction (Transaction): The posting, flushed so its column defaults (e.g. the transaction type)
+                                       are set.
+    """
+    db.add_all(JournalEntry.legs(new_transaction))
+    await record_spend(db, new_transaction)
+
+
+async def record_movement(db, ref_no, account, beneficiary, amount, transaction_type, owner_customer_no, remarks):
+    """
+    Journals a movement of money that has no posting row of its own (booking or liquidating a term deposit,
+    loading a prepaid card), in the same transaction as the balance updates, and adds it to the spend rollup.
+
+    Allocate `ref_no` with `async_next_ref` before debiting, as `stage_posting` does, so the debited row is not
+    locked while a block of references is reserved.
+
+    Args:
+        db (AsyncSession): The database session holding the balance updates.
+        ref_no (str): The reference number shared by both legs.
+        account (str): The account or product debited.
+        beneficiary (str): The account or product credited.
+        amount (float): The amount moved.
+        transaction_type (str): The kind of movement (e.g. "td_booking").
+        owner_customer_no (int): The customer owning the debited account.
+        remarks (str): A description of the movement.
+    """
+    movement = SimpleNamespace(
+        ref_no=ref_no,
+        account=account,
+        beneficiary=beneficiary,
+        amount=amount,
+        transaction_type=transaction_type,
+        owner_customer_no=owner_customer_no,
+        remarks=remarks,
+        date_posted=datetime.now(),
+    )
+    await record_posting(db, movement)
+
+
+def is_deadlock(error):
+    """
+    Tells whether a database error is a retryable deadlock or lock wait timeout.
+
+    Args:
+        error (OperationalError): The error raised by SQLAlchemy.
+
+    Returns:
+        bool: `True` if the underlying MySQL error code is retryable.
+    """
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] in DEADLOCK_ERROR_CODES
+
+
+async def with_deadlock_retry(db, work, attempts=DEADLOCK_RETRIES):
+    """
+    Awaits `work()` and retries it when the database reports a deadlock.
+
+    The session is rolled back before each retry, so `work` must perform the whole unit of work, including the
+    commit. Between attempts the caller sleeps for a random interval in `[0, BACKOFF_BASE * 2**attempt)`.
+
+    Args:
+        db (AsyncSession): The session `work` operates on.
+        work (callable): A zero-argument coroutine function performing the unit of work.
+        attempts (int): Maximum number of attempts.
+
+    Returns:
+        Whatever `work()` returns.
+
+    Raises:
+        OperationalError: If the error is not a deadlock or the attempts are exhausted.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await work()
+        except OperationalError as e:
+            await db.rollback()
+            if not is_deadlock(e) or attempt == attempts:
+                raise
+            delay = random.uniform(0, BACKOFF_BASE * 2 ** attempt)
+            logger.warning(f"Deadlock on attempt {attempt}, retrying in {delay:.3f}s: {e.orig}")
+            await asyncio.sleep(delay)
@@ -0,0 +1,100 @@
+"""
+Request Principal Module.
+
+This module provides `get_current_principal`, a dependency that resolves the authenticated customer together with
+the account numbers they own, so routes can authorize access to an account and build responses without querying
+`Customer` or the account tables again.
+
+Key Features:
+-------------
+1. **One Query per Request**:
+   - The customer row is outer-joined to the account directory, which lists every personal, corporate, foreign
+     currency, loan and term deposit account with its owner, so the profile and the full set of owned accounts
+     come back in a single round trip.
+
+2. **Short-Lived Shared Cache**:
+   - With `settings.principal_cache_ttl` above zero the principal is kept in the customer cache for that many
+     seconds. The entry shares the customer's generation, so opening or closing an account, booking a deposit or
+     taking a loan invalidates it immediately; the TTL only bounds how long a worker that did not see the
+     invalidation (local backend) can serve it.
+"""
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import oauth, cache
+from .config import settings
+from .database import get_async_db
+from .models.directory import AccountDirectory
+from .models.users import Customer
+from .schema import users
+
+
+def principal_query(customer_no):
+    """
+    Builds the query for a customer's profile, with one row per owned account (or a single row with a `NULL`
+    account number for a customer without accounts).
+    """
+    return (
+        select(Customer.customer_no, Customer.full_name, Customer.email, AccountDirectory.account_no)
+        .outerjoin(AccountDirectory, AccountDirectory.owner_customer_no == Customer.customer_no)
+        .where(Customer.customer_no == customer_no)
+    )
+
+
+async def load_principal(db, customer_no):
+    """
+    Loads a customer's profile and owned account numbers.
+
+    Args:
+        db (AsyncSession): The database session.
+        customer_no (int): The customer to load.
+
+    Returns:
+        dict: The `Principal` fields (JSON-serialisable, for the cache), or `None` if the customer does not exist.
+    """
+    rows = (await db.execute(principal_query(customer_no))).all()
+    if not rows:
+        return None
+    return {
+        "customer_no": rows[0].customer_no,
+        "full_name": rows[0].full_name,
+        "email": rows[0].email,
+        "account_nos": sorted(row.account_no for row in rows if row.account_no is not None),
+    }
+
+
+async def get_current_principal(
+    current_user: users.TokenData = Depends(oauth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Resolves the authenticated customer and the accounts they own.
+
+    Args:
+        current_user (schemas.TokenData): The verified access token.
+        db (AsyncSession): The database session.
+
+    Returns:
+        schemas.Principal: The customer's profile and owned account numbers.
+
+    Raises:
+        HTTPException: 401 if the token's customer no longer exists.
+    """
+    def load():
+        return load_principal(db, current_user.customer_no)
+
+    if settings.principal_cache_ttl > 0:
+        data = await cache.customers.get_or_load(
+            current_user.customer_no, "principal", load, ttl=settings.principal_cache_ttl
+        )
+    else:
+        data = await load()
+
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unable to Validate Credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return users.Principal(**data, jti=current_user.jti)
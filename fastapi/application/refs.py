@@ -0,0 +1,268 @@
+"""
+Reference Number Module.
+
+This module hands out transaction reference numbers that are unique by construction. It replaces random codes,
+whose collisions on the `ref_no` primary key surfaced as failed postings as the tables grew.
+
+Key Features:
+-------------
+1. **Block Allocation**:
+   - Each worker reserves a block of `settings.ref_block_size` sequence values from the `ref_sequences` table in a
+     single statement (`LAST_INSERT_ID(next_value + n)` on MySQL, `UPDATE ... RETURNING` elsewhere), committed in
+     its own transaction so postings never wait on the sequence row.
+   - Values are then handed out from memory under a lock until the block is used up. Values left in a block when a
+     worker stops are simply skipped.
+   - Request handlers use `async_next_ref`, which reserves on the async engine under an `asyncio.Lock`, so a slow
+     reservation never blocks the event loop. `next_ref` serves synchronous callers from a separate block.
+
+2. **Human-Friendly Shape**:
+   - Sequence values are scrambled with a bijective affine map (so consecutive postings do not get consecutive
+     references) and encoded in mixed radix into the `LLLDLLLDD` shape.
+   - A tenth character, a check letter, catches any single mistyped character and most adjacent transpositions
+     when a customer reads a reference back, giving the `LLLDLLLDDL` format.
+   - The ninth character is a digit, where the random references issued before the sequence have a letter
+     (`LLLDLLLDLL`), so a sequence reference can never collide with an existing one.
+
+Capacity:
+---------
+9 payload characters (6 letters, 3 digits) give 26**6 * 1000 (about 3 * 10**11) distinct references.
+"""
+
+import asyncio
+import string
+import threading
+from sqlalchemy import update, func
+from sqlalchemy.exc import IntegrityError
+from .config import settings
+from .models.transactions import RefSequence
+
+LETTERS = string.ascii_uppercase
+DIGITS = string.digits
+
+# Alphabet of each payload position, most significant first: LLLDLLLDD. Legacy random references have a letter
+# in the last position, so the two formats are disjoint.
+PAYLOAD_SHAPE = [LETTERS, LETTERS, LETTERS, DIGITS, LETTERS, LETTERS, LETTERS, DIGITS, DIGITS]
+CAPACITY = 26 ** 6 * 10 ** 3
+
+# Affine scramble v -> (v * MULTIPLIER + OFFSET) % CAPACITY. The multiplier is coprime to the capacity
+# (2**9 * 5**3 * 13**6), so the map is a bijection and distinct sequence values never share a reference.
+MULTIPLIER = 2654435761
+OFFSET = 25214903917
+
+# Check weights are odd and not 13, i.e. invertible modulo 26, so any single substituted character changes the sum
+CHECK_WEIGHTS = [1, 3, 5, 7, 9, 11, 15, 17, 19]
+
+SEQUENCE_NAME = "transaction_ref"
+
+
+def encode(value):
+    """
+    Encodes a sequence value as a reference number.
+
+    Args:
+        value (int): A sequence value in `[0, CAPACITY)`.
+
+    Returns:
+        str: The reference number, e.g. "QZK4MBD72X".
+
+    Raises:
+        ValueError: If the value is out of range.
+    """
+    if not 0 <= value < CAPACITY:
+        raise ValueError(f"Reference sequence exhausted or invalid: {value}")
+    scrambled = (value * MULTIPLIER + OFFSET) % CAPACITY
+    characters = []
+    for alphabet in reversed(PAYLOAD_SHAPE):
+        scrambled, index = divmod(scrambled, len(alphabet))
+        characters.append(alphabet[index])
+    payload = "".join(reversed(characters))
+    return payload + check_letter(payload)
+
+
+def check_letter(payload):
+    """
+    Computes the check letter for the nine payload characters of a reference number.
+    """
+    total = sum(
+        weight * alphabet.index(character)
+        for weight, alphabet, character in zip(CHECK_WEIGHTS, PAYLOAD_SHAPE, payload)
+    )
+    return LETTERS[total % 26]
+
+
+def is_valid(ref_no):
+    """
+    Tells whether a string is a well-formed reference number with a correct check letter.
+    """
+    if len(ref_no) != len(PAYLOAD_SHAPE) + 1:
+        return False
+    payload, check = ref_no[:-1], ref_no[-1]
+    if any(character not in alphabet for alphabet, character in zip(PAYLOAD_SHAPE, payload)):
+        return False
+    return check_letter(payload) == check
+
+
+def reserve_statement(dialect, size, name):
+    """
+    Builds the statement that advances a sequence by `size` and makes its new value readable from the result.
+    """
+    if dialect == "mysql":
+        # LAST_INSERT_ID(expr) makes the new value readable from the UPDATE's own result
+        return (
+            update(RefSequence)
+            .where(RefSequence.name == name)
+            .values(next_value=func.last_insert_id(RefSequence.next_value + size))
+        )
+    return (
+        update(RefSequence)
+        .where(RefSequence.name == name)
+        .values(next_value=RefSequence.next_value + size)
+        .returning(RefSequence.next_value)
+    )
+
+
+def block_end(dialect, result):
+    """
+    Reads the advanced sequence value from the result of `reserve_statement`, or `None` if the row is missing.
+    """
+    if dialect == "mysql":
+        return result.lastrowid if result.rowcount == 1 else None
+    return result.scalar()
+
+
+def reserve_block(size, name=SEQUENCE_NAME):
+    """
+    Reserves `size` consecutive sequence values in one statement and its own transaction.
+
+    Args:
+        size (int): Number of values to reserve.
+        name (str): Name of the sequence row.
+
+    Returns:
+        int: The first reserved value; the block is `[first, first + size)`.
+    """
+    from .database import engine  # Imported here so the encoder can be used without a database
+
+    for _ in range(2):
+        with engine.begin() as connection:
+            dialect = connection.dialect.name
+            end = block_end(dialect, connection.execute(reserve_statement(dialect, size, name)))
+            if end is not None:
+                return end - size
+        # First use of the sequence: create its row, tolerating a concurrent creation by another worker
+        try:
+            with engine.begin() as connection:
+                connection.execute(RefSequence.__table__.insert().values(name=name, next_value=0))
+        except IntegrityError:
+            pass
+    raise RuntimeError(f"Could not reserve reference numbers from sequence {name}.")
+
+
+async def async_reserve_block(size, name=SEQUENCE_NAME):
+    """
+    Reserves `size` consecutive sequence values like `reserve_block`, on the async engine, so a request handler
+    waiting on the sequence row yields the event loop instead of blocking it.
+
+    Args:
+        size (int): Number of values to reserve.
+        name (str): Name of the sequence row.
+
+    Returns:
+        int: The first reserved value; the block is `[first, first + size)`.
+    """
+    from .database import async_engine
+
+    for _ in range(2):
+        async with async_engine.begin() as connection:
+            dialect = connection.dialect.name
+            end = block_end(dialect, await connection.execute(reserve_statement(dialect, size, name)))
+            if end is not None:
+                return end - size
+        try:
+            async with async_engine.begin() as connection:
+                await connection.execute(RefSequence.__table__.insert().values(name=name, next_value=0))
+        except IntegrityError:
+            pass
+    raise RuntimeError(f"Could not reserve reference numbers from sequence {name}.")
+
+
+class RefAllocator:
+    """
+    Hands out reference numbers from blocks of sequence values reserved in the database.
+
+    Thread-safe; one instance is shared by the synchronous callers of a worker process.
+
+    Attributes:
+        block_size (int): Number of sequence values reserved per database round trip.
+        reserve (callable): Called as `reserve(block_size)`; returns the first value of a newly reserved block.
+    """
+
+    def __init__(self, block_size=None, reserve=reserve_block):
+        self.block_size = block_size or settings.ref_block_size
+        self.reserve = reserve
+        self.lock = threading.Lock()
+        self.next_value = 0
+        self.end = 0
+
+    def next(self):
+        """
+        Returns the next unused reference number, reserving a new block when the current one is used up.
+        """
+        with self.lock:
+            if self.next_value >= self.end:
+                self.next_value = self.reserve(self.block_size)
+                self.end = self.next_value + self.block_size
+            value = self.next_value
+            self.next_value += 1
+        return encode(value)
+
+
+class AsyncRefAllocator:
+    """
+    The event loop's counterpart of `RefAllocator`, used by the async request handlers.
+
+    It keeps its own block, so it never waits on a thread holding `RefAllocator.lock`, and reserves blocks with
+    `async_reserve_block` under an `asyncio.Lock`: while one request waits for a block, the others yield.
+
+    Attributes:
+        block_size (int): Number of sequence values reserved per database round trip.
+        reserve (callable): Coroutine function called as `reserve(block_size)`; returns the first value of a newly
+                            reserved block.
+    """
+
+    def __init__(self, block_size=None, reserve=async_reserve_block):
+        self.block_size = block_size or settings.ref_block_size
+        self.reserve = reserve
+        self.lock = asyncio.Lock()
+        self.next_value = 0
+        self.end = 0
+
+    async def next(self):
+        """
+        Returns the next unused reference number, reserving a new block when the current one is used up.
+        """
+        async with self.lock:
+            if self.next_value >= self.end:
+                self.next_value = await self.reserve(self.block_size)
+                self.end = self.next_value + self.block_size
+            value = self.next_value
+            self.next_value += 1
+        return encode(value)
+
+
+allocator = RefAllocator()
+async_allocator = AsyncRefAllocator()
+
+
+def next_ref():
+    """
+    Returns a new, never previously issued reference number from the worker's allocator.
+    """
+    return allocator.next()
+
+
+async def async_next_ref():
+    """
+    Returns a new, never previously issued reference number from the worker's async allocator.
+    """
+    return await async_allocator.next()
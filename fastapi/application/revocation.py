@@ -0,0 +1,221 @@
+"""
+Token Revocation Module.
+
+This module lets access tokens be revoked before they expire (on logout, or when a token is reported stolen)
+without adding a network round trip to every authenticated request.
+
+Key Features:
+-------------
+1. **Revoked JTIs in Redis**:
+   - Revoking a token stores `revoked:{jti}` in Redis with a TTL ending at the token's `exp`, so the set only ever
+     holds tokens that would otherwise still be accepted, and announces the JTI on the `revocations` channel.
+
+2. **Local Bloom Filter**:
+   - Every API worker mirrors the revoked JTIs into a compact Bloom filter, loaded from Redis on startup and kept
+     current from the pub/sub channel. A token whose JTI is not in the filter is certainly not revoked, so the
+     common case costs a few hashes and no I/O; only a positive (a revoked token or a rare false positive) is
+     confirmed against Redis.
+   - A Bloom filter cannot forget entries, so it is rebuilt from Redis every
+     `settings.revocation_rebuild_interval` seconds, dropping JTIs whose tokens have expired since.
+
+Revocation Lists:
+-----------------
+- `RedisRevocationList`: Shared by every API worker and node (async Redis client).
+- `LocalRevocationList`: An in-process stand-in for development and tests (`settings.store_backend = "local"`).
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+import redis.asyncio as aioredis
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "revocations"
+KEY_PREFIX = "revoked:"
+SCAN_BATCH = 1000  # Keys read per SCAN round trip when rebuilding the filter
+RECONNECT_DELAY = 1  # Seconds to wait before resubscribing after a Redis error
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter of strings.
+
+    Attributes:
+        bits (int): Size of the bit array.
+        hashes (int): Number of bit positions set per item.
+        count (int): Number of items added.
+    """
+
+    def __init__(self, bits, hashes):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: the i-th position is h1 + i * h2, from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.array[position >> 3] >> (position & 7) & 1 for position in self._positions(item))
+
+
+def new_filter():
+    """
+    Creates an empty filter sized by `settings.revocation_bloom_bits` and `settings.revocation_bloom_hashes`.
+    """
+    return BloomFilter(settings.revocation_bloom_bits, settings.revocation_bloom_hashes)
+
+
+class RedisRevocationList:
+    """
+    Revoked JTIs kept in Redis, mirrored into a local Bloom filter.
+
+    Attributes:
+        redis (redis.asyncio.Redis): The Redis client.
+        filter (BloomFilter): The local mirror of the revoked JTIs.
+    """
+
+    name = "redis"
+
+    def __init__(self, url):
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.filter = new_filter()
+        self.positives = 0
+        self.confirmed = 0
+        self._task = None
+
+    async def revoke(self, jti, expires_at):
+        """
+        Revokes a token until `expires_at` (a UNIX timestamp) and notifies every worker.
+        """
+        ttl = max(1, int(expires_at - time.time()))
+        await self.redis.set(f"{KEY_PREFIX}{jti}", 1, ex=ttl)
+        self.filter.add(jti)  # Effective on this worker without waiting for the broadcast
+        await self.redis.publish(CHANNEL, jti)
+
+    async def is_revoked(self, jti):
+        """
+        Returns `True` if the token with this JTI has been revoked. Only filter positives reach Redis.
+        """
+        if jti not in self.filter:
+            return False
+        self.positives += 1
+        try:
+            revoked = await self.redis.exists(f"{KEY_PREFIX}{jti}") == 1
+        except aioredis.RedisError as e:
+            # Refuse the token rather than risk accepting a revoked one
+            logger.warning(f"Could not confirm the revocation of {jti}: {e}")
+            return True
+        self.confirmed += revoked
+        return revoked
+
+    async def _rebuild(self):
+        rebuilt = new_filter()
+        async for key in self.redis.scan_iter(match=f"{KEY_PREFIX}*", count=SCAN_BATCH):
+            rebuilt.add(key[len(KEY_PREFIX):])
+        self.filter = rebuilt
+
+    async def _run(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    # Subscribe before loading, so revocations made during the load are queued, not missed
+                    await pubsub.subscribe(CHANNEL)
+                    await self._rebuild()
+                    rebuild_at = time.monotonic() + settings.revocation_rebuild_interval
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is not None:
+                            self.filter.add(message["data"])
+                        if time.monotonic() >= rebuild_at:
+                            await self._rebuild()
+                            rebuild_at = time.monotonic() + settings.revocation_rebuild_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Revocation listener failed, resubscribing: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    def start(self):
+        """
+        Starts loading and following the revocations, if not already running.
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops following the revocations.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stats(self):
+        return {"backend": self.name, "filter_entries": self.filter.count, "positives": self.positives,
+                "confirmed": self.confirmed}
+
+
+class LocalRevocationList:
+    """
+    Revoked JTIs kept in process memory, with the same filter-first lookup as `RedisRevocationList`.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self.revoked = {}  # jti -> expires_at
+        self.filter = new_filter()
+        self.positives = 0
+        self.confirmed = 0
+
+    async def revoke(self, jti, expires_at):
+        self.revoked[jti] = expires_at
+        self.filter.add(jti)
+
+    async def is_revoked(self, jti):
+        if jti not in self.filter:
+            return False
+        self.positives += 1
+        expires_at = self.revoked.get(jti)
+        revoked = expires_at is not None and time.time() < expires_at
+        self.confirmed += revoked
+        return revoked
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def stats(self):
+        return {"backend": self.name, "filter_entries": self.filter.count, "positives": self.positives,
+                "confirmed": self.confirmed}
+
+
+def create_revocation_list():
+    """
+    Creates the revocation list on the backend selected by `settings.store_backend` ("redis" or "local").
+    """
+    if settings.store_backend == "local":
+        return LocalRevocationList()
+    return RedisRevocationList(settings.redis_url)
+
+
+revoked = create_revocation_list()
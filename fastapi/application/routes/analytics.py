@@ -0,0 +1,155 @@
+from fastapi import Depends, status, APIRouter, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
+from typing import Optional
+from .. import oauth
+from ..database import get_async_db
+from ..analytics import spend_by_type_query, spend_series_query
+
+# Constants
+DEFAULT_RANGE_DAYS = 30
+
+# Set up router with a specific prefix for related endpoints
+router = APIRouter(
+    prefix="/post",
+    tags=["Analytics"],  # Assign this router to a specific documentation category
+)
+
+
+def _date_range(date_from, date_to):
+    """
+    Resolves the requested date range, defaulting to the last `DEFAULT_RANGE_DAYS` days.
+
+    Raises:
+        HTTPException: 400 if the range ends before it starts.
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The start of the range must not be after its end."
+        )
+    return date_from, date_to
+
+
+def _totals(row):
+    return {"transaction_count": int(row.transaction_count), "total_amount": float(row.total_amount)}
+
+
+@router.get(
+    "/analytics/spend",
+    status_code=status.HTTP_200_OK,
+    summary="Spend per transaction type",
+    description="Returns the user's number of postings and amount spent per transaction type over a date range."
+)
+async def get_spend(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    account: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(oauth.get_current_user)
+):
+    """
+    Retrieve the user's spend per transaction type.
+
+    Answered from the daily spend rollups, so the cost depends on the number of days in the range rather than the
+    number of transactions.
+
+    Args:
+        date_from (date): First day of the range (`from` query parameter); defaults to 30 days ago.
+        date_to (date): Last day of the range, inclusive (`to` query parameter); defaults to today.
+        account (str): Only postings from this account.
+        transaction_type (str): Only postings of this type.
+        db (AsyncSession): The database session.
+        current_user (str): The currently authenticated user.
+
+    Returns:
+        dict: The range, the overall count and amount, and the count and amount per transaction type.
+
+    Raises:
+        HTTPException: 400 if the range ends before it starts.
+    """
+    date_from, date_to = _date_range(date_from, date_to)
+    rows = (await db.execute(
+        spend_by_type_query(current_user.customer_no, date_from, date_to, account, transaction_type)
+    )).all()
+    by_type = [{"transaction_type": row.transaction_type, **_totals(row)} for row in rows]
+    return {
+        "from": date_from,
+        "to": date_to,
+        "transaction_count": sum(entry["transaction_count"] for entry in by_type),
+        "total_amount": sum(entry["total_amount"] for entry in by_type),
+        "by_type": by_type,
+    }
+
+
+@router.get(
+    "/analytics/spend/daily",
+    status_code=status.HTTP_200_OK,
+    summary="Daily spend",
+    description="Returns the user's number of postings and amount spent per day over a date range."
+)
+async def get_daily_spend(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    account: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(oauth.get_current_user)
+):
+    """
+    Retrieve the user's spend per day. Days without postings are omitted.
+
+    Args:
+        date_from (date): First day of the range (`from` query parameter); defaults to 30 days ago.
+        date_to (date): Last day of the range, inclusive (`to` query parameter); defaults to today.
+        account (str): Only postings from this account.
+        transaction_type (str): Only postings of this type.
+        db (AsyncSession): The database session.
+        current_user (str): The currently authenticated user.
+
+    Returns:
+        list[dict]: The day, count and amount of every day with postings, oldest first.
+    """
+    date_from, date_to = _date_range(date_from, date_to)
+    rows = (await db.execute(
+        spend_series_query(current_user.customer_no, date_from, date_to, "day", account, transaction_type)
+    )).all()
+    return [{"day": row.day, **_totals(row)} for row in rows]
+
+
+@router.get(
+    "/analytics/spend/monthly",
+    status_code=status.HTTP_200_OK,
+    summary="Monthly spend",
+    description="Returns the user's number of postings and amount spent per month over a date range."
+)
+async def get_monthly_spend(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    account: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(oauth.get_current_user)
+):
+    """
+    Retrieve the user's spend per calendar month. Months without postings are omitted.
+
+    Args:
+        date_from (date): First day of the range (`from` query parameter); defaults to 30 days ago.
+        date_to (date): Last day of the range, inclusive (`to` query parameter); defaults to today.
+        account (str): Only postings from this account.
+        transaction_type (str): Only postings of this type.
+        db (AsyncSession): The database session.
+        current_user (str): The currently authenticated user.
+
+    Returns:
+        list[dict]: The month ("YYYY-MM"), count and amount of every month with postings, oldest first.
+    """
+    date_from, date_to = _date_range(date_from, date_to)
+    rows = (await db.execute(
+        spend_series_query(current_user.customer_no, date_from, date_to, "month", account, transaction_type)
+    )).all()
+    return [{"month": f"{int(row.year):04d}-{int(row.month):02d}", **_totals(row)} for row in rows]
@@ -1,15 +1,18 @@
 from fastapi import Depends, status, APIRouter, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from uuid import uuid4
 from typing import List
 from dateutil.relativedelta import relativedelta
 import logging
 
-from .. import oauth
+from .. import oauth, cache, ownership
 from ..models.cards import BaseCards, DebitCards, CreditCards, PrepaidCards
 from ..models.accounts import PersonalAccounts
-from ..database import get_db
+from ..database import get_db, get_async_db
+from ..postings import resolve_account, debit_account, record_movement, with_deadlock_retry
+from ..refs import async_next_ref
 from ..schema import cards
 
 # Set up the logger
@@ -193,9 +196,9 @@ def apply_credit_card(
         "It debits the specified account for the card's initial balance and associates the card with the user."
     ),
 )
-def apply_prepaid_card(
+async def apply_prepaid_card(
     new_card: cards.CardApplication,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user),
 ):
     """
@@ -204,54 +207,49 @@ def apply_prepaid_card(
     This endpoint creates a prepaid card application for an authenticated user. It generates a unique card number,
     deducts the initial balance from the specified account, and saves the card details to the database.
 
+    The account is debited with a conditional `UPDATE`, so the balance check cannot race with concurrent postings,
+    and the debit, its journal legs and the card are committed together, retried on deadlocks.
+
     Args:
         new_card (cards.CardApplication): The payload containing prepaid card application details,
             including account number and initial balance.
-        db (Session): The database session for executing queries.
+        db (AsyncSession): The database session for executing queries.
         current_user (str): The authenticated user making the request.
 
     Returns:
         cards.CardApplicationResponse: The details of the successfully created prepaid card.
 
     Raises:
-        HTTPException: If the account is invalid, insufficient funds are available, 
+        HTTPException: If the account is invalid or not the user's, insufficient funds are available,
         or an error occurs during processing.
     """
     logger.info("Initiating prepaid card application process...")
+    account_no = new_card.payload.pop('account_number')  # Not a card column
+    amount = new_card.payload['balance']
+    await ownership.authorize(db, current_user.customer_no, account_no)
+
+    async def apply():
+        # Step 1: Fetch and validate the account
+        account_to_debit = await resolve_account(db, account_no, [PersonalAccounts])
+        if not account_to_debit:
+            logger.error("Account not found for account number: %s", account_no)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Account not found for the specified account number.",
+            )
 
-    # Step 1: Fetch and validate the account
-    account_to_debit = db.query(PersonalAccounts).filter(
-        PersonalAccounts.account_no == new_card.payload['account_number']
-    ).first()
-
-    if not account_to_debit:
-        logger.error("Account not found for account number: %s", new_card.payload['account_number'])
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found for the specified account number.",
-        )
-
-    if account_to_debit.account_balance < new_card.payload['balance']:
-        logger.error(
-            "Insufficient funds for account number: %s, Requested: %s, Available: %s",
-            new_card.payload['account_number'],
-            new_card.payload['balance'],
-            account_to_debit.account_balance,
-        )
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Insufficient funds in the specified account.",
-        )
-
-    # Step 2: Deduct balance
-    account_to_debit.account_balance -= new_card.payload['balance']
+        # Step 2: Deduct balance, provided it covers the card's initial balance
+        ref_no = await async_next_ref()
+        if not await debit_account(db, account_to_debit, amount):
+            logger.error("Insufficient funds for account number: %s, Requested: %s", account_no, amount)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient funds in the specified account.",
+            )
 
-    # Step 3: Generate and create the prepaid card
-    try:
+        # Step 3: Generate and create the prepaid card
         card_no = BaseCards.generate_card_no()
         logger.debug(f"Generated card number: {card_no}")
-
-        del new_card.payload['account_number']  # Remove account number from payload as it's no longer needed
         prepaid_card = PrepaidCards(
             card_no=card_no,
             date_issued=datetime.now(),
@@ -263,19 +261,31 @@ def apply_prepaid_card(
         )
 
         db.add(prepaid_card)
-        db.commit()
-        db.refresh(prepaid_card)
-
-        logger.info(f"Prepaid card application successfully created for user {current_user.customer_no}")
+        await record_movement(
+            db, ref_no, account_no, card_no, amount, "prepaid_card_load", current_user.customer_no,
+            "Prepaid card initial balance",
+        )
+        await db.commit()
+        await db.refresh(prepaid_card)
         return prepaid_card
+
+    try:
+        prepaid_card = await with_deadlock_retry(db, apply)
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Failed to process prepaid card application for user {current_user.customer_no}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process prepaid card application. Please try again later.",
         )
 
+    await cache.customers.invalidate(current_user.customer_no)
+    logger.info(f"Prepaid card application successfully created for user {current_user.customer_no}")
+    return prepaid_card
+
 
 @router.get(
     "/get_user_debit_cards",
@@ -6,7 +6,7 @@ database transactions, and exception handling.
 
 Modules and Dependencies:
 - **FastAPI Components**: Includes router, Depends, status codes, and HTTP exception handling.
-- **SQLAlchemy**: For ORM-based database transactions and session management.
+- **SQLAlchemy**: For ORM-based database transactions and async session management.
 - **Utilities**: Utility functions such as `save_prof` for additional operations.
 - **Models and Schemas**: Defines ORM models and Pydantic schemas for loan applications and responses.
 
@@ -15,7 +15,7 @@ Classes:
 
 Functions:
     apply_personal_loan(new_loan: loans.PersonalLoanApplication, 
-                        db: Session = Depends(get_db), 
+                        db: AsyncSession = Depends(get_async_db), 
                         current_user: str = Depends(oauth.get_current_user))
         Endpoint to create a personal loan application.
 
@@ -29,12 +29,13 @@ Modules Imported:
 """
 
 from fastapi import Depends, status, APIRouter, HTTPException, File, Form, UploadFile
-from .. import oauth
+from .. import oauth, cache, ownership
 from typing import List
 from dateutil.relativedelta import relativedelta
 from datetime import datetime
-from ..database import get_db
-from sqlalchemy.orm import Session
+from ..database import get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.loans import PersonalLoans, BusinessLoans, Mortgages
 from uuid import uuid4
 from ..models.files import LoanDocs, MortgageDocs
@@ -54,9 +55,9 @@ logger = logging.getLogger(__name__)
 @router.post("/apply_personal_loan", 
              status_code=status.HTTP_201_CREATED, 
              response_model=loans.LoanSummary)
-def apply_personal_loan(
+async def apply_personal_loan(
     new_loan: loans.PersonalLoanApplication, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -67,7 +68,7 @@ def apply_personal_loan(
 
     Args:
         new_loan (loans.PersonalLoanApplication): Pydantic schema containing the payload for loan details such as amount and payback period.
-        db (Session): Database session provided by FastAPI dependency injection.
+        db (AsyncSession): Database session provided by FastAPI dependency injection.
         current_user (str): The authenticated user's identifier, provided by the OAuth dependency.
 
     Returns:
@@ -92,13 +93,15 @@ def apply_personal_loan(
         )
         # Add loan to the database session and commit
         db.add(loan)
-        db.commit()
-        db.refresh(loan)
+        await db.commit()
+        await db.refresh(loan)
+        await cache.customers.invalidate(current_user.customer_no)  # The loan account is now owned
+        await ownership.index.add(current_user.customer_no, loan.account_no)
         return loan
 
     except Exception as e:
         logger.error(f"Error during loan creation for user {current_user.customer_no}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
@@ -120,7 +123,7 @@ async def apply_business_loan(
     reg_cert: UploadFile = File(...),
     crb: UploadFile = File(...),
     operational_docs: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -133,7 +136,7 @@ async def apply_business_loan(
         reg_cert (UploadFile): Upload file containing the business registration certificate.
         crb (UploadFile): Upload file containing the CRB listing.
         operational_docs (UploadFile): Upload file containing operational documents.
-        db (Session): The database session for transaction management.
+        db (AsyncSession): The database session for transaction management.
         current_user (str): The authenticated user's identifier.
 
     Returns:
@@ -159,7 +162,7 @@ async def apply_mortgage(
     crb: UploadFile = File(...),
     down_payment: UploadFile = File(...),
     purchase_agreement: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -173,7 +176,7 @@ async def apply_mortgage(
         crb (UploadFile): Upload file containing the CRB listing.
         down_payment (UploadFile): Upload file containing the proof of down payment.
         purchase_agreement (UploadFile): Upload file containing the purchase agreement.
-        db (Session): The database session for transaction management.
+        db (AsyncSession): The database session for transaction management.
         current_user (str): The authenticated user's identifier.
 
     Returns:
@@ -214,8 +217,10 @@ async def apply_mortgage(
 
     try:
         db.add_all([taxcertificate, down_payment_cert, purchase_agreement_cert, mortgage, crb_listing, pay_slip_cert])
-        db.commit()
-        db.refresh(mortgage)
+        await db.commit()
+        await db.refresh(mortgage)
+        await cache.customers.invalidate(current_user.customer_no)  # The mortgage account is now owned
+        await ownership.index.add(current_user.customer_no, mortgage.account_no)
         logger.info(f"Account created successfully for user {current_user.customer_no}.")
         return mortgage
     except Exception as e:
@@ -230,8 +235,8 @@ async def apply_mortgage(
     status_code=status.HTTP_200_OK, 
     response_model=List[loans.LoanSummary1]
 )
-def get_user_loans(
-    db: Session = Depends(get_db), 
+async def get_user_loans(
+    db: AsyncSession = Depends(get_async_db), 
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -241,18 +246,22 @@ def get_user_loans(
     with the currently authenticated user.
 
     Args:
-        db (Session): The database session used for queries.
+        db (AsyncSession): The database session used for queries.
         current_user (str): The currently authenticated user.
 
     Returns:
         List[loans.LoanSummary]: A list of current and savings accounts owned by the user.
     """
-    personal_loans = db.query(PersonalLoans).filter(
-        PersonalLoans.owner_customer_no == current_user.customer_no,
-    ).all()
-    business_loans = db.query(BusinessLoans).filter(
-        BusinessLoans.owner_customer_no == current_user.customer_no
-    ).all()
+    personal_loans = (await db.scalars(
+        select(PersonalLoans).where(
+            PersonalLoans.owner_customer_no == current_user.customer_no,
+        )
+    )).all()
+    business_loans = (await db.scalars(
+        select(BusinessLoans).where(
+            BusinessLoans.owner_customer_no == current_user.customer_no
+        )
+    )).all()
 
     accounts = personal_loans + business_loans
     for account in accounts:
@@ -267,18 +276,22 @@ def get_user_loans(
     status_code=status.HTTP_200_OK,
     response_model=List[loans.ResponseLoan]
 )
-def get_user_transactive_loans(
-    db: Session = Depends(get_db),
+async def get_user_transactive_loans(
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
-    personal_loan_accounts = db.query(PersonalLoans).filter(
-        PersonalLoans.owner_customer_no == current_user.customer_no,
-        PersonalLoans.account_status == "in-review"
-    ).all()
-    business_loan_accounts = db.query(BusinessLoans).filter(
-        BusinessLoans.owner_customer_no == current_user.customer_no,
-        BusinessLoans.account_status == "in-review"
-    ).all()
+    personal_loan_accounts = (await db.scalars(
+        select(PersonalLoans).where(
+            PersonalLoans.owner_customer_no == current_user.customer_no,
+            PersonalLoans.account_status == "in-review"
+        )
+    )).all()
+    business_loan_accounts = (await db.scalars(
+        select(BusinessLoans).where(
+            BusinessLoans.owner_customer_no == current_user.customer_no,
+            BusinessLoans.account_status == "in-review"
+        )
+    )).all()
     accounts = personal_loan_accounts + business_loan_accounts
     for account in accounts:
         account.account_balance = account.disposable_amount
@@ -0,0 +1,56 @@
+from fastapi import Depends, status, APIRouter, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
+from ..hot_accounts import balance_query
+from ..principals import get_current_principal
+from ..schema import users
+
+# Set up router with a specific prefix for related endpoints
+router = APIRouter(
+    prefix="/post",
+    tags=["Merchant Accounts"],  # Assign this router to a specific documentation category
+)
+
+
+@router.get(
+    "/hot_accounts/{account_no}/balance",
+    status_code=status.HTTP_200_OK,
+    summary="Balance of a hot merchant or biller account",
+    description="Returns the true balance of an account in hot-account mode: its folded balance plus the sum of "
+                "its balance slots."
+)
+async def get_hot_account_balance(
+    account_no: str,
+    db: AsyncSession = Depends(get_async_db),
+    principal: users.Principal = Depends(get_current_principal)
+):
+    """
+    Retrieve the balance of a hot account.
+
+    Only the customer who owns the account can read its balance.
+
+    Args:
+        account_no (str): The till, paybill or account number.
+        db (AsyncSession): The database session.
+        principal (users.Principal): The authenticated customer and the accounts they own.
+
+    Returns:
+        dict: The account number, its balance, its number of slots and the time of its last fold.
+
+    Raises:
+        HTTPException:
+            - 403: If the account does not belong to the user.
+            - 404: If the account is not a hot account.
+    """
+    if not principal.owns(account_no):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The account does not belong to the user."
+        )
+    row = (await db.execute(balance_query(account_no))).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hot account does not exist."
+        )
+    return {"account_no": account_no, "balance": row.balance, "slots": row.slots, "folded_at": row.folded_at}
@@ -0,0 +1,62 @@
+from fastapi import status, APIRouter
+from .. import cache, oauth, revocation, ownership
+
+# Set up router with a specific prefix for related endpoints
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],  # Assign this router to a specific documentation category
+)
+
+
+@router.get(
+    "/cache",
+    status_code=status.HTTP_200_OK,
+    summary="Customer cache metrics",
+    description="Reports hits, misses, invalidations and evictions of the customer balance and history cache."
+)
+async def cache_metrics():
+    """
+    Returns the customer cache metrics.
+
+    Hit, miss and invalidation counts are those of the API worker serving the request; evictions and
+    expirations come from the cache backend (the Redis server, or this worker's in-process LRU).
+
+    Returns:
+        dict: The metrics reported by `cache.CustomerCache.stats`.
+    """
+    return await cache.customers.stats()
+
+
+@router.get(
+    "/tokens",
+    status_code=status.HTTP_200_OK,
+    summary="Verified-token cache metrics",
+    description="Reports hits, misses, evictions, expirations and revocations of the verified-token cache, and "
+                "Bloom filter lookups of the revoked-token list."
+)
+async def token_metrics():
+    """
+    Returns the verified-token cache and revoked-token list metrics of the API worker serving the request.
+
+    Returns:
+        dict: The metrics reported by `oauth.TokenCache.stats`, with the revoked JTIs in the local filter, the
+              filter positives and the positives confirmed as revoked under `revocation`.
+    """
+    return {**oauth.verified_tokens.stats(), "revocation": await revocation.revoked.stats()}
+
+
+@router.get(
+    "/ownership",
+    status_code=status.HTTP_200_OK,
+    summary="Account ownership index metrics",
+    description="Reports how ownership checks were answered: from the local LRU, from Redis, or by a backfill."
+)
+async def ownership_metrics():
+    """
+    Returns the account ownership index metrics of the API worker serving the request.
+
+    Returns:
+        dict: Local hits, Redis lookups, backfills from the account directory, and the size and evictions of the
+              local LRU.
+    """
+    return ownership.index.stats()
@@ -1,12 +1,15 @@
 from fastapi import Depends, status, APIRouter, HTTPException, File, Form, UploadFile
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import uuid4
 import logging
 from sqlalchemy.exc import IntegrityError
-from ..schema import accounts
-from .. import oauth
-from ..database import get_db
+from ..schema import accounts, users
+from .. import oauth, cache, ownership
+from ..database import get_async_db
+from ..postings import resolve_account
+from ..principals import get_current_principal
 from ..models.accounts import PersonalAccounts, ForeignCurrency, CorporateAccounts
 from typing import List
 from ..models.files import CorporateDocs, PersonalDocs, F_C_A_Docs
@@ -36,7 +39,7 @@ async def create_personal_account(
     tax_cert: UploadFile = File(...),
     reg_cert: UploadFile = File(...),
     passport: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -48,7 +51,7 @@ async def create_personal_account(
 
     Args:
         new_account (accounts.Account): The account details provided by the user.
-        db (Session): The database session used for database operations.
+        db (AsyncSession): The database session used for database operations.
         current_user (str): The current authenticated user making the request.
 
     Returns:
@@ -70,10 +73,12 @@ async def create_personal_account(
             detail=f"Invalid account type. Allowed types are: {', '.join(valid_account_types)}."
         )
 
-    existing_account = db.query(PersonalAccounts).filter(
-        PersonalAccounts.owner_customer_no == current_user.customer_no,
-        PersonalAccounts.account_type == parsed_payload.account_type
-    ).first()
+    existing_account = (await db.scalars(
+        select(PersonalAccounts).where(
+            PersonalAccounts.owner_customer_no == current_user.customer_no,
+            PersonalAccounts.account_type == parsed_payload.account_type
+        )
+    )).first()
     if existing_account:
         if existing_account.account_name == parsed_payload.account_name:
             logger.info(f"Account creation conflict for user {current_user.customer_no}.")
@@ -104,8 +109,10 @@ async def create_personal_account(
 
     try:
         db.add_all([taxcertificate, bus_registration, passport, account])
-        db.commit()
-        db.refresh(account)
+        await db.commit()
+        await db.refresh(account)
+        await cache.customers.invalidate(current_user.customer_no)
+        await ownership.index.add(current_user.customer_no, account.account_no)
         logger.info(f"Account created successfully for user {current_user.customer_no}.")
         return account
     except Exception as e:
@@ -133,7 +140,7 @@ async def create_foreign_currency_account(
     reg_cert: UploadFile = File(...),
     passport: UploadFile = File(...),
     salary_slip: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -144,7 +151,7 @@ async def create_foreign_currency_account(
 
     Args:
         new_account (accounts.Account): The details of the account to be created.
-        db (Session): The database session used for performing database operations.
+        db (AsyncSession): The database session used for performing database operations.
         current_user (str): The authenticated user making the request.
 
     Returns:
@@ -168,10 +175,12 @@ async def create_foreign_currency_account(
             detail=f"Invalid account type. Allowed types are: {', '.join(valid_account_types)}."
         )
 
-    existing_account = db.query(ForeignCurrency).filter(
-        ForeignCurrency.owner_customer_no == current_user.customer_no,
-        ForeignCurrency.account_type == parsed_payload.account_type
-    ).first()
+    existing_account = (await db.scalars(
+        select(ForeignCurrency).where(
+            ForeignCurrency.owner_customer_no == current_user.customer_no,
+            ForeignCurrency.account_type == parsed_payload.account_type
+        )
+    )).first()
     if existing_account:
         if existing_account.account_name == parsed_payload.account_name:
             logger.info(f"Account creation conflict for user {current_user.customer_no}.")
@@ -203,8 +212,10 @@ async def create_foreign_currency_account(
     salaryslip = F_C_A_Docs(name=salary_slip_filename, doc_type="salary-slip", foreign_currency_account=account)
     try:
         db.add_all([utility_receipt, bus_registration, pass_port, account, salaryslip])
-        db.commit()
-        db.refresh(account)
+        await db.commit()
+        await db.refresh(account)
+        await cache.customers.invalidate(current_user.customer_no)
+        await ownership.index.add(current_user.customer_no, account.account_no)
         logger.info(f"Account created successfully for user {current_user.customer_no}.")
         return account
     except Exception as e:
@@ -224,7 +235,7 @@ async def create_corporate_account(
     tax_cert: UploadFile = File(...),
     reg_cert: UploadFile = File(...),
     passport: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     parsed_payload = accounts.CorporateAccount(**json.loads(payload))
@@ -259,8 +270,10 @@ async def create_corporate_account(
 
     try:
         db.add_all([taxcertificate, bus_registration, passport, account])
-        db.commit()
-        db.refresh(account)
+        await db.commit()
+        await db.refresh(account)
+        await cache.customers.invalidate(current_user.customer_no)
+        await ownership.index.add(current_user.customer_no, account.account_no)
         logger.info(f"Account created successfully for user {current_user.customer_no}.")
         return account
     except Exception as e:
@@ -275,31 +288,39 @@ async def create_corporate_account(
     status_code=status.HTTP_200_OK, 
     response_model=List[accounts.ResponseAccount2]
 )
-def get_user_accounts(
-    db: Session = Depends(get_db), 
+async def get_user_accounts(
+    db: AsyncSession = Depends(get_async_db), 
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
     Retrieve all user personal accounts.
 
-    This endpoint fetches all accounts associated with the currently authenticated user.
+    This endpoint fetches all accounts associated with the currently authenticated user. The formatted list is
+    served from the customer cache, which is invalidated whenever one of the user's accounts changes.
 
     Args:
-        db (Session): The database session used for queries.
+        db (AsyncSession): The database session used for queries.
         current_user (str): The currently authenticated user.
 
     Returns:
         List[accounts.ResponseAccount1]: A list of accounts owned by the user.
     """
 
-    accounts = db.query(PersonalAccounts).filter(
-        PersonalAccounts.owner_customer_no == current_user.customer_no,
-        PersonalAccounts.account_status == "pending"
-    ).all()
-    for account in accounts:
-        account.truncate_uuid()
-        account.format_cash()
-    return accounts
+    async def load():
+        rows = (await db.scalars(
+            select(PersonalAccounts).where(
+                PersonalAccounts.owner_customer_no == current_user.customer_no,
+                PersonalAccounts.account_status == "pending"
+            )
+        )).all()
+        for account in rows:
+            account.truncate_uuid()
+            account.format_cash()
+        return [
+            accounts.ResponseAccount2.model_validate(account, from_attributes=True).model_dump() for account in rows
+        ]
+
+    return await cache.customers.get_or_load(current_user.customer_no, "personal_accounts", load)
 
 
 @router.get(
@@ -307,8 +328,8 @@ def get_user_accounts(
     status_code=status.HTTP_200_OK,
     response_model=List[accounts.ResponseAccount1]
 )
-def get_user_transactive_accounts(
-    db: Session = Depends(get_db),
+async def get_user_transactive_accounts(
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -319,7 +340,7 @@ def get_user_transactive_accounts(
     - **Response Model**: List[accounts.ResponseAccount1]
 
     ### Parameters:
-    - `db` (Session): The database session dependency.
+    - `db` (AsyncSession): The database session dependency.
     - `current_user` (str): The currently authenticated user, resolved using OAuth.
 
     ### Functionality:
@@ -331,14 +352,18 @@ def get_user_transactive_accounts(
     ### Returns:
     - A list of transactive accounts (personal and corporate).
     """
-    personal_accounts = db.query(PersonalAccounts).filter(
-        PersonalAccounts.owner_customer_no == current_user.customer_no,
-        PersonalAccounts.account_status == "pending"
-    ).all()
-    corporate_accounts = db.query(CorporateAccounts).filter(
-        CorporateAccounts.owner_customer_no == current_user.customer_no,
-        CorporateAccounts.account_status == "pending"
-    ).all()
+    personal_accounts = (await db.scalars(
+        select(PersonalAccounts).where(
+            PersonalAccounts.owner_customer_no == current_user.customer_no,
+            PersonalAccounts.account_status == "pending"
+        )
+    )).all()
+    corporate_accounts = (await db.scalars(
+        select(CorporateAccounts).where(
+            CorporateAccounts.owner_customer_no == current_user.customer_no,
+            CorporateAccounts.account_status == "pending"
+        )
+    )).all()
     accounts = personal_accounts + corporate_accounts
     return accounts
 
@@ -348,8 +373,8 @@ def get_user_transactive_accounts(
     status_code=status.HTTP_200_OK,
     response_model=List[accounts.ResponseAccount2]
 )
-def get_user_savings_accounts(
-    db: Session = Depends(get_db),
+async def get_user_savings_accounts(
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -360,7 +385,7 @@ def get_user_savings_accounts(
     - **Response Model**: List[accounts.ResponseAccount2]
 
     ### Parameters:
-    - `db` (Session): The database session dependency.
+    - `db` (AsyncSession): The database session dependency.
     - `current_user` (str): The currently authenticated user, resolved using OAuth.
 
     ### Functionality:
@@ -375,11 +400,13 @@ def get_user_savings_accounts(
     ### Returns:
     - A list of personal savings accounts.
     """
-    accounts = db.query(PersonalAccounts).filter(
-        PersonalAccounts.owner_customer_no == current_user.customer_no,
-        PersonalAccounts.account_type == "Savings Account",
-        PersonalAccounts.account_status == "pending"
-    ).all()
+    accounts = (await db.scalars(
+        select(PersonalAccounts).where(
+            PersonalAccounts.owner_customer_no == current_user.customer_no,
+            PersonalAccounts.account_type == "Savings Account",
+            PersonalAccounts.account_status == "pending"
+        )
+    )).all()
     for account in accounts:
         account.truncate_uuid()
         account.format_cash()
@@ -391,8 +418,8 @@ def get_user_savings_accounts(
     status_code=status.HTTP_200_OK,
     response_model=List[accounts.ResponseAccount2]
 )
-def get_user_current_accounts(
-    db: Session = Depends(get_db),
+async def get_user_current_accounts(
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -403,7 +430,7 @@ def get_user_current_accounts(
     - **Response Model**: List[accounts.ResponseAccount2]
 
     ### Parameters:
-    - `db` (Session): The database session dependency.
+    - `db` (AsyncSession): The database session dependency.
     - `current_user` (str): The currently authenticated user, resolved using OAuth.
 
     ### Functionality:
@@ -420,15 +447,19 @@ def get_user_current_accounts(
     ### Returns:
     - A list of personal and corporate current accounts.
     """
-    personal_accounts = db.query(PersonalAccounts).filter(
-        PersonalAccounts.owner_customer_no == current_user.customer_no,
-        PersonalAccounts.account_type != "Savings Account",
-        PersonalAccounts.account_status == "pending"
-    ).all()
-    corporate_accounts = db.query(CorporateAccounts).filter(
-        CorporateAccounts.owner_customer_no == current_user.customer_no,
-        CorporateAccounts.account_status == "pending"
-    ).all()
+    personal_accounts = (await db.scalars(
+        select(PersonalAccounts).where(
+            PersonalAccounts.owner_customer_no == current_user.customer_no,
+            PersonalAccounts.account_type != "Savings Account",
+            PersonalAccounts.account_status == "pending"
+        )
+    )).all()
+    corporate_accounts = (await db.scalars(
+        select(CorporateAccounts).where(
+            CorporateAccounts.owner_customer_no == current_user.customer_no,
+            CorporateAccounts.account_status == "pending"
+        )
+    )).all()
 
     accounts = personal_accounts + corporate_accounts
     for account in accounts:
@@ -439,10 +470,10 @@ def get_user_current_accounts(
 
 
 @router.post("/close_account/{account_no}")
-def close_account(
+async def close_account(
     account_no: str, 
-    db: Session = Depends(get_db), 
-    current_user: str = Depends(oauth.get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    principal: users.Principal = Depends(get_current_principal)
 ):
     """
     Close a user's account.
@@ -452,11 +483,12 @@ def close_account(
 
     ### Parameters:
     - `account_no` (str): The unique account number of the account to be closed.
-    - `db` (Session): The database session dependency.
-    - `current_user` (str): The currently authenticated user, resolved using OAuth.
+    - `db` (AsyncSession): The database session dependency.
+    - `principal` (Principal): The currently authenticated user and the accounts they own.
 
     ### Functionality:
-    - Searches for the account in multiple account CLASSES (`CLASSES`).
+    - Rejects accounts the user does not own, without a database lookup.
+    - Resolves the account through the account directory, restricted to `CLASSES`.
     - If the account exists:
         - Marks the account's status as "closed".
         - Commits the changes to the database.
@@ -472,11 +504,8 @@ def close_account(
     ### Raises:
     - `HTTPException`: For account not found, database errors, or unexpected issues.
     """
-    account = None  # Ensure `account` is defined even if no account is found
-    for clss in CLASSES:
-        account = db.query(clss).filter(clss.account_no == account_no).first()
-        if account:
-            break
+    # Accounts of other customers are reported as missing, so their existence is not disclosed
+    account = await resolve_account(db, account_no, CLASSES) if principal.owns(account_no) else None
 
     try:
         # Check if the account was found
@@ -495,15 +524,20 @@ def close_account(
 
         # Close the account
         account.account_status = "closed"
-        db.commit()
+        await db.commit()
+        await cache.customers.invalidate(principal.customer_no)
 
         # Log the successful operation
         logger.info(f"Account {account.account_no} closed successfully.")
         return {"detail": "Account Closed"}
 
+    except HTTPException:
+        # Keep the 404 for missing (or other customers') accounts
+        raise
+
     except IntegrityError:
         # Handle database integrity issues
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error occurred while closing the account."
@@ -511,7 +545,7 @@ def close_account(
 
     except Exception as e:
         # Handle unexpected exceptions
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
@@ -1,13 +1,16 @@
 from fastapi import Depends, status, APIRouter, HTTPException
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
-from .. import oauth
+from .. import oauth, cache, ownership
 from typing import List
 from dateutil.relativedelta import relativedelta
 from ..models.term_deposits import TermDeposit
 from datetime import datetime
 from ..schema import term_deposits
-from ..database import get_db
-from sqlalchemy.orm import Session
+from ..database import get_async_db
+from ..postings import resolve_account, debit_account, credit_account, record_movement, with_deadlock_retry
+from ..refs import async_next_ref
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.accounts import PersonalAccounts, CorporateAccounts
 from uuid import uuid4
 
@@ -22,104 +25,121 @@ router = APIRouter(
 
 # POST endpoint to book a term deposit
 @router.post("/book_td", status_code=status.HTTP_201_CREATED, response_model=term_deposits.TDSummary)
-def book_td(
+async def book_td(
     new_request: term_deposits.BookTD,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
     Books a new term deposit for the user.
 
-    - Verifies that the provided account exists and has sufficient funds.
+    - Verifies that the provided account belongs to the user, exists and has sufficient funds.
     - Creates a new TermDeposit entry in the database.
-    - Deducts the deposit amount from the account balance.
+    - Deducts the deposit amount from the account balance and journals the movement in the same transaction.
 
     Args:
         new_request (term_deposits.BookTD): Request body containing the details for booking the term deposit.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         current_user (str): Currently authenticated user.
 
     Returns:
         term_deposits.TDSummary: The created term deposit summary.
+
+    Raises:
+        HTTPException: 403 if the account does not belong to the user.
     """
-    # Attempt to find the account associated with the deposit
-    account = None
-    for clss in CLASSES:
-        account = db.query(clss).filter(clss.account_no == new_request.payload['account']).first()
-        if account:
-            break
+    if new_request.payload['amount'] <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Transaction amount must be greater than zero."
+        )
+    await ownership.authorize(db, current_user.customer_no, new_request.payload['account'])
 
-    try:
-        # Validate account existence and other conditions
+    async def book():
+        # Attempt to find the account associated with the deposit
+        account = await resolve_account(db, new_request.payload['account'], CLASSES)
         if not account:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Account does not exist."
             )
-        if new_request.payload['amount'] <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Transaction amount must be greater than zero."
-            )
-        if account.account_balance < new_request.payload['amount']:
+
+        # Deduct the amount from the account balance, provided it covers the deposit
+        ref_no = await async_next_ref()
+        if not await debit_account(db, account, new_request.payload['amount']):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient funds in the account."
             )
 
-        # Create the TermDeposit object and update the account balance
+        # Create the TermDeposit object
         maturity_date = datetime.now() + relativedelta(months=new_request.payload['maturity_period'])
         term_deposit = TermDeposit(
             owner_customer_no=current_user.customer_no,
-            account_no=uuid4(),  # Generate a unique account number for the term deposit
+            account_no=str(uuid4()),  # Generate a unique account number for the term deposit
             maturity_date=maturity_date,
             accumulated_value=new_request.payload['amount'],
-            id=uuid4(),  # Generate a unique ID for the term deposit
+            id=str(uuid4()),  # Generate a unique ID for the term deposit
             **new_request.payload
         )
-        account.account_balance -= new_request.payload['amount']  # Deduct the amount from the account balance
 
-        # Save the term deposit and commit the transaction
+        # Save the term deposit, journal the movement and commit the transaction
         db.add(term_deposit)
-        db.commit()
-        db.refresh(term_deposit)
-
+        await record_movement(
+            db, ref_no, term_deposit.account, term_deposit.account_no, term_deposit.amount, "td_booking",
+            current_user.customer_no, "Term deposit booking",
+        )
+        await db.commit()
+        await db.refresh(term_deposit)
         return term_deposit
 
+    try:
+        term_deposit = await with_deadlock_retry(db, book)
+
+    except HTTPException:
+        await db.rollback()
+        raise
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="A database error occurred while processing your request."
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+    # The deposit is booked; recording it must not turn the response into an error
+    await cache.customers.invalidate(current_user.customer_no)
+    await ownership.index.add(current_user.customer_no, str(term_deposit.account_no))
+    return term_deposit
+
 # GET endpoint to fetch the user's active term deposits
 @router.get("/get_user_term_deposits", status_code=status.HTTP_200_OK, response_model=List[term_deposits.ChildTDSummary])
-def get_user_tds(
-    db: Session = Depends(get_db),
+async def get_user_tds(
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
     Retrieves a list of active term deposits for the currently authenticated user.
 
     Args:
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         current_user (str): Currently authenticated user.
 
     Returns:
         List[term_deposits.ChildTDSummary]: List of active term deposit summaries.
     """
     # Query active term deposits for the user
-    term_deposits = db.query(TermDeposit).filter(
-        TermDeposit.owner_customer_no == current_user.customer_no,
-        TermDeposit.status == "active"
-    ).all()
+    term_deposits = (await db.scalars(
+        select(TermDeposit).where(
+            TermDeposit.owner_customer_no == current_user.customer_no,
+            TermDeposit.status == "active"
+        )
+    )).all()
 
     # Process each term deposit (formatting, truncating, and calculating days remaining)
     for td in term_deposits:
@@ -131,29 +151,36 @@ def get_user_tds(
 
 # POST endpoint to liquidate a term deposit
 @router.post("/liquidate", status_code=status.HTTP_201_CREATED)
-def liquidate_td(
+async def liquidate_td(
     term_deposit: term_deposits.Liquidate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
     Liquidates an active term deposit, returning the principal amount to the associated account.
 
-    - Verifies that the term deposit exists and is active.
-    - Updates the associated account balance.
+    - Verifies that the term deposit belongs to the user, exists and is active.
+    - Updates the associated account balance and journals the movement in the same transaction.
     - Changes the term deposit status to "liquidated".
 
     Args:
         term_deposit (term_deposits.Liquidate): Request body containing the term deposit account number to be liquidated.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         current_user (str): Currently authenticated user.
 
     Returns:
         HTTPStatus: 201 if liquidation is successful.
+
+    Raises:
+        HTTPException: 403 if the term deposit does not belong to the user.
     """
-    try:
+    await ownership.authorize(db, current_user.customer_no, term_deposit.payload['account_no'])
+
+    async def liquidate():
         # Find the term deposit to liquidate
-        td = db.query(TermDeposit).filter(TermDeposit.account_no == term_deposit.payload['account_no']).first()
+        td = (await db.scalars(
+            select(TermDeposit).where(TermDeposit.account_no == term_deposit.payload['account_no'])
+        )).first()
         if not td:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -161,26 +188,46 @@ def liquidate_td(
             )
 
         # Find the associated account
-        account = None
-        for clss in CLASSES:
-            account = db.query(clss).filter(clss.account_no == td.account).first()
-            if account:
-                break
-
+        account = await resolve_account(db, td.account, CLASSES)
         if not account:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Associated account not found."
             )
 
-        # Return the deposit amount to the account and update the term deposit status
-        account.account_balance += td.amount
-        td.status = "liquidated"
-        db.commit()
+        # Flip the status only if the deposit is still active, so a deposit is never paid out twice
+        ref_no = await async_next_ref()
+        liquidated = await db.execute(
+            update(TermDeposit)
+            .where(TermDeposit.account_no == td.account_no, TermDeposit.status == "active")
+            .values(status="liquidated")
+            .execution_options(synchronize_session=False)
+        )
+        if liquidated.rowcount != 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Term deposit is not active."
+            )
+
+        # Return the deposit amount to the account
+        await credit_account(db, account, td.amount)
+        await record_movement(
+            db, ref_no, td.account_no, td.account, td.amount, "td_liquidation",
+            current_user.customer_no, "Term deposit liquidation",
+        )
+        await db.commit()
 
+    try:
+        await with_deadlock_retry(db, liquidate)
+
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
+
+    await cache.customers.invalidate(current_user.customer_no)
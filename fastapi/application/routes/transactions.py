@@ -1,21 +1,35 @@
-from fastapi import Depends, status, APIRouter, HTTPException
+from fastapi import Depends, status, APIRouter, HTTPException, Query, Response, Header
+from fastapi.responses import StreamingResponse
+import asyncio
+import base64
+import csv
+import io
+import json
 import logging
 from datetime import datetime
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import uuid4
-from ..models.transactions import Transfer, BuyGoods, PayBill, Airtime, TopUpWallet
+from babel.numbers import format_currency
+from ..models.transactions import Transfer, BuyGoods, PayBill, Airtime, TopUpWallet, JournalEntry
 from ..models.accounts import PersonalAccounts, CorporateAccounts
 from ..models.loans import PersonalLoans, BusinessLoans
-from ..models.users import Customer
-from .. import oauth
-from ..schema import transactions
-from ..database import get_db
+from .. import oauth, idempotency, limits, group_commit, cache, ownership
+from ..config import settings
+from ..schema import transactions, users
+from ..database import get_async_db, async_session
+from ..postings import stage_posting, record_posting, with_deadlock_retry
+from ..principals import get_current_principal
 
 # Constants
-DAILY_LIMIT = 100
+DAILY_LIMIT = 100  # Postings allowed per account per day
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STATEMENT_CHUNK_SIZE = 1000  # Rows fetched per round trip when streaming a statement
+STATEMENT_COLUMNS = ["date_posted", "ref_no", "transaction_type", "direction", "amount", "beneficiary", "remarks"]
 ACCOUNT_CLASSES = [PersonalAccounts, CorporateAccounts, BusinessLoans, PersonalLoans]
 
 # Router initialization
@@ -27,6 +41,140 @@ router = APIRouter(
 
 logger = logging.getLogger(__name__)
 
+
+async def _process_posting(db, new_transaction, transaction, idempotency_key=None):
+    """
+    Posts a transaction, at most once per idempotency key.
+
+    Without an `Idempotency-Key` the posting simply runs. With one, the key is claimed (scoped to the customer and
+    transaction type) before any database work: a retry of a completed request gets the stored response back
+    without touching the database, and a concurrent duplicate waits for the first request to finish.
+
+    Args:
+        db (AsyncSession): The database session.
+        new_transaction (Transaction): The unsaved transaction model to persist.
+        transaction (transactions.Transaction): The validated request body.
+        idempotency_key (str): The client's `Idempotency-Key` header, if any.
+
+    Returns:
+        The persisted transaction, or the stored `ResponseTransact` body of the original request.
+    """
+    if idempotency_key is None:
+        return await _post_transaction(db, new_transaction, transaction)
+
+    key = f"{new_transaction.owner_customer_no}:{new_transaction.__tablename__}:{idempotency_key}"
+    async def post():
+        posted = await _post_transaction(db, new_transaction, transaction)
+        return {"ref_no": posted.ref_no}
+
+    return await idempotency.run_once(key, transaction.payload, post)
+
+
+async def _post_transaction(db, new_transaction, transaction):
+    """
+    Debits the source account and persists a posting, with its journal legs, in one database transaction.
+
+    Shared by every money-moving route in this module. The account is resolved through the account directory and
+    debited with a conditional `UPDATE`, so the balance check cannot race with concurrent postings. The posting is
+    mirrored in the journal as a debit on the account and a credit on the beneficiary, and added to the customer's
+    spend rollup. The whole unit of work is retried on deadlocks.
+
+    Before any database work the account is checked against the ownership index, and the posting is checked
+    against the spend limits (and `DAILY_LIMIT`) and reserved on the spend counters; the reservation is released
+    if the posting fails, or if the request is cancelled before the posting starts committing.
+
+    With `settings.posting_mode = "group"` the posting is handed to the group committer instead, which writes it
+    in a shared transaction with other concurrent postings.
+
+    Once committed, the customer's cached balances and history are invalidated.
+
+    Args:
+        db (AsyncSession): The database session.
+        new_transaction (Transaction): The unsaved transaction model to persist.
+        transaction (transactions.Transaction): The validated request body.
+
+    Returns:
+        Transaction: The persisted transaction, refreshed from the database.
+
+    Raises:
+        HTTPException:
+            - 400: If the amount is not positive, a spend limit would be exceeded or the balance is insufficient.
+            - 403: If the account does not belong to the user.
+            - 404: If the account does not exist.
+            - 500: For database or unexpected errors.
+    """
+    amount = transaction.payload['amount']
+    if amount <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Transaction amount must be greater than zero."
+        )
+    await ownership.authorize(db, new_transaction.owner_customer_no, transaction.payload['account'])
+    release = await limits.reserve(
+        transaction.payload['account'], new_transaction.owner_customer_no, amount, daily_count=DAILY_LIMIT
+    )
+
+    committing = False
+
+    async def post():
+        nonlocal committing
+        # Debit the account and stage the posting, then save its journal legs and commit
+        await stage_posting(db, new_transaction, transaction.payload['account'], amount, ACCOUNT_CLASSES)
+        await db.flush()  # Applies the column defaults (e.g. transaction_type) the journal legs copy
+        await record_posting(db, new_transaction)
+        committing = True
+        await db.commit()
+        await db.refresh(new_transaction)
+        return new_transaction
+
+    try:
+        if settings.posting_mode == "group":
+            posted = await group_commit.committer.submit(
+                new_transaction, transaction.payload['account'], amount, ACCOUNT_CLASSES, release=release
+            )
+        else:
+            posted = await with_deadlock_retry(db, post)
+
+    except asyncio.CancelledError:
+        # The client went away. A posting cancelled mid-commit may have committed, so its reservation is kept; in
+        # group mode the committer releases the reservations of the postings it drops. Shielded, since the
+        # request's cancellation would otherwise interrupt the release too.
+        if settings.posting_mode != "group" and not committing:
+            await asyncio.shield(release())
+        raise
+
+    except HTTPException:
+        # Validation failures keep their own status code
+        await db.rollback()
+        await release()
+        raise
+
+    except IntegrityError as e:
+        # Handle database integrity error (rollback and raise a 500 server error)
+        await db.rollback()
+        await release()
+        logger.error(f"Database error occurred: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="A database error occurred while processing the transaction."
+        )
+
+    except Exception as e:
+        # Catch all other exceptions
+        await db.rollback()
+        await release()
+        logger.error(f"Unexpected error occurred: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+    # Outside the try: the money has moved, so nothing after the commit may release the reservation or fail
+    # the request
+    await cache.customers.invalidate(new_transaction.owner_customer_no)
+    return posted
+
+
 @router.post(
     "/transfer",
     status_code=status.HTTP_201_CREATED,
@@ -36,9 +184,10 @@ logger = logging.getLogger(__name__)
     summary="Transfer funds between accounts",
     description="Allows users to transfer funds between accounts, including mobile payments (MPESA, Airtel, Telcom), respecting transaction limits."
 )
-def transfer(
+async def transfer(
     transaction: transactions.Transaction,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -46,7 +195,8 @@ def transfer(
     
     Args:
         transaction (schemas.Transaction): The transaction details including account, amount, etc.
-        db (Session): The database session.
+        idempotency_key (str): Optional `Idempotency-Key` header; retries with the same key are not posted twice.
+        db (AsyncSession): The database session.
         current_user (str): The authenticated user's information.
         
     Returns:
@@ -58,82 +208,23 @@ def transfer(
     
     # Initialize transaction object
     new_transaction = Transfer(
-        id=uuid4(),
+        id=str(uuid4()),
         ref_no=uuid4(),
         date_posted=datetime.now(),
         **transaction.payload,
         owner_customer_no=current_user.customer_no
     )
-    
-    # Search for the account associated with the transaction
-    account = None
-    for account_class in ACCOUNT_CLASSES:
-        account = db.query(account_class).filter(account_class.account_no == transaction.payload['account']).first()
-        if account:
-            break
 
-    try:
-        # Validation checks
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Account does not exist."
-            )
-        if transaction.payload['amount'] <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Transaction amount must be greater than zero."
-            )
-        if account.account_type == "Personal Loan" or account.account_type == "Business Loan":
-            if account.disposable_amount < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                account.disposable_amount -= transaction.payload['amount']
-        else:
-            if account.account_balance < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                 account.account_balance -= transaction.payload['amount']
-
-        # Process the transaction
-        new_transaction.generate_ref_number()  # Ensure that the reference number is generated
-
-        # Save the transaction and commit
-        db.add(new_transaction)
-        db.commit()
-        db.refresh(new_transaction)
-
-        # Log the transaction success
-        logger.info(
-            f"User {current_user} successfully transferred {transaction.payload['amount']} "
-            f"from account {transaction.payload['account']}."
-        )
-
-        return new_transaction
+    # Debit the account, then save the transaction and commit
+    new_transaction = await _process_posting(db, new_transaction, transaction, idempotency_key)
 
-    except IntegrityError as e:
-        # Handle database integrity error (rollback and raise a 500 server error)
-        db.rollback()
-        logger.error(f"Database error occurred: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="A database error occurred while processing the transaction."
-        )
+    # Log the transaction success
+    logger.info(
+        f"User {current_user} successfully transferred {transaction.payload['amount']} "
+        f"from account {transaction.payload['account']}."
+    )
 
-    except Exception as e:
-        # Catch all other exceptions
-        db.rollback()
-        logger.error(f"Unexpected error occurred: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}"
-        )
+    return new_transaction
 
 
 @router.post(
@@ -145,9 +236,10 @@ def transfer(
     description="Allows users to purchase goods and services using funds from their account, ensuring that all transactions adhere to account balance limits.",
     dependencies=[Depends(RateLimiter(times=1, seconds=60))]
 )
-def buygoods(
+async def buygoods(
     transaction: transactions.Transaction,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -162,7 +254,8 @@ def buygoods(
     
     Args:
         transaction (transactions.Transaction): The transaction payload containing the transaction details.
-        db (Session): The database session, injected by FastAPI's dependency system.
+        idempotency_key (str): Optional `Idempotency-Key` header; retries with the same key are not posted twice.
+        db (AsyncSession): The database session, injected by FastAPI's dependency system.
         current_user (str): The authenticated user (obtained using OAuth), representing the user making the purchase.
 
     Returns:
@@ -178,78 +271,23 @@ def buygoods(
 
     # Create the new buy goods transaction
     new_transaction = BuyGoods(
-        id=uuid4(),
+        id=str(uuid4()),
         ref_no=uuid4(),
         date_posted=datetime.now(),
         **transaction.payload,
         owner_customer_no=current_user.customer_no
     )
-    
-    # Try to find the account in either Personal or Corporate account classes
-    account = None
-    for clss in ACCOUNT_CLASSES:
-        account = db.query(clss).filter(clss.account_no == transaction.payload['account']).first()
-        if account:  # If account found, break loop
-            break
-
-    try:
-        # Verify if account exists
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Account does not exist."
-            )
-        
-        # Ensure transaction amount is greater than zero
-        if transaction.payload['amount'] <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Transaction amount must be greater than zero."
-            )
-        
-        if account.account_type == "Personal Loan" or account.account_type == "Business Loan":
-            if account.disposable_amount < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                account.disposable_amount -= transaction.payload['amount']
-        else:
-            if account.account_balance < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                 account.account_balance -= transaction.payload['amount']
-
-        # Generate reference number for the transaction
-        new_transaction.generate_ref_number()
-
-        # Commit the transaction to the database
-        db.add(new_transaction)
-        db.commit()
-        db.refresh(new_transaction)
-
-        # Log the transaction for auditing
-        logger.info(
-            f"User {current_user} completed a purchase of {transaction.payload['amount']} "
-            f"from account {transaction.payload['account']}."
-        )
 
-        # Return the transaction details
-        return new_transaction
+    # Debit the account and commit the transaction to the database
+    new_transaction = await _process_posting(db, new_transaction, transaction, idempotency_key)
 
-    except Exception as e:
-        # Rollback the transaction in case of errors
-        db.rollback()
+    # Log the transaction for auditing
+    logger.info(
+        f"User {current_user} completed a purchase of {transaction.payload['amount']} "
+        f"from account {transaction.payload['account']}."
+    )
 
-        # Raise an internal server error for unexpected exceptions
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}"
-        )
+    return new_transaction
 
 
 @router.post(
@@ -262,9 +300,10 @@ def buygoods(
     description="Allows users to make payments for utility bills (e.g., electricity, water, or other services) "
                 "using funds from their bank accounts while ensuring account balance sufficiency."
 )
-def paybill(
+async def paybill(
     transaction: transactions.Transaction,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -277,7 +316,8 @@ def paybill(
     Args:
         transaction (transactions.Transaction): The payload containing transaction details such as account,
                                                  amount, and other transaction-related data.
-        db (Session): The SQLAlchemy session to interact with the database.
+        idempotency_key (str): Optional `Idempotency-Key` header; retries with the same key are not posted twice.
+        db (AsyncSession): The SQLAlchemy session to interact with the database.
         current_user (str): The authenticated user making the transaction.
 
     Returns:
@@ -293,71 +333,24 @@ def paybill(
     """
     # Initialize new PayBill transaction
     new_transaction = PayBill(
-        id=uuid4(),
+        id=str(uuid4()),
         ref_no=uuid4(),
         **transaction.payload,
         date_posted=datetime.now(),
         owner_customer_no=current_user.customer_no
     )
 
-    # Check account existence and balance sufficiency
-    account = None
-    for clss in ACCOUNT_CLASSES:
-        account = db.query(clss).filter(clss.account_no == transaction.payload['account']).first()
-        if account:  # Break out of loop once account is found
-            break
+    # Debit the account and persist the transaction in the database
+    new_transaction = await _process_posting(db, new_transaction, transaction, idempotency_key)
 
-    try:
-        # Account existence check
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Account does not exist."
-            )
+    # Log the transaction for auditing purposes
+    logger.info(
+        f"User {current_user} made a bill payment of {transaction.payload['amount']} "
+        f"from account {transaction.payload['account']}."
+    )
 
-        if account.account_type == "Personal Loan" or account.account_type == "Business Loan":
-            if account.disposable_amount < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                account.disposable_amount -= transaction.payload['amount']
-        else:
-            if account.account_balance < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                 account.account_balance -= transaction.payload['amount']
-
-        # Generate the reference number for the transaction
-        new_transaction.generate_ref_number()
-
-        # Commit the transaction and persist it in the database
-        db.add(new_transaction)
-        db.commit()
-        db.refresh(new_transaction)
-
-        # Log the transaction for auditing purposes
-        logger.info(
-            f"User {current_user} made a bill payment of {transaction.payload['amount']} "
-            f"from account {transaction.payload['account']}."
-        )
+    return new_transaction
 
-        # Return the transaction details as a response
-        return new_transaction
-
-    except Exception as e:
-        # Rollback the transaction in case of any error
-        db.rollback()
-        
-        # Raise an internal server error with the specific exception details
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}"
-        )
 
 @router.post(
     "/airtime",
@@ -367,9 +360,10 @@ def paybill(
     summary="Transfer funds between accounts",
     description="Allows users to transfer funds from bank accounts to mobile accounts (MPESA, AIRTEL, Telcom) adhering to specified limits."
 )
-def buy_airtime(
+async def buy_airtime(
     transaction: transactions.Transaction,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -377,7 +371,8 @@ def buy_airtime(
 
     Args:
         transaction (schemas.Transaction): The transaction payload containing account details and the amount.
-        db (Session): Database session.
+        idempotency_key (str): Optional `Idempotency-Key` header; retries with the same key are not posted twice.
+        db (AsyncSession): Database session.
         current_user (str): The authenticated user.
 
     Returns:
@@ -387,67 +382,24 @@ def buy_airtime(
         HTTPException: Various HTTP exceptions based on transaction validity and errors.
     """
     new_transaction = Airtime(
-        id=uuid4(),
+        id=str(uuid4()),
         remarks="airtime",
         ref_no=uuid4(),
         date_posted=datetime.now(),
         **transaction.payload,
         owner_customer_no=current_user.customer_no
     )
-    for clss in ACCOUNT_CLASSES:
-        account = db.query(clss).filter(
-            clss.account_no == transaction.payload['account']
-        ).first()
-        if account:
-            break
 
-    try:
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Account does not exist."
-            )
-        if transaction.payload['amount'] <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Transaction amount must be greater than zero."
-            )
-        if account.account_type == "Personal Loan" or account.account_type == "Business Loan":
-            if account.disposable_amount < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                account.disposable_amount -= transaction.payload['amount']
-        else:
-            if account.account_balance < transaction.payload['amount']:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient funds for this transaction."
-                )
-            else:
-                 account.account_balance -= transaction.payload['amount']
-        new_transaction.generate_ref_number()
-        db.add(new_transaction)
-        db.commit()
-        db.refresh(new_transaction)
-
-        logger.info(
-            f"User {current_user} transferred {transaction.payload['amount']} "
-            f"from account {transaction.payload['account']}"
-        )
-        return new_transaction
+    # Debit the account and persist the transaction
+    new_transaction = await _process_posting(db, new_transaction, transaction, idempotency_key)
 
+    logger.info(
+        f"User {current_user} transferred {transaction.payload['amount']} "
+        f"from account {transaction.payload['account']}"
+    )
+
+    return new_transaction
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}"
-        )
-    finally:
-        db.close()
 
 @router.post(
     "/topup_wallet",
@@ -458,9 +410,10 @@ def buy_airtime(
     description="Enables users to transfer funds from their bank accounts to mobile wallets like MPESA, Airtel, or Telcom, "
                 "ensuring all transactions comply with account limits."
 )
-def topup_wallet(
+async def topup_wallet(
     transaction: transactions.Transaction,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(oauth.get_current_user)
 ):
     """
@@ -472,7 +425,8 @@ def topup_wallet(
 
     Args:
         transaction (schemas.Transaction): The payload containing account and transaction details (e.g., amount, account number).
-        db (Session): The database session to perform database operations.
+        idempotency_key (str): Optional `Idempotency-Key` header; retries with the same key are not posted twice.
+        db (AsyncSession): The database session to perform database operations.
         current_user (str): The authenticated user initiating the transaction.
 
     Returns:
@@ -486,141 +440,237 @@ def topup_wallet(
     """
     # Initialize a new TopUpWallet transaction
     new_transaction = TopUpWallet(
-        id=uuid4(),
+        id=str(uuid4()),
         ref_no=uuid4(),
         date_posted=datetime.now(),
         **transaction.payload,
         owner_customer_no=current_user.customer_no
     )
 
-    # Validate account existence
-    account = None
-    for clss in ACCOUNT_CLASSES:
-        account = db.query(clss).filter(clss.account_no == transaction.payload['account']).first()
-        if account:  # Exit loop as soon as account is found
-            break
+    # Debit the account and persist the transaction in the database
+    new_transaction = await _process_posting(db, new_transaction, transaction, idempotency_key)
 
-    try:
-        # Account existence check
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Account does not exist."
-            )
+    # Log the transaction for auditing purposes
+    logger.info(
+        f"User {current_user} transferred {transaction.payload['amount']} "
+        f"from account {transaction.payload['account']} to a mobile wallet."
+    )
 
-        # Validate transaction amount
-        if transaction.payload['amount'] <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Transaction amount must be greater than zero."
-            )
+    return new_transaction
 
-        # Ensure sufficient funds
-        if account.account_balance < transaction.payload['amount']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed. Insufficient funds."
-            )
 
-        # Deduct transaction amount from the account balance
-        account.account_balance -= transaction.payload['amount']
+@router.get(
+    "/all_user_transactions",
+    status_code=status.HTTP_200_OK,
+    response_model=List[transactions.AllTransactions],
+    summary="Retrieve all user transactions",
+    description="Fetches the current user's transactions, newest first, one page at a time. Results can be filtered "
+                "by date range, transaction type, amount range and account. When more results are available the "
+                "cursor for the next page is returned in the `X-Next-Cursor` response header."
+)
+async def all_user_transactions(
+    response: Response,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    transaction_type: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    account: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db), 
+    current_user: str = Depends(oauth.get_current_user)
+):
+    """
+    Retrieve the current user's transactions, one page at a time.
 
-        # Generate a unique reference number for the transaction
-        new_transaction.generate_ref_number()
+    Every transaction type (transfers, bill payments, purchases of goods and services, airtime and wallet
+    top-ups) is read from the unified journal. Pages are keyset-paginated on (date_posted, ref_no), so fetching
+    any page is a bounded range scan on a composite index regardless of how long the customer's history is.
 
-        # Persist the transaction in the database
-        db.add(new_transaction)
-        db.commit()
-        db.refresh(new_transaction)
+    The unfiltered first page (the dashboard's mini-statement) is served from the customer cache, which holds the
+    latest `settings.cache_recent_transactions` transactions and is invalidated after every posting.
 
-        # Log the transaction for auditing purposes
-        logger.info(
-            f"User {current_user} transferred {transaction.payload['amount']} "
-            f"from account {transaction.payload['account']} to a mobile wallet."
-        )
+    Args:
+        response (Response): The outgoing response, used to return the next page cursor.
+        limit (int): Maximum number of transactions per page.
+        cursor (str): Opaque cursor from the `X-Next-Cursor` header of the previous page.
+        date_from (datetime): Only transactions posted at or after this time (`from` query parameter).
+        date_to (datetime): Only transactions posted before this time (`to` query parameter).
+        transaction_type (str): Only transactions of this type (e.g. "paybill").
+        min_amount (float): Only transactions of at least this amount.
+        max_amount (float): Only transactions of at most this amount.
+        account (str): Only transactions on this account.
+        db (AsyncSession): The database session for querying the database.
+        current_user (str): The currently authenticated user.
 
-        # Return the transaction details as the response
-        return new_transaction
+    Returns:
+        List[schemas.AllTransactions]: One page of the user's transactions, formatted for display.
 
-    except Exception as e:
-        # Rollback the transaction on any error
-        db.rollback()
+    Raises:
+        HTTPException:
+            - 400 Bad Request: If the cursor is malformed.
+            - 500 Internal Server Error: If an error occurs during data retrieval or processing.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    filters = (date_from, date_to, transaction_type, min_amount, max_amount, account)
+    filtered = any(value is not None for value in filters)
 
-        # Log the exception
-        logger.error(f"Error processing wallet top-up: {str(e)}")
+    if after is None and not filtered and limit <= settings.cache_recent_transactions:
+        recent = await cache.customers.get_or_load(
+            current_user.customer_no, "history", lambda: _load_recent(db, current_user.customer_no)
+        )
+        page = recent["items"][:limit]
+        if len(page) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = recent["cursors"][limit - 1]
+        return page
 
-        # Raise an internal server error exception
+    try:
+        result = await db.execute(JournalEntry.history_query(
+            current_user.customer_no,
+            limit,
+            after=after,
+            start=date_from,
+            end=date_to,
+            transaction_type=transaction_type,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            account=account,
+        ))
+        rows = result.all()
+    except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}"
+            detail=f"Error fetching transactions: {str(e)}"
         )
 
+    # A full page may be followed by more results
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(rows[-1])
+
+    return [_summarize(row) for row in rows]
 
 
 @router.get(
-    "/all_user_transactions",
+    "/statement/{account_no}/export",
     status_code=status.HTTP_200_OK,
-    response_model=List[transactions.AllTransactions],
-    summary="Retrieve all user transactions",
-    description="Fetches all transactions performed by the current user, categorized by type, "
-                "including customer-to-business transactions, bill payments, and goods/services purchases."
+    summary="Export an account statement",
+    description="Streams every journal entry posted to one of the user's accounts, oldest first, as CSV or "
+                "newline-delimited JSON. Optionally restricted to a date range."
 )
-def all_user_transactions(
-    db: Session = Depends(get_db), 
-    current_user: str = Depends(oauth.get_current_user)
+async def export_statement(
+    account_no: str,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    principal: users.Principal = Depends(get_current_principal)
 ):
     """
-    Retrieve all transactions for the current user.
+    Streams an account statement as CSV or NDJSON.
 
-    This endpoint allows the authenticated user to view a summary of all their transactions, 
-    grouped by type. It fetches customer-to-business (C2B) transactions, bill payments, and 
-    purchases of goods and services, formats the data for clarity, and returns a consolidated list.
+    The rows are read through a server-side cursor in chunks of `STATEMENT_CHUNK_SIZE` and written to the response
+    as they arrive, so memory use stays flat whether the statement holds a hundred rows or millions. Because the
+    body is produced after this function returns, the generator opens (and closes) its own async session.
 
     Args:
-        db (Session): The database session for querying the database.
-        current_user (str): The currently authenticated user.
+        account_no (str): The account whose statement is exported.
+        export_format (str): "csv" or "ndjson" (`format` query parameter).
+        date_from (datetime): Only entries posted at or after this time (`from` query parameter).
+        date_to (datetime): Only entries posted before this time (`to` query parameter).
+        principal (schemas.Principal): The authenticated user and the accounts they own.
 
     Returns:
-        List[schemas.AllTransactions]: A list of all transactions associated with the user, 
-        grouped by type and properly formatted.
+        StreamingResponse: The statement, served as an attachment.
 
     Raises:
         HTTPException:
-            - 404 Not Found: If the user is not found in the database.
-            - 500 Internal Server Error: If an error occurs during data retrieval or processing.
-
-    Note:
-        - The function calls methods on the `user` model to fetch categorized transactions.
-        - Each transaction undergoes formatting steps for UUID truncation and cash formatting.
+            - 404 Not Found: If the account does not exist or does not belong to the user.
     """
-    user = db.query(Customer).filter(Customer.customer_no == current_user.customer_no).first()
-    if not user:
+    if not principal.owns(account_no):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found."
+            detail="Account does not exist."
         )
 
-    try:
-        # Fetch categorized transactionss
-        c2b_transactions = user.get_c2b_transactions(db)
-        bills = user.get_bills(db)
-        goods_and_services = user.get_amount(db)
-        airtime = user.get_airtime(db)
-        topups = user.get_topups(db)
-
-        # Consolidate all transactions
-        all_transactions = c2b_transactions + bills + goods_and_services + airtime + topups
-
-        # Format transaction details
-        for transaction in all_transactions:
-            transaction.truncate_uuid()
-            transaction.format_cash()
-            transaction.truncate_datetime()
+    async def rows():
+        async with async_session() as stream_db:
+            result = await stream_db.stream(
+                JournalEntry.statement_query(account_no, date_from, date_to, STATEMENT_CHUNK_SIZE)
+            )
+            if export_format == "csv":
+                yield ",".join(STATEMENT_COLUMNS) + "\r\n"
+            async for chunk in result.partitions():
+                buffer = io.StringIO()
+                if export_format == "csv":
+                    writer = csv.writer(buffer)
+                    for row in chunk:
+                        writer.writerow([row.date_posted.isoformat(), *row[1:]])
+                else:
+                    for row in chunk:
+                        buffer.write(json.dumps({**row._asdict(), "date_posted": row.date_posted.isoformat()}) + "\n")
+                yield buffer.getvalue()
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="statement-{account_no}.{export_format}"'},
+    )
 
-        return all_transactions
 
+async def _load_recent(db, customer_no):
+    """
+    Loads the customer's latest `settings.cache_recent_transactions` transactions for the cache, formatted for
+    display, together with the cursor following each of them.
+    """
+    try:
+        rows = (await db.execute(
+            JournalEntry.history_query(customer_no, settings.cache_recent_transactions)
+        )).all()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching transactions: {str(e)}"
-        )
\ No newline at end of file
+        )
+    return {"items": [_summarize(row) for row in rows], "cursors": [_encode_cursor(row) for row in rows]}
+
+
+def _encode_cursor(row):
+    """
+    Encodes the keyset of a history row as an opaque, URL-safe cursor.
+    """
+    key = [row.date_posted.isoformat(), row.ref_no, row.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """
+    Decodes a cursor produced by `_encode_cursor` back into a `(date_posted, ref_no, id)` keyset.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        date_posted, ref_no, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(date_posted), ref_no, entry_id
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+
+def _summarize(row):
+    """
+    Formats a history row for display: masks the account number, formats the amount as currency and the posting
+    time as a string, matching `Transaction.truncate_uuid`, `format_cash` and `truncate_datetime`.
+    """
+    parts = row.account.split('-')
+    return {
+        "account": f"{parts[0]}-***-{parts[-1][-2:]}",
+        "amount": format_currency(row.amount, 'USD', locale='en_US'),
+        "ref_no": row.ref_no,
+        "transaction_type": row.transaction_type,
+        "beneficiary": row.beneficiary,
+        "date_posted": row.date_posted.strftime("%Y-%m-%d %H:%M:%S"),
+    }
@@ -5,11 +5,13 @@ The module interacts with a database to persist user data and provides API respo
 formats using Pydantic models defined in the schemas module.
 """
 from fastapi import Depends, status, APIRouter, HTTPException
-from .. import oauth
+from .. import oauth, passwords
 from ..models.users import Customer
 from ..schema import users
-from ..database import get_db
+from ..database import get_db, get_async_db
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import timedelta, datetime
 from ..config import settings
@@ -22,24 +24,32 @@ router = APIRouter(
 
 
 @router.post("/create", status_code=status.HTTP_201_CREATED, response_model=users.ResponseUser)
-def create_user(user: users.User, db: Session = Depends(get_db)):
+async def create_user(user: users.User, db: AsyncSession = Depends(get_async_db)):
     """
     Creates a new user by adding their details to the database.
 
+    The submitted password (`password_hash` field) is hashed with bcrypt in the password process pool before it
+    is stored.
+
     Args:
         user (schemas.User): User data to create a new customer, validated via Pydantic schema.
-        db (Session): The database session used to interact with the database.
+        db (AsyncSession): The database session used to interact with the database.
 
     Returns:
         ResponseUser: The created user's data as a response.
 
+    Raises:
+        HTTPException: 503 if the password pool is saturated.
+
     HTTP Status Codes:
         - 201 Created: Successful creation of a new user.
     """
-    new_user = Customer(**user.dict())  # Create a Customer object from the user data
+    user_data = user.dict()
+    user_data["password_hash"] = await passwords.hasher.hash(user_data["password_hash"])
+    new_user = Customer(**user_data)  # Create a Customer object from the user data
     db.add(new_user)  # Add new customer to the session
-    db.commit()  # Commit the changes to the database
-    db.refresh(new_user)  # Refresh to get updated customer data after commit
+    await db.commit()  # Commit the changes to the database
+    await db.refresh(new_user)  # Refresh to get updated customer data after commit
     return new_user  # Return the created user data
 
 
@@ -62,25 +72,32 @@ def get_users(db: Session = Depends(get_db)):
 
 
 @router.post("/login", status_code=status.HTTP_200_OK)
-def login_user(user_credentials: users.LoginUser, db: Session = Depends(get_db)):
+async def login_user(user_credentials: users.LoginUser, db: AsyncSession = Depends(get_async_db)):
     """
     Logs in a customer by validating the credentials (customer number and password) and generating an access token.
 
+    The password is verified with bcrypt in the password process pool, so a burst of logins does not hold up the
+    API worker. After a successful login, a stored hash made with an outdated cost factor (or a legacy plain-text
+    value) is replaced with a hash at the current `settings.bcrypt_rounds`.
+
     Args:
         user_credentials (schemas.LoginUser): Customer's credentials, validated via Pydantic schema.
-        db (Session): The database session used to query the database.
+        db (AsyncSession): The database session used to query the database.
 
     Returns:
         dict: A dictionary with the access token, expiration time, and customer number.
 
     Raises:
-        HTTPException: If the credentials are invalid (user not found or incorrect password).
+        HTTPException: If the credentials are invalid (user not found or incorrect password), or 503 if the
+                       password pool is saturated.
 
     HTTP Status Codes:
         - 200 OK: Successful login with access token returned.
     """
     # Look up the user by customer number
-    user = db.query(Customer).filter(Customer.customer_no == user_credentials.customer_no).first()
+    user = (await db.execute(
+        select(Customer).where(Customer.customer_no == user_credentials.customer_no)
+    )).scalars().first()
 
     # If user is not found, raise 404 error
     if not user:
@@ -90,12 +107,21 @@ def login_user(user_credentials: users.LoginUser, db: Session = Depends(get_db))
         )
 
     # If password doesn't match, raise 403 error
-    if not user.check_password(user_credentials.password_hash):
+    if not await passwords.hasher.verify(user_credentials.password_hash, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid Credentials"
         )
 
+    # Upgrade hashes made with an outdated cost factor while the plain-text password is at hand; when the password
+    # pool is saturated the upgrade waits for a later login rather than failing this one
+    if passwords.hasher.needs_rehash(user.password_hash):
+        try:
+            user.password_hash = await passwords.hasher.hash(user_credentials.password_hash)
+            await db.commit()
+        except HTTPException:
+            pass
+
     # Generate the access token
     access_token = oauth.create_token(data={"customer_no": user.customer_no})
 
@@ -109,4 +135,29 @@ def login_user(user_credentials: users.LoginUser, db: Session = Depends(get_db))
         "customer_no": user.customer_no
     }
 
-           
\ No newline at end of file
+           
+
+
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout_user(
+    token: str = Depends(oauth.oauth_scheme),
+    current_user: users.TokenData = Depends(oauth.get_current_user)
+):
+    """
+    Logs out a customer by revoking the access token used for the request.
+
+    The token is rejected by every API worker from then on, until it would have expired anyway.
+
+    Args:
+        token (str): The bearer token to revoke.
+        current_user (schemas.TokenData): The authenticated customer.
+
+    Returns:
+        dict: A confirmation message.
+
+    HTTP Status Codes:
+        - 200 OK: The token was revoked.
+        - 401 Unauthorized: The token is invalid, expired or already revoked.
+    """
+    await oauth.revoke_token(token)
+    return {"detail": "Logged out"}
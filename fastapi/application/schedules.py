@@ -1,57 +1,344 @@
 from .models.loans import PersonalLoans, BusinessLoans, Mortgages
 from .models.term_deposits import TermDeposit
+from .models.scheduling import AccrualRun
 from datetime import datetime
-from .database import session
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import select, update, bindparam, func, and_, tuple_
+from sqlalchemy.exc import IntegrityError
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+import logging
+import multiprocessing
+import os
+import time
+from .database import engine, session
+from .config import settings
+from . import interest
 
+logger = logging.getLogger(__name__)
 
-def calculate_interest_for_loans(db=session()):
+LOAN_CLASSES = [PersonalLoans, BusinessLoans, Mortgages]
+LOAN_INTEREST_JOB = "loan_interest_job"
+TD_INTEREST_JOB = "td_interest_job"
+ACCRUING_STATUS = "active"  # Only active loans and deposits accrue interest
+
+# How far `next_calculation_date` moves after an accrual, per compounding frequency
+ACCRUAL_STEPS = {
+    "daily": relativedelta(days=1),
+    "monthly": relativedelta(months=1),
+    "quarterly": relativedelta(months=3),
+    "annually": relativedelta(years=1),
+    "annual": relativedelta(years=1),
+}
+
+
+def _accrue_due(db, model, status, principal, start, balance_columns, as_of, partition=None):
+    """
+    Accrues interest for the rows of one product table that are due.
+
+    - Selects only rows whose status is active and whose `next_calculation_date` is on or before `as_of`,
+      served by the table's (status, next_calculation_date, account_no) index.
+    - When `partition` is given as `(index, count)`, only rows with `CRC32(account_no) % count == index` are
+      accrued, so `count` processes can split a table without overlapping.
+    - Walks those rows in keyset-paginated chunks of `settings.accrual_batch_size`, ordered by
+      (next_calculation_date, account_no).
+    - For each chunk, computes the interest with the vectorized interest engine, adds it to `balance_columns`,
+      stamps `last_calculation_date`, advances `next_calculation_date` by one compounding period and commits.
+
+    Every committed chunk moves its rows out of the due range, so a run that crashes part way through resumes
+    from the first uncommitted chunk when it is started again. The write-back repeats the due condition, so when
+    two runs overlap (a resumed run while the first is still going) each row is accrued by only one of them.
+
+    Args:
+        db (Session): The database session.
+        model: The loan or term deposit model.
+        status: The status column of the model.
+        principal: The column interest compounds on.
+        start: The column (or expression) holding the accrual start date.
+        balance_columns (list[str]): Names of the columns the interest is added to.
+        as_of (datetime): The moment interest is accrued up to.
+        partition (tuple[int, int]): Optional `(index, count)` hash partition to restrict the rows to.
+
+    Returns:
+        tuple[int, float]: The number of rows this call accrued and the interest it added, excluding rows an
+        overlapping run accrued first.
+    """
+    table = model.__table__
+    write_back = (
+        update(table)
+        .where(
+            table.c.account_no == bindparam("key"),
+            status == ACCRUING_STATUS,
+            model.next_calculation_date <= as_of,
+        )
+        .values({
+            **{column: table.c[column] + bindparam("accrued") for column in balance_columns},
+            "last_calculation_date": as_of,
+            "next_calculation_date": bindparam("next_date"),
+        })
+    )
+    due = and_(status == ACCRUING_STATUS, model.next_calculation_date <= as_of)
+    if partition is not None:
+        index, count = partition
+        due = and_(due, func.crc32(model.account_no) % count == index)
+    keyset = tuple_(model.next_calculation_date, model.account_no)
+    cursor = None
+    accrued_rows = 0
+    accrued_interest = 0.0
+
+    while True:
+        query = select(
+            model.account_no,
+            principal,
+            model.rate,
+            model.compounding_frequency,
+            start,
+            model.next_calculation_date,
+        ).where(due)
+        if cursor is not None:
+            query = query.where(keyset > tuple_(*cursor))
+        rows = db.execute(
+            query.order_by(model.next_calculation_date, model.account_no).limit(settings.accrual_batch_size)
+        ).all()
+        if not rows:
+            break
+
+        account_nos, principals, rates, frequencies, starts, next_dates = zip(*rows)
+        accrued = interest.accrue(
+            principals,
+            rates,
+            frequencies,
+            np.array(starts, dtype="datetime64[D]"),
+            np.datetime64(as_of.date(), "D"),
+            settings.day_count_convention,
+        )
+        written = db.execute(
+            write_back,
+            [
+                {
+                    "key": account_no,
+                    "accrued": float(amount),
+                    "next_date": as_of + ACCRUAL_STEPS[frequency],
+                }
+                for account_no, amount, frequency in zip(account_nos, accrued, frequencies)
+            ],
+        ).rowcount
+        if written == len(rows):
+            accrued_interest += float(accrued.sum())
+        else:
+            # An overlapping run advanced some of these rows first; count only the ones stamped with this run
+            mine = set(db.scalars(
+                select(model.account_no).where(
+                    model.account_no.in_(account_nos), model.last_calculation_date == as_of
+                )
+            ))
+            accrued_interest += float(sum(
+                amount for account_no, amount in zip(account_nos, accrued) if account_no in mine
+            ))
+        db.commit()
+
+        accrued_rows += written
+        cursor = (next_dates[-1], account_nos[-1])
+
+    return accrued_rows, accrued_interest
+
+
+def _accrue_partition(accrue, partition, as_of):
     """
-    Calculates and updates interest for all types of loans (Personal, Business, Mortgages).
-    
-    - Fetches all the loans from the database.
-    - Calculates the interest for each loan based on the formula.
-    - Updates the outstanding amount and accrued interest for each loan.
-    - Commits the changes to the database.
+    Runs `accrue` for one hash partition in its own session. Executed inside a worker process.
+    """
+    with session() as db:
+        return accrue(db, as_of, partition)
+
+
+def _accrue_in_parallel(job, accrue, db, as_of):
+    """
+    Fans an accrual out over hash partitions of `account_no`, one per worker process, and gathers their totals.
+
+    - The number of partitions is `settings.accrual_workers` (1 by default), or the number of CPUs if it is 0.
+    - Partitions hash `account_no` with MySQL's `CRC32`; on other databases (SQLite in development) the accrual
+      always runs as a single partition.
+    - Each partition runs in its own process with its own database connection and commits chunk by chunk, so
+      partitions never contend for the same rows and the interest computation uses every core. The processes are
+      spawned rather than forked, since the scheduler calls this from a thread of a multithreaded process and a
+      forked child could inherit locks held by other threads.
+    - With a single partition the accrual runs in-process on `db`.
+
+    If any partition fails, the others still finish and their committed chunks stand; the first error is then
+    raised so the run is recorded as failed and the next run resumes with whatever is still due.
+
+    Args:
+        job (str): Name of the accrual job, for logging.
+        accrue (callable): Called as `accrue(db, as_of, partition)`; returns `(rows, interest)`.
+        db (Session): The coordinator's session.
+        as_of (datetime): The moment interest is accrued up to.
+
+    Returns:
+        tuple[int, float]: Rows accrued and total interest, summed over all partitions.
     """
-    # Fetch loans due for interest calculation
+    workers = settings.accrual_workers or os.cpu_count() or 1
+    if workers > 1 and engine.dialect.name != "mysql":
+        logger.warning(f"{job}: partitioning needs MySQL's CRC32; accruing on {engine.dialect.name} in one process.")
+        workers = 1
+    if workers == 1:
+        return accrue(db, as_of, None)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            (index, pool.submit(_accrue_partition, accrue, (index, workers), as_of)) for index in range(workers)
+        ]
+        wait([future for _, future in futures])
+
+    errors = []
+    totals = []
+    for index, future in futures:
+        if future.exception() is not None:
+            errors.append(future.exception())
+            logger.error(f"{job} partition {index + 1}/{workers} failed: {future.exception()}")
+            continue
+        rows, accrued = future.result()
+        totals.append((rows, accrued))
+        logger.info(f"{job} partition {index + 1}/{workers}: {rows} rows, {accrued:.2f} interest.")
+    if errors:
+        raise errors[0]
+    return sum(rows for rows, _ in totals), sum(accrued for _, accrued in totals)
+
+
+def _run_accrual(job, accrue, db=None):
+    """
+    Runs an accrual job at most once per business date, recording the outcome in the accrual run ledger.
+
+    - If the ledger already holds a completed run of `job` for today, the call is a no-op, so restarts and
+      duplicate triggers never double-accrue.
+    - Otherwise the run is recorded as "running", `accrue` is executed over hash partitions in parallel (see
+      `_accrue_in_parallel`) and the run is marked "completed" with its row count, total interest and duration
+      (or "failed" if it raised).
+
+    Because each row accrues from its own `last_calculation_date` in closed form, a run after N days of downtime
+    catches up all N days in a single pass instead of replaying N daily jobs.
+
+    Args:
+        job (str): Name of the accrual job.
+        accrue (callable): Called as `accrue(db, as_of, partition)`; returns `(rows, interest)`. Must be a
+                           module-level function so it can be sent to the worker processes.
+        db (Session): Optional database session. A new session is opened (and closed) if omitted.
+
+    Returns:
+        AccrualRun: The ledger entry for today's run, or `None` if another scheduler claimed it first.
+    """
+    owns_session = db is None
+    db = db or session()
     now = datetime.now()
-    due_personal_loans = db.query(PersonalLoans).all()
-    due_business_loans = db.query(BusinessLoans).all()
-    due_mortgage_loans = db.query(Mortgages).all()
-    due_loans = [due_business_loans, due_mortgage_loans, due_personal_loans]
-
-    for loans in due_loans:
-        for loan in loans:
-            n = 365  # Number of days in a year (for daily compounding)
-            time_elapsed = 1  # Time elapsed in years (set to 1 for annual calculation)
-            
-            # Compound Interest Calculation: A = P * (1 + r/n)^(nt) - P
-            new_interest = (loan.amount * (1 + loan.rate / n)**(n * time_elapsed) - loan.amount) / 10**7  # Adjusting the scale for correct units
-            
-            loan.outstanding_amount += new_interest
-            loan.accrued_interest += new_interest
-            loan.last_calculation_date = now
+    business_date = now.date()
+    try:
+        run = db.query(AccrualRun).filter(
+            AccrualRun.job == job,
+            AccrualRun.business_date == business_date,
+        ).first()
+        if run and run.status == "completed":
+            logger.info(f"{job} already completed for {business_date}; skipping.")
+            return run
+
+        if run is None:
+            run = AccrualRun(job=job, business_date=business_date, status="running")
+            db.add(run)
+        else:
+            run.status = "running"  # Resume a run that crashed or failed earlier today
+        try:
             db.commit()
+        except IntegrityError:
+            # Another scheduler recorded the same run first
+            db.rollback()
+            logger.info(f"{job} for {business_date} is already being handled; skipping.")
+            return None
 
-def calculate_interest_for_tds(db=session()):
+        started = time.perf_counter()
+        try:
+            rows, accrued = _accrue_in_parallel(job, accrue, db, now)
+        except Exception:
+            db.rollback()
+            run.status = "failed"
+            run.duration = time.perf_counter() - started
+            db.commit()
+            logger.exception(f"{job} failed for {business_date}.")
+            raise
+
+        run.status = "completed"
+        run.rows = rows
+        run.interest = accrued
+        run.duration = time.perf_counter() - started
+        db.commit()
+        logger.info(f"{job} accrued {accrued:.2f} over {rows} rows for {business_date} in {run.duration:.2f}s.")
+        return run
+    finally:
+        if owns_session:
+            db.close()
+
+
+def _accrue_loans(db, as_of, partition=None):
     """
-    Calculates and updates interest for all active term deposits.
+    Accrues every loan table (or one hash partition of each) up to `as_of`.
 
-    - Fetches all the term deposits from the database.
-    - Calculates the interest for each term deposit based on the formula.
-    - Updates the accumulated value and interest for each term deposit.
-    - Commits the changes to the database.
+    Returns:
+        tuple[int, float]: The number of loans accrued and the total interest.
     """
-    # Fetch term deposits due for interest calculation
-    due_term_deposits = db.query(TermDeposit).all()
+    totals = [
+        _accrue_due(
+            db,
+            loan_class,
+            loan_class.account_status,
+            loan_class.outstanding_amount,
+            loan_class.last_calculation_date,
+            ["outstanding_amount", "accrued_interest"],
+            as_of,
+            partition,
+        )
+        for loan_class in LOAN_CLASSES
+    ]
+    return sum(rows for rows, _ in totals), sum(accrued for _, accrued in totals)
 
-    for td in due_term_deposits:
-        n = 365  # Number of days in a year (for daily compounding)
-        time_elapsed = 1  # Time elapsed in years (set to 1 for annual calculation)
-        
-        # Compound Interest Calculation: A = P * (1 + r/n)^(nt) - P
-        new_interest = (td.amount * (1 + td.rate / n)**(n * time_elapsed) - td.amount) / 10**4  # Adjusting scale for correct units
-        
-        td.interest += new_interest
-        td.accumulated_value += new_interest
-        db.commit()
+
+def _accrue_tds(db, as_of, partition=None):
+    """
+    Accrues term deposits (or one hash partition of them) up to `as_of`.
+
+    Returns:
+        tuple[int, float]: The number of deposits accrued and the total interest.
+    """
+    return _accrue_due(
+        db,
+        TermDeposit,
+        TermDeposit.status,
+        TermDeposit.accumulated_value,
+        func.coalesce(TermDeposit.last_calculation_date, TermDeposit.created_at),
+        ["accumulated_value", "interest"],
+        as_of,
+        partition,
+    )
+
+
+def calculate_interest_for_loans(db=None):
+    """
+    Calculates and updates interest for all types of loans (Personal, Business, Mortgages) that are due.
+
+    - Only active loans whose `next_calculation_date` has passed are processed.
+    - Interest compounds on the outstanding amount from the last calculation date up to today, using each
+      loan's `compounding_frequency` and the configured day-count convention.
+    - Updates the outstanding amount, accrued interest and calculation dates chunk by chunk, with the loans split
+      by account number hash across `settings.accrual_workers` processes on MySQL.
+    - Runs at most once per business date (see `_run_accrual`).
+    """
+    return _run_accrual(LOAN_INTEREST_JOB, _accrue_loans, db)
+
+
+def calculate_interest_for_tds(db=None):
+    """
+    Calculates and updates interest for active term deposits that are due.
+
+    - Interest compounds on the accumulated value from the last calculation date (or the booking date for new
+      deposits) up to today.
+    - Updates the accumulated value, interest and calculation dates chunk by chunk, with the deposits split by
+      account number hash across `settings.accrual_workers` processes on MySQL.
+    - Runs at most once per business date (see `_run_accrual`).
+    """
+    return _run_accrual(TD_INTEREST_JOB, _accrue_tds, db)
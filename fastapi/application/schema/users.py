@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional, Set
 
 class User(BaseModel):
     full_name: str
@@ -19,4 +20,26 @@ class LoginUser(BaseModel):
     customer_no: int
     password_hash: str
 class TokenData(BaseModel):
-    customer_no: int
\ No newline at end of file
+    customer_no: int
+    jti: Optional[str] = None
+
+
+class Principal(BaseModel):
+    """
+    The authenticated customer, loaded once per request by `principals.get_current_principal`.
+
+    Attributes:
+        customer_no (int): The customer number.
+        full_name (str): The customer's full name.
+        email (str): The customer's email address.
+        account_nos (set[str]): Every account, loan and term deposit number the customer owns.
+        jti (str): The id of the access token the request was made with.
+    """
+    customer_no: int
+    full_name: str
+    email: str
+    account_nos: Set[str] = set()
+    jti: Optional[str] = None
+
+    def owns(self, account_no):
+        return account_no in self.account_nos
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings are read on import: the tests run the app on a scratch SQLite database with in-process stores
+_database = os.path.join(tempfile.gettempdir(), "banking-route-tests.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_database}")
+os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{_database}")
+os.environ.setdefault("STORE_BACKEND", "local")
@@ -0,0 +1,35 @@
+import unittest
+from datetime import date
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import mysql
+from application.analytics import upsert_statement
+from application.models import Base
+from application.models.analytics import SpendRollup
+from application.models.users import Customer
+
+
+def rollup(amount):
+    return {
+        "customer_no": 1, "account": "0110000001", "transaction_type": "paybill",
+        "day": date(2024, 5, 1), "transaction_count": 1, "total_amount": amount,
+    }
+
+
+class TestSpendRollupUpsert(unittest.TestCase):
+    def test_upserts_add_to_the_existing_rollup(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine, tables=[Customer.__table__, SpendRollup.__table__])
+        with engine.begin() as connection:
+            for amount in (100.0, 250.0, 50.0):
+                connection.execute(upsert_statement(engine.dialect.name, [rollup(amount)]))
+            rows = connection.execute(select(SpendRollup.transaction_count, SpendRollup.total_amount)).all()
+        self.assertEqual(rows, [(3, 400.0)])
+
+    def test_mysql_uses_on_duplicate_key_update(self):
+        sql = str(upsert_statement("mysql", [rollup(10.0)]).compile(dialect=mysql.dialect()))
+        self.assertIn("ON DUPLICATE KEY UPDATE", sql)
+        self.assertIn("transaction_count = (spend_rollups.transaction_count +", sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+from application import cache
+
+
+class TestCustomerCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = cache.CustomerCache(cache.LocalCacheBackend(max_entries=2), ttl=30)
+        self.loads = 0
+
+    async def load(self):
+        self.loads += 1
+        return {"version": self.loads}
+
+    async def test_second_read_is_a_hit(self):
+        first = await self.cache.get_or_load(1, "history", self.load)
+        second = await self.cache.get_or_load(1, "history", self.load)
+        self.assertEqual(first, second)
+        self.assertEqual(self.loads, 1)
+        stats = await self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    async def test_invalidate_reloads(self):
+        await self.cache.get_or_load(1, "history", self.load)
+        await self.cache.invalidate(1)
+        self.assertEqual(await self.cache.get_or_load(1, "history", self.load), {"version": 2})
+
+    async def test_invalidate_survives_a_backend_error(self):
+        with mock.patch.object(self.cache.backend, "bump", side_effect=ConnectionError("down")):
+            await self.cache.invalidate(1)
+        self.assertEqual((await self.cache.stats())["invalidations"], 1)
+
+    async def test_backend_errors_fall_through_to_the_loader(self):
+        with mock.patch.object(self.cache.backend, "get", side_effect=ConnectionError("down")):
+            self.assertEqual(await self.cache.get_or_load(1, "history", self.load), {"version": 1})
+        with mock.patch.object(self.cache.backend, "set", side_effect=ConnectionError("down")):
+            self.assertEqual(await self.cache.get_or_load(1, "history", self.load), {"version": 2})
+        self.assertEqual((await self.cache.stats())["misses"], 2)
+
+    async def test_generations_are_bounded(self):
+        for customer_no in range(10):
+            await self.cache.invalidate(customer_no)
+        self.assertEqual(len(self.cache.backend.generations), 2)
+
+    async def test_evicted_generation_does_not_serve_stale_entries(self):
+        await self.cache.get_or_load(1, "history", self.load)
+        await self.cache.invalidate(1)
+        await self.cache.get_or_load(1, "history", self.load)
+        await self.cache.invalidate(1)
+        await self.cache.invalidate(2)
+        await self.cache.invalidate(3)  # Evicts customer 1's generation
+        self.assertEqual(await self.cache.get_or_load(1, "history", self.load), {"version": 3})
+
+    async def test_load_racing_an_invalidation_is_not_served(self):
+        async def stale_load():
+            # A posting commits while the entry is being loaded
+            await self.cache.invalidate(1)
+            return {"version": "stale"}
+
+        await self.cache.get_or_load(1, "history", stale_load)
+        self.assertEqual(await self.cache.get_or_load(1, "history", self.load), {"version": 1})
+
+    async def test_least_recently_used_entry_is_evicted(self):
+        await self.cache.get_or_load(1, "history", self.load)
+        await self.cache.get_or_load(2, "history", self.load)
+        await self.cache.get_or_load(1, "history", self.load)
+        await self.cache.get_or_load(3, "history", self.load)  # Evicts customer 2
+        await self.cache.get_or_load(1, "history", self.load)
+        await self.cache.get_or_load(2, "history", self.load)
+        self.assertEqual(self.loads, 4)
+        self.assertGreaterEqual((await self.cache.stats())["evictions"], 1)
+
+    async def test_entries_expire(self):
+        with mock.patch("application.cache.time.monotonic", return_value=1000.0):
+            await self.cache.get_or_load(1, "history", self.load)
+        with mock.patch("application.cache.time.monotonic", return_value=1031.0):
+            await self.cache.get_or_load(1, "history", self.load)
+        self.assertEqual(self.loads, 2)
+        self.assertEqual((await self.cache.stats())["expirations"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
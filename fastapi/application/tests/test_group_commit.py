@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+from datetime import datetime
+from uuid import uuid4
+from application.database import engine, async_engine
+from application.group_commit import GroupCommitter
+from application.models import Base
+from application.models.accounts import PersonalAccounts
+from application.models.transactions import Transfer
+from application.tests.test_routes.support import seed_customer, open_account, balance
+
+
+class TestGroupCommitter(unittest.IsolatedAsyncioTestCase):
+    customer_no = 910000002
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=engine)
+        seed_customer(cls.customer_no)
+
+    async def asyncSetUp(self):
+        self.committer = GroupCommitter(interval=0.2, max_batch=10)
+        self.released = []
+
+    async def asyncTearDown(self):
+        await self.committer.stop()
+        await async_engine.dispose()  # Pooled connections belong to this test's event loop
+
+    def submit(self, account_no, amount):
+        transfer = Transfer(id=str(uuid4()), account=account_no, amount=amount, beneficiary="0700000000",
+                            date_posted=datetime.now(), owner_customer_no=self.customer_no)
+
+        async def release():
+            self.released.append(account_no)
+
+        return asyncio.create_task(
+            self.committer.submit(transfer, account_no, amount, [PersonalAccounts], release=release)
+        )
+
+    async def test_batch_is_committed(self):
+        account_no = await open_account(self.customer_no, 1000)
+        posted = await self.submit(account_no, 100)
+        self.assertIsNotNone(posted.ref_no)
+        self.assertEqual(balance(account_no), 900)
+        self.assertEqual(self.released, [])
+
+    async def test_cancelled_posting_is_dropped_and_released(self):
+        account_no = await open_account(self.customer_no, 1000)
+        kept = self.submit(account_no, 100)
+        cancelled = self.submit(account_no, 200)
+        await asyncio.sleep(0)  # Both postings are queued, and the batch is still collecting
+        cancelled.cancel()
+        await kept
+        await self.committer.queue.join()
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(balance(account_no), 900)
+        self.assertEqual(self.released, [account_no])
+
+
+if __name__ == "__main__":
+    unittest.main()
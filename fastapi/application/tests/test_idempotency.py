@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from fastapi import HTTPException
+from application import idempotency
+
+
+class TestIdempotency(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = idempotency.LocalIdempotencyStore()
+        self.calls = 0
+
+    async def post(self, delay=0.0):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return {"ref_no": f"REF{self.calls}"}
+
+    async def test_retry_returns_stored_response(self):
+        first = await idempotency.run_once("1:transfer:abc", {"amount": 10}, self.post, self.store)
+        second = await idempotency.run_once("1:transfer:abc", {"amount": 10}, self.post, self.store)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+    async def test_concurrent_duplicates_wait_for_the_first_request(self):
+        results = await asyncio.gather(*[
+            idempotency.run_once("1:paybill:abc", {"amount": 10}, lambda: self.post(0.2), self.store)
+            for _ in range(5)
+        ])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{"ref_no": "REF1"}] * 5)
+
+    async def test_failed_request_releases_the_key(self):
+        async def fail():
+            raise HTTPException(status_code=400, detail="Insufficient funds for this transaction.")
+
+        with self.assertRaises(HTTPException):
+            await idempotency.run_once("1:airtime:abc", {"amount": 10}, fail, self.store)
+        response = await idempotency.run_once("1:airtime:abc", {"amount": 10}, self.post, self.store)
+        self.assertEqual(response, {"ref_no": "REF1"})
+
+    async def test_store_error_after_posting_returns_the_response(self):
+        async def down(key, record, ttl):
+            raise ConnectionError("down")
+
+        self.store.complete = down
+        response = await idempotency.run_once("1:transfer:abc", {"amount": 10}, self.post, self.store)
+        self.assertEqual(response, {"ref_no": "REF1"})
+
+    async def test_claim_outlives_its_ttl_while_posting(self):
+        with patch.object(idempotency.settings, "idempotency_lock_ttl", 0.3):
+            first = asyncio.create_task(
+                idempotency.run_once("1:transfer:abc", {"amount": 10}, lambda: self.post(0.6), self.store)
+            )
+            await asyncio.sleep(0.45)  # Past the TTL, still posting
+            self.assertEqual((await self.store.get("1:transfer:abc"))["state"], idempotency.IN_FLIGHT)
+            duplicate = await idempotency.run_once("1:transfer:abc", {"amount": 10}, self.post, self.store)
+            self.assertEqual(await first, duplicate)
+        self.assertEqual(self.calls, 1)
+
+    async def test_key_reused_with_different_payload(self):
+        await idempotency.run_once("1:transfer:abc", {"amount": 10}, self.post, self.store)
+        with self.assertRaises(HTTPException) as raised:
+            await idempotency.run_once("1:transfer:abc", {"amount": 20}, self.post, self.store)
+        self.assertEqual(raised.exception.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
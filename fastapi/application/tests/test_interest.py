@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from application import interest
+
+
+class TestInterestEngine(unittest.TestCase):
+    def test_periods_per_year(self):
+        periods = interest.periods_per_year(["daily", "monthly", "quarterly", "annually"])
+        np.testing.assert_array_equal(periods, [365, 12, 4, 1])
+
+    def test_unknown_frequency(self):
+        with self.assertRaises(ValueError):
+            interest.periods_per_year(["daily", "fortnightly"])
+
+    def test_act_365_year_fraction(self):
+        years = interest.year_fraction(["2024-01-01", "2024-03-01"], ["2025-01-01", "2024-02-01"])
+        # 2024 is a leap year; negative spans are clipped to zero
+        np.testing.assert_allclose(years, [366 / 365, 0.0])
+
+    def test_30_360_year_fraction(self):
+        years = interest.year_fraction(
+            ["2024-01-31", "2024-02-15", "2024-01-30"],
+            ["2024-03-31", "2024-08-15", "2024-02-28"],
+            interest.THIRTY_360,
+        )
+        np.testing.assert_allclose(years, [60 / 360, 180 / 360, 28 / 360])
+
+    def test_compound_interest(self):
+        accrued = interest.compound_interest([1000.0, 1000.0], [12.0, 12.0], [12, 1], [1.0, 1.0])
+        np.testing.assert_allclose(accrued, [1000.0 * (1.01 ** 12 - 1), 120.0])
+
+    def test_accrue_daily(self):
+        accrued = interest.accrue([1000.0], [7.3], ["daily"], ["2024-01-01"], ["2024-01-02"])
+        np.testing.assert_allclose(accrued, [1000.0 * 0.073 / 365])
+
+    def test_unknown_convention(self):
+        with self.assertRaises(ValueError):
+            interest.year_fraction(["2024-01-01"], ["2024-02-01"], "ACT/ACT")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+from datetime import datetime
+from fastapi import HTTPException
+from application import limits
+from application.config import settings
+
+
+class TestSpendLimits(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.limiter = limits.LocalSpendLimiter()
+
+    async def test_spend_up_to_the_daily_account_limit(self):
+        limit = settings.account_daily_spend_limit
+        await limits.reserve("acc-1", 1, limit - 10, limiter=self.limiter)
+        await limits.reserve("acc-1", 1, 10, limiter=self.limiter)
+        with self.assertRaises(HTTPException) as raised:
+            await limits.reserve("acc-1", 1, 0.01, limiter=self.limiter)
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertIn("Daily account limit", raised.exception.detail)
+
+    async def test_customer_limit_spans_accounts(self):
+        limit = settings.customer_daily_spend_limit
+        await limits.reserve("acc-1", 1, settings.account_daily_spend_limit, limiter=self.limiter)
+        await limits.reserve("acc-2", 1, limit - settings.account_daily_spend_limit, limiter=self.limiter)
+        with self.assertRaises(HTTPException) as raised:
+            await limits.reserve("acc-3", 1, 1, limiter=self.limiter)
+        self.assertIn("Daily customer limit", raised.exception.detail)
+        # Another customer is unaffected
+        await limits.reserve("acc-4", 2, 1, limiter=self.limiter)
+
+    async def test_daily_count(self):
+        for _ in range(3):
+            await limits.reserve("acc-1", 1, 1, daily_count=3, limiter=self.limiter)
+        with self.assertRaises(HTTPException):
+            await limits.reserve("acc-1", 1, 1, daily_count=3, limiter=self.limiter)
+
+    async def test_release_restores_the_counters(self):
+        release = await limits.reserve("acc-1", 1, settings.account_daily_spend_limit, limiter=self.limiter)
+        await release()
+        await limits.reserve("acc-1", 1, settings.account_daily_spend_limit, limiter=self.limiter)
+
+    async def test_release_error_is_not_raised(self):
+        release = await limits.reserve("acc-1", 1, 10, limiter=self.limiter)
+        with mock.patch.object(self.limiter, "release", side_effect=ConnectionError("down")):
+            await release()
+
+    async def test_rejected_spend_is_not_counted(self):
+        with self.assertRaises(HTTPException):
+            await limits.reserve("acc-1", 1, settings.account_daily_spend_limit + 1, limiter=self.limiter)
+        self.assertEqual(self.limiter.totals, {})
+
+    def test_counters_are_keyed_by_calendar_window(self):
+        keys = [counter.key for counter in limits.counters("acc-1", 7, now=datetime(2024, 1, 31, 23, 59))]
+        self.assertEqual(keys, [
+            "spend:account:acc-1:day:20240131",
+            "spend:account:acc-1:month:202401",
+            "spend:customer:7:day:20240131",
+            "spend:customer:7:month:202401",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
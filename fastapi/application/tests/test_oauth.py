@@ -0,0 +1,50 @@
+import time
+import unittest
+from unittest.mock import patch
+from fastapi import HTTPException
+from application import oauth
+
+
+class TestVerifiedTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = oauth.TokenCache(max_entries=2)
+        self.error = HTTPException(status_code=401)
+        patcher = patch.object(oauth, "verified_tokens", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeat_requests_skip_decoding(self):
+        token = oauth.create_token({"customer_no": 42})
+        with patch.object(oauth.jwt, "decode", wraps=oauth.jwt.decode) as decode:
+            for _ in range(3):
+                self.assertEqual(oauth.verify_token(token, self.error).customer_no, 42)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_invalid_tokens_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(HTTPException):
+                oauth.verify_token("not-a-token", self.error)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_entries_expire_and_are_evicted(self):
+        data = oauth.users.TokenData(customer_no=1)
+        self.cache.put("expired", data, time.time() - 1)
+        self.assertIsNone(self.cache.get("expired"))
+        self.assertEqual(self.cache.expirations, 1)
+
+        for token in ("a", "b", "c"):
+            self.cache.put(token, data, time.time() + 60)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_discard_forces_verification(self):
+        token = oauth.create_token({"customer_no": 7})
+        oauth.verify_token(token, self.error)
+        self.cache.discard(token)
+        self.assertIsNone(self.cache.get(token))
+        self.assertEqual(self.cache.revocations, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
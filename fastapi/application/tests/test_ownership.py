@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from fastapi import HTTPException
+from application import ownership
+
+
+class FakeRedis:
+    def __init__(self):
+        self.sets = {}
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+
+class TestOwnershipIndex(unittest.TestCase):
+    def setUp(self):
+        self.loads = 0
+
+    async def loader(self):
+        self.loads += 1
+        return ["acc-1", "acc-2"]
+
+    def test_redis_index_answers_positives_locally(self):
+        index = ownership.RedisOwnershipIndex("redis://localhost", max_entries=10)
+        index.redis = FakeRedis()
+
+        async def check():
+            return [await index.owns(1, account_no, self.loader) for account_no in ("acc-1", "acc-2", "acc-9")]
+
+        self.assertEqual(asyncio.run(check()), [True, True, False])
+        self.assertEqual((index.loads, index.confirmations), (1, 1))  # The negative is confirmed in the directory
+        self.assertEqual((index.local_hits, index.redis_lookups), (1, 2))
+
+    def test_redis_index_backfills_sets_holding_only_additions(self):
+        index = ownership.RedisOwnershipIndex("redis://localhost", max_entries=10)
+        index.redis = FakeRedis()
+        asyncio.run(index.add(1, "acc-3"))
+        self.assertTrue(asyncio.run(index.owns(1, "acc-1", self.loader)))
+        self.assertTrue(asyncio.run(index.owns(1, "acc-3", self.loader)))
+        self.assertEqual(self.loads, 1)
+
+    def test_redis_index_recovers_a_lost_addition(self):
+        index = ownership.RedisOwnershipIndex("redis://localhost", max_entries=10)
+        index.redis = FakeRedis()
+        directory = ["acc-1"]
+
+        async def loader():
+            return list(directory)
+
+        self.assertTrue(asyncio.run(index.owns(1, "acc-1", loader)))
+
+        async def down(key, *members):
+            raise ConnectionError("down")
+
+        directory.append("acc-3")  # Committed, but the write-through fails
+        with patch.object(index.redis, "sadd", down):
+            asyncio.run(index.add(1, "acc-3"))  # Logged, not raised
+
+        other_worker = ownership.RedisOwnershipIndex("redis://localhost", max_entries=10)
+        other_worker.redis = index.redis
+        self.assertTrue(asyncio.run(other_worker.owns(1, "acc-3", loader)))
+        self.assertIn("acc-3", index.redis.sets["owned:1"])
+
+    def test_local_index_applies_additions_to_held_customers(self):
+        index = ownership.LocalOwnershipIndex(max_entries=10)
+        self.assertTrue(asyncio.run(index.owns(1, "acc-1", self.loader)))
+        asyncio.run(index.add(1, "acc-3"))
+        self.assertTrue(asyncio.run(index.owns(1, "acc-3", self.loader)))
+        self.assertEqual(self.loads, 1)
+
+    def test_authorize_rejects_other_customers_accounts(self):
+        async def owned(db, customer_no):
+            return ["acc-1"]
+
+        with patch.object(ownership, "index", ownership.LocalOwnershipIndex(max_entries=10)), \
+                patch.object(ownership, "load_owned_accounts", owned):
+            asyncio.run(ownership.authorize(None, 1, "acc-1"))
+            with self.assertRaises(HTTPException) as raised:
+                asyncio.run(ownership.authorize(None, 1, "acc-2"))
+        self.assertEqual(raised.exception.status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import asyncio
+import unittest
+from fastapi import HTTPException
+from application.passwords import PasswordHasher
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(rounds=4, workers=1, queue_limit=4)
+        self.addCleanup(self.hasher.shutdown)
+
+    def test_hash_and_verify_in_the_pool(self):
+        async def check():
+            password_hash = await self.hasher.hash("s3cret")
+            return password_hash, await self.hasher.verify("s3cret", password_hash), \
+                await self.hasher.verify("wrong", password_hash)
+
+        password_hash, correct, wrong = asyncio.run(check())
+        self.assertTrue(password_hash.startswith("$2b$04$"))
+        self.assertEqual((correct, wrong), (True, False))
+        self.assertFalse(self.hasher.needs_rehash(password_hash))
+        self.assertTrue(PasswordHasher(rounds=5, workers=1, queue_limit=4).needs_rehash(password_hash))
+
+    def test_legacy_plain_text_is_accepted_and_rehashed(self):
+        self.assertTrue(asyncio.run(self.hasher.verify("s3cret", "s3cret")))
+        self.assertFalse(asyncio.run(self.hasher.verify("wrong", "s3cret")))
+        self.assertTrue(self.hasher.needs_rehash("s3cret"))
+
+    def test_saturated_pool_rejects_immediately(self):
+        self.hasher.pending = self.hasher.queue_limit
+        with self.assertRaises(HTTPException) as raised:
+            asyncio.run(self.hasher.hash("s3cret"))
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertIsNone(self.hasher._executor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import re
+import threading
+import unittest
+from application import refs
+
+
+class TestReferenceNumbers(unittest.TestCase):
+    def test_shape_and_check_letter(self):
+        for value in (0, 1, 12345, refs.CAPACITY - 1):
+            ref_no = refs.encode(value)
+            self.assertRegex(ref_no, re.compile(r"^[A-Z]{3}\d[A-Z]{3}\d{2}[A-Z]$"))
+            self.assertTrue(refs.is_valid(ref_no))
+
+    def test_legacy_references_are_never_valid(self):
+        # Random references issued before the sequence: LLLDLLLDLL
+        self.assertFalse(any(refs.is_valid(f"ABC1DEF2{letter}{check}") for letter in "XYZ" for check in refs.LETTERS))
+
+    def test_consecutive_values_are_distinct_and_scrambled(self):
+        ref_nos = [refs.encode(value) for value in range(100000)]
+        self.assertEqual(len(set(ref_nos)), len(ref_nos))
+        self.assertNotEqual(ref_nos[0][:3], ref_nos[1][:3])
+
+    def test_single_character_errors_are_detected(self):
+        ref_no = refs.encode(424242)
+        for position, alphabet in enumerate(refs.PAYLOAD_SHAPE):
+            for character in alphabet:
+                if character != ref_no[position]:
+                    mistyped = ref_no[:position] + character + ref_no[position + 1:]
+                    self.assertFalse(refs.is_valid(mistyped))
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            refs.encode(refs.CAPACITY)
+
+    def test_allocator_reserves_blocks(self):
+        reserved = []
+
+        def reserve(size):
+            reserved.append(size)
+            return (len(reserved) - 1) * size
+
+        allocator = refs.RefAllocator(block_size=10, reserve=reserve)
+        ref_nos = []
+
+        def take():
+            for _ in range(25):
+                ref_nos.append(allocator.next())
+
+        threads = [threading.Thread(target=take) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(ref_nos)), 100)
+        self.assertEqual(reserved, [10] * 10)
+
+    def test_async_allocator_reserves_blocks_without_blocking(self):
+        reserved = []
+
+        async def reserve(size):
+            reserved.append(size)
+            await asyncio.sleep(0)  # Other requests run while the block is reserved
+            return (len(reserved) - 1) * size
+
+        async def take_all():
+            allocator = refs.AsyncRefAllocator(block_size=10, reserve=reserve)
+            return await asyncio.gather(*(allocator.next() for _ in range(100)))
+
+        ref_nos = asyncio.run(take_all())
+        self.assertEqual(len(set(ref_nos)), 100)
+        self.assertEqual(reserved, [10] * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+from fastapi import HTTPException
+from jose import jwt
+from application import oauth, revocation
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = revocation.BloomFilter(bits=1 << 16, hashes=7)
+        for i in range(2000):
+            bloom.add(f"revoked-{i}")
+        self.assertTrue(all(f"revoked-{i}" in bloom for i in range(2000)))
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 100)
+
+
+class TestTokenRevocation(unittest.TestCase):
+    def setUp(self):
+        self.revoked = revocation.LocalRevocationList()
+        for patcher in (
+            patch.object(revocation, "revoked", self.revoked),
+            patch.object(oauth, "verified_tokens", oauth.TokenCache(max_entries=10)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_revoked_tokens_are_rejected(self):
+        token = oauth.create_token({"customer_no": 42})
+        other = oauth.create_token({"customer_no": 42})
+
+        async def check():
+            self.assertEqual((await oauth.get_current_user(token)).customer_no, 42)
+            self.assertTrue(await oauth.revoke_token(token))
+            with self.assertRaises(HTTPException):
+                await oauth.get_current_user(token)
+            return await oauth.get_current_user(other)
+
+        self.assertEqual(asyncio.run(check()).customer_no, 42)
+        self.assertIsNone(oauth.verified_tokens.get(token))
+
+    def test_revocations_lapse_when_the_token_expires(self):
+        asyncio.run(self.revoked.revoke("expired-jti", time.time() - 1))
+        self.assertFalse(asyncio.run(self.revoked.is_revoked("expired-jti")))
+        self.assertFalse(asyncio.run(self.revoked.is_revoked("unknown-jti")))
+        self.assertEqual(self.revoked.positives, 1)
+
+    def test_tokens_without_jti_cannot_be_revoked(self):
+        token = jwt.encode({"customer_no": 42, "exp": time.time() + 60}, oauth.SECRET_KEY, algorithm=oauth.ALGORITHM)
+        self.assertFalse(asyncio.run(oauth.revoke_token(token)))
+        self.assertEqual(asyncio.run(oauth.get_current_user(token)).customer_no, 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from datetime import datetime
+from uuid import uuid4
+import httpx
+from fastapi_limiter.depends import RateLimiter
+from application.main import app
+from application.database import engine, session, async_engine
+from application.models import Base
+from application.models.accounts import PersonalAccounts
+from application.models.users import Customer
+from application.schema import users
+from application import oauth, cache
+
+
+def no_rate_limit():
+    pass
+
+
+def seed_customer(customer_no):
+    with session() as db:
+        if db.query(Customer).filter_by(customer_no=customer_no).first() is None:
+            db.add(Customer(full_name=f"Test {customer_no}", password_hash="-", email=f"{customer_no}@test.example.com",
+                            pin="-", customer_no=customer_no))
+            db.commit()
+
+
+async def open_account(customer_no, balance):
+    """
+    Opens a funded savings account for a customer and returns its number. Like the account opening routes, it
+    invalidates the customer's cached principal.
+    """
+    account_no = f"test-{uuid4().hex[:12]}"
+    with session() as db:
+        db.add(PersonalAccounts(
+            account_no=account_no, owner_customer_no=customer_no, account_balance=balance,
+            account_type="Savings Account", account_name="Test", id_no="0", kra_pin="-", nationality="KE",
+            address="-", telephone="-", email=f"{customer_no}@test.example.com", dob=datetime(1990, 1, 1),
+            annual_income=0, source_of_funds="-", intended_usage="-", nssf_no="-", nok_relationship="-",
+            next_of_kin="-", next_of_kin_id="-", employment_status="-",
+        ))
+        db.commit()
+    await cache.customers.invalidate(customer_no)
+    return account_no
+
+
+def balance(account_no):
+    with session() as db:
+        return db.query(PersonalAccounts.account_balance).filter_by(account_no=account_no).scalar()
+
+
+class RouteTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Calls the app in process on the scratch SQLite database, authenticated as `customer_no`, with rate limits off.
+    """
+
+    customer_no = 910000001
+
+    @classmethod
+    def setUpClass(cls):
+        engine.echo = False
+        async_engine.echo = False
+        Base.metadata.create_all(bind=engine)
+        seed_customer(cls.customer_no)
+
+    async def asyncSetUp(self):
+        app.dependency_overrides[oauth.get_current_user] = lambda: users.TokenData(customer_no=self.customer_no)
+        for route in app.routes:
+            for dependency in getattr(route, "dependant", None) and route.dependant.dependencies or []:
+                if isinstance(dependency.call, RateLimiter):
+                    app.dependency_overrides[dependency.call] = no_rate_limit
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        app.dependency_overrides = {}
+        await async_engine.dispose()  # Pooled connections belong to this test's event loop
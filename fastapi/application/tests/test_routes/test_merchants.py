@@ -0,0 +1,30 @@
+import unittest
+from application.database import session
+from application.hot_accounts import flag_hot_account
+from application.tests.test_routes.support import RouteTestCase, open_account, seed_customer
+
+
+def flag(account_no):
+    with session() as db:
+        flag_hot_account(db, account_no, slots=4)
+        db.commit()
+
+
+class TestHotAccountBalance(RouteTestCase):
+    async def test_owner_reads_the_balance(self):
+        account_no = await open_account(self.customer_no, 0)
+        flag(account_no)
+        response = await self.client.get(f"/post/hot_accounts/{account_no}/balance")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["slots"], 4)
+
+    async def test_other_customers_are_refused(self):
+        seed_customer(self.customer_no + 1)
+        account_no = await open_account(self.customer_no + 1, 0)
+        flag(account_no)
+        response = await self.client.get(f"/post/hot_accounts/{account_no}/balance")
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from application.database import session
+from application.models.transactions import JournalEntry, DEBIT, CREDIT
+from application.tests.test_routes.support import RouteTestCase, open_account, balance
+
+
+def journal(transaction_type, *accounts):
+    with session() as db:
+        entries = db.query(JournalEntry).filter(
+            JournalEntry.transaction_type == transaction_type, JournalEntry.account.in_(accounts)
+        )
+        return {(entry.direction, entry.account, entry.amount) for entry in entries}
+
+
+class TestTermDeposits(RouteTestCase):
+    async def book(self, account_no, amount):
+        return await self.client.post("/post/book_td", json={
+            "payload": {"account": account_no, "amount": amount, "maturity_period": 6},
+            "signature": "-",
+        })
+
+    async def test_booking_journals_the_debit(self):
+        account_no = await open_account(self.customer_no, 1000)
+        response = await self.book(account_no, 400)
+        self.assertEqual(response.status_code, 201)
+        td_no = response.json()["account_no"]
+        self.assertEqual(balance(account_no), 600)
+        self.assertEqual(journal("td_booking", account_no, td_no), {(DEBIT, account_no, 400), (CREDIT, td_no, 400)})
+
+    async def test_liquidation_journals_the_credit(self):
+        account_no = await open_account(self.customer_no, 1000)
+        td_no = (await self.book(account_no, 400)).json()["account_no"]
+        response = await self.client.post("/post/liquidate", json={
+            "payload": {"account_no": td_no},
+            "signature": "-",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(balance(account_no), 1000)
+        self.assertEqual(journal("td_liquidation", account_no, td_no), {(DEBIT, td_no, 400), (CREDIT, account_no, 400)})
+
+    async def test_insufficient_funds_journal_nothing(self):
+        account_no = await open_account(self.customer_no, 100)
+        response = await self.book(account_no, 400)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(journal("td_booking", account_no), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
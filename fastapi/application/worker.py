@@ -0,0 +1,237 @@
+"""
+Scheduler Worker Module.
+
+This module is the entry point for the process that runs the periodic jobs (interest accrual for loans and term
+deposits, and folding the balance slots of hot accounts). It runs separately from the API workers:
+
+    python -m application.worker
+
+Any number of scheduler workers may be started, for example one per node for availability. They elect a leader
+through a lease row in the `scheduler_leases` table, and only the current leader runs the jobs.
+
+Key Features:
+-------------
+1. **Lease-Based Leader Election**:
+   - A worker becomes leader by taking the lease with a single conditional `UPDATE ... WHERE holder = :me OR
+     expires_at < :now` (or by inserting the lease row if it does not exist yet).
+   - The leader renews the lease every third of its time-to-live; if it dies, the lease lapses and a standby
+     takes over on its next renewal attempt.
+
+2. **Catch-Up on Promotion**:
+   - When a worker becomes leader it runs the accrual jobs straight away, so days missed while no leader was
+     running are accrued without waiting for the next cron trigger. The accrual run ledger makes repeated runs
+     for the same business date a no-op.
+
+Notes:
+------
+- Lease expiry is compared against each worker's UTC clock, so scheduler nodes must keep their clocks in sync
+  (e.g. with NTP). A small skew only delays failover; the accrual run ledger still prevents double accrual.
+- The lease time-to-live is configured with `settings.scheduler_lease_ttl` (seconds).
+"""
+
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from uuid import uuid4
+from apscheduler.schedulers.blocking import BlockingScheduler
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+from .database import engine, session
+from .config import settings
+from .models.scheduling import AccrualRun, SchedulerLease
+from .models.hot_accounts import HotAccount, BalanceSlot
+from .hot_accounts import fold_hot_accounts
+from .schedules import calculate_interest_for_loans, calculate_interest_for_tds, LOAN_INTEREST_JOB, TD_INTEREST_JOB
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+LEASE_JOB = "scheduler_lease_job"
+HOT_ACCOUNT_FOLD_JOB = "hot_account_fold_job"
+
+
+class LeaderLease:
+    """
+    A time-limited lease on a row of `scheduler_leases`, identifying the one worker allowed to run the jobs.
+
+    Attributes:
+        name (str): Name of the lease row.
+        ttl (int): Lease time-to-live, in seconds.
+        holder (str): Identifier of this worker (host, process id and a random suffix).
+        expires_at (datetime): UTC expiry of the lease held by this worker, or `None` if it is not the leader.
+    """
+
+    def __init__(self, name=LEASE_NAME, ttl=None):
+        self.name = name
+        self.ttl = ttl or settings.scheduler_lease_ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.expires_at = None
+
+    @property
+    def is_leader(self):
+        """
+        Tells whether this worker holds an unexpired lease.
+        """
+        return self.expires_at is not None and datetime.utcnow() < self.expires_at
+
+    def acquire(self):
+        """
+        Takes or renews the lease.
+
+        The lease is taken over only if this worker already holds it or it has expired; if the lease row does not
+        exist yet it is inserted, and a concurrent insert by another worker is treated as losing the election.
+
+        Returns:
+            bool: `True` if this worker holds the lease after the call.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        with session() as db:
+            try:
+                taken = db.execute(
+                    update(SchedulerLease)
+                    .where(
+                        SchedulerLease.name == self.name,
+                        or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now),
+                    )
+                    .values(holder=self.holder, expires_at=expires_at)
+                ).rowcount == 1
+                if not taken and db.get(SchedulerLease, self.name) is None:
+                    db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at))
+                    taken = True
+                db.commit()
+            except IntegrityError:
+                # Another worker inserted the lease row first
+                db.rollback()
+                taken = False
+        self.expires_at = expires_at if taken else None
+        return taken
+
+    def release(self):
+        """
+        Gives the lease up so a standby can take over without waiting for it to expire.
+        """
+        if self.expires_at is None:
+            return
+        with session() as db:
+            db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            db.commit()
+        self.expires_at = None
+
+
+def as_leader(lease, job):
+    """
+    Wraps a job so that it only runs while this worker holds the lease.
+
+    Args:
+        lease (LeaderLease): The worker's lease.
+        job (callable): The job to run.
+
+    Returns:
+        callable: A zero-argument callable suitable for the scheduler.
+    """
+    def run():
+        if not lease.is_leader:
+            logger.debug(f"Not the leader; skipping {job.__name__}.")
+            return None
+        return job()
+    run.__name__ = job.__name__
+    return run
+
+
+def renew_lease(lease, scheduler, job_ids):
+    """
+    Renews the lease and, when this worker has just become leader, runs the jobs immediately to catch up.
+
+    Args:
+        lease (LeaderLease): The worker's lease.
+        scheduler (BaseScheduler): The scheduler holding the jobs.
+        job_ids (list[str]): The jobs to trigger on promotion.
+    """
+    was_leader = lease.is_leader
+    try:
+        leader = lease.acquire()
+    except Exception:
+        # Keep the current state; the lease simply lapses if the database stays unreachable
+        logger.exception("Could not renew the scheduler lease.")
+        return
+    if leader and not was_leader:
+        logger.info(f"{lease.holder} is now the scheduler leader.")
+        for job_id in job_ids:
+            scheduler.modify_job(job_id, next_run_time=datetime.now())
+    elif was_leader and not leader:
+        logger.warning(f"{lease.holder} lost the scheduler lease.")
+
+
+def build_scheduler(lease):
+    """
+    Creates the blocking scheduler with the accrual jobs, the hot account fold job and the lease renewal job.
+
+    The accrual jobs fire shortly after midnight on a fixed cron schedule and the fold job every
+    `settings.hot_account_fold_interval` seconds; both only do work on the leader. The lease job runs every third
+    of the lease time-to-live, starting immediately.
+
+    Args:
+        lease (LeaderLease): The worker's lease.
+
+    Returns:
+        BlockingScheduler: The configured (not yet started) scheduler.
+    """
+    scheduler = BlockingScheduler()
+    jobs = {
+        LOAN_INTEREST_JOB: calculate_interest_for_loans,
+        TD_INTEREST_JOB: calculate_interest_for_tds,
+    }
+    for job_id, job in jobs.items():
+        scheduler.add_job(as_leader(lease, job), "cron", hour=0, minute=5, id=job_id, replace_existing=True)
+    scheduler.add_job(
+        as_leader(lease, fold_hot_accounts),
+        "interval",
+        seconds=settings.hot_account_fold_interval,
+        id=HOT_ACCOUNT_FOLD_JOB,
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        renew_lease,
+        "interval",
+        seconds=max(lease.ttl // 3, 1),
+        args=[lease, scheduler, list(jobs)],
+        next_run_time=datetime.now(),
+        id=LEASE_JOB,
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    return scheduler
+
+
+def main():
+    """
+    Runs the scheduler worker until it is interrupted, releasing the lease on the way out.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # The worker only needs its own bookkeeping tables and the hot account tables it folds; the API creates the rest
+    for table in (AccrualRun.__table__, SchedulerLease.__table__, HotAccount.__table__, BalanceSlot.__table__):
+        table.create(bind=engine, checkfirst=True)
+
+    lease = LeaderLease()
+    scheduler = build_scheduler(lease)
+    logger.info(f"Scheduler worker {lease.holder} started.")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        lease.release()
+        logger.info(f"Scheduler worker {lease.holder} stopped.")
+
+
+if __name__ == "__main__":
+    main()
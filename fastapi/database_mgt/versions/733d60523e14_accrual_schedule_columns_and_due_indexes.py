@@ -0,0 +1,51 @@
+"""Accrual schedule columns on term deposits and due indexes
+
+Adds the compounding frequency and calculation dates the accrual job keeps per term deposit, and the
+(status, next_calculation_date, account_no) indexes it finds due loans and deposits with.
+
+Deposits booked before this revision were accrued by the previous daily job up to now, so their calculation
+dates are backfilled with the migration time rather than left to fall back to the booking date, which would
+accrue their interest a second time.
+
+Revision ID: 733d60523e14
+Revises: 
+Create Date: 2026-10-18 04:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '733d60523e14'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOAN_TABLES = ["personal_loans", "business_loans", "mortgages"]
+
+
+def upgrade() -> None:
+    op.add_column("term_deposits", sa.Column("compounding_frequency", sa.String(20), nullable=False, server_default="daily"))
+    op.add_column("term_deposits", sa.Column("last_calculation_date", sa.DateTime(), nullable=True))
+    op.add_column("term_deposits", sa.Column("next_calculation_date", sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE term_deposits SET last_calculation_date = CURRENT_TIMESTAMP, next_calculation_date = CURRENT_TIMESTAMP"
+    )
+    op.alter_column("term_deposits", "next_calculation_date", existing_type=sa.DateTime(), nullable=False)
+
+    op.create_index("ix_term_deposits_due", "term_deposits", ["status", "next_calculation_date", "account_no"])
+    for table in LOAN_TABLES:
+        op.create_index(f"ix_{table}_due", table, ["account_status", "next_calculation_date", "account_no"])
+
+
+def downgrade() -> None:
+    for table in LOAN_TABLES:
+        op.drop_index(f"ix_{table}_due", table_name=table)
+    op.drop_index("ix_term_deposits_due", table_name="term_deposits")
+
+    op.drop_column("term_deposits", "next_calculation_date")
+    op.drop_column("term_deposits", "last_calculation_date")
+    op.drop_column("term_deposits", "compounding_frequency")